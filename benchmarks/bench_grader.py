@@ -0,0 +1,242 @@
+"""
+Benchmarks for the grading logic of the Vector Drawing XBlock.
+
+Runs a microbenchmark for every check function in `Grader.check_registry`,
+as well as benchmarks for grading synthetic workloads (see `benchmarks.workload`)
+with `Grader.grade`, `GradingPlan.grade` (with and without an observer) and `Grader.grade_many`,
+and of grading free-body diagrams with relational checks (with and without fusing them).
+Timings are reported in nanoseconds per operation (i.e. per check or per answer).
+
+Results can be saved to a baseline file and compared against it later;
+benchmarks that got slower than the baseline by more than a given threshold are flagged
+as regressions, and make the command exit with a non-zero status. Timings depend on the machine,
+so baselines should only be compared against results from the same machine.
+
+Example:
+
+    python -m benchmarks.bench_grader --save benchmarks/baseline.json
+    # ... make changes ...
+    python -m benchmarks.bench_grader --compare benchmarks/baseline.json --threshold 0.1
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+
+from vectordraw.grader import Grader, Point, Vector
+from vectordraw.observers import CheckHistogram
+
+from .workload import make_answers, make_free_body_problem, make_problem
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None  # pylint: disable=invalid-name
+
+
+# Checks (and elements they target) used for benchmarking individual check functions.
+# Every check passes, so the whole check function is exercised.
+CHECK_SAMPLES = {
+    'presence': {'vector': 'V', 'check': 'presence'},
+    'tail': {'vector': 'V', 'check': 'tail', 'expected': [1, 1]},
+    'tip': {'vector': 'V', 'check': 'tip', 'expected': [4, 5]},
+    'tail_x': {'vector': 'V', 'check': 'tail_x', 'expected': 1},
+    'tail_y': {'vector': 'V', 'check': 'tail_y', 'expected': 1},
+    'tip_x': {'vector': 'V', 'check': 'tip_x', 'expected': 4},
+    'tip_y': {'vector': 'V', 'check': 'tip_y', 'expected': 5},
+    'coords': {'vector': 'V', 'check': 'coords', 'expected': [[1, 1], [4, 5]]},
+    'length': {'vector': 'V', 'check': 'length', 'expected': 5},
+    'angle': {'vector': 'V', 'check': 'angle', 'expected': 53.13},
+    'segment_angle': {'vector': 'V', 'check': 'segment_angle', 'expected': 233.13},
+    'segment_coords': {'vector': 'V', 'check': 'segment_coords', 'expected': [[4, 5], [1, 1]]},
+    'points_on_line': {
+        'vector': 'V', 'check': 'points_on_line', 'expected': [[1, 1], [4, 5], [7, 9], [-2, -3]]
+    },
+    'point_presence': {'point': 'P', 'check': 'point_presence'},
+    'point_coords': {'point': 'P', 'check': 'point_coords', 'expected': [2, 3]},
+    'sum': {'vectors': ['V', 'W', 'U'], 'check': 'sum', 'expected': [-7, -1]},
+    'parallel': {'vectors': ['V', 'U'], 'check': 'parallel'},
+    'perpendicular': {'vectors': ['V', 'W'], 'check': 'perpendicular'},
+    'relative_angle': {'vectors': ['V', 'W'], 'check': 'relative_angle', 'expected': 90},
+    'length_ratio': {'vectors': ['U', 'V'], 'check': 'length_ratio', 'expected': 2},
+}
+
+SAMPLE_VECTORS = {
+    'V': Vector('V', 1, 1, 4, 5),
+    'W': Vector('W', 1, 1, -3, 4),
+    'U': Vector('U', 0, 0, -6, -8),
+}
+SAMPLE_POINTS = {'P': Point(2, 3)}
+
+# Workloads for benchmarking grading of whole answers:
+# name -> (number of vectors, number of points, checks per vector)
+WORKLOADS = {
+    'small': (2, 0, 2),
+    'medium': (5, 2, 3),
+    'large': (20, 5, 4),
+}
+
+# Numbers of forces of free-body diagrams for benchmarking relational checks
+FREE_BODY_FORCES = (4, 8, 16)
+
+# Number of answers per workload
+ANSWERS = 200
+
+
+def _time(func, repeat):
+    """
+    Return time it takes to call `func` once, in nanoseconds.
+
+    Uses the best of `repeat` runs, each of which calls `func` often enough to take ~0.2 seconds.
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def _check_benchmarks():
+    """
+    Yield (name, func, operations) for benchmarks of individual check functions.
+    """
+    missing = set(Grader.check_registry) - set(CHECK_SAMPLES)
+    if missing:
+        raise RuntimeError(f"No benchmark samples for checks: {', '.join(sorted(missing))}")
+    for name, check_fn in Grader.check_registry.items():
+        check = CHECK_SAMPLES[name]
+        elements = SAMPLE_POINTS if 'point' in check else SAMPLE_VECTORS
+        yield f'check:{name}', lambda check_fn=check_fn, check=check, elements=elements: (
+            check_fn(check, elements)
+        ), 1
+
+
+def _workload_benchmarks(seed):
+    """
+    Yield (name, func, operations) for benchmarks of grading synthetic workloads.
+    """
+    grader = Grader()
+    for workload, (vectors, points, checks_per_vector) in WORKLOADS.items():
+        rng = random.Random(seed)
+        problem = make_problem(rng, vectors, points, checks_per_vector)
+        answers = make_answers(rng, problem, ANSWERS, pass_ratio=0.5)
+
+        def grade(answers=answers):
+            for answer in answers:
+                grader.grade(answer)
+        yield f'grade:{workload}', grade, len(answers)
+
+        plan = grader.compile(problem['checks'])
+        yield f'plan_grade:{workload}', lambda plan=plan, answers=answers: (
+            [plan.grade(answer) for answer in answers]
+        ), len(answers)
+
+        observed_plan = Grader(observer=CheckHistogram()).compile(problem['checks'])
+        yield f'plan_grade_observed:{workload}', lambda plan=observed_plan, answers=answers: (
+            [plan.grade(answer) for answer in answers]
+        ), len(answers)
+
+        if numpy is not None:
+            yield f'grade_many:{workload}', lambda answers=answers: (
+                grader.grade_many(answers)
+            ), len(answers)
+
+    for forces in FREE_BODY_FORCES:
+        rng = random.Random(seed)
+        problem = make_free_body_problem(rng, forces)
+        answers = make_answers(rng, problem, ANSWERS, pass_ratio=0.5)
+        for name, optimize in (('free_body', True), ('free_body_unfused', False)):
+            plan = grader.compile(problem['checks'], optimize)
+            yield f'{name}:{forces}', lambda plan=plan, answers=answers: (
+                [plan.grade(answer) for answer in answers]
+            ), len(answers)
+
+
+def run(selected=None, seed=0, repeat=5):
+    """
+    Run benchmarks whose names contain `selected` (or all of them),
+    and return dictionary that maps their names to timings in nanoseconds per operation.
+    """
+    results = {}
+    benchmarks = list(_check_benchmarks()) + list(_workload_benchmarks(seed))
+    for name, func, operations in benchmarks:
+        if selected and selected not in name:
+            continue
+        results[name] = _time(func, repeat) / operations
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare `results` to `baseline` timings.
+
+    Return list of (name, baseline timing, timing, ratio, regressed) tuples;
+    benchmarks are regressed if they are slower than the baseline by more than `threshold`
+    (e.g. 0.2 for 20%). Baseline timing and ratio are None for benchmarks missing from `baseline`.
+    """
+    comparison = []
+    for name, timing in results.items():
+        if name not in baseline:
+            comparison.append((name, None, timing, None, False))
+            continue
+        ratio = timing / baseline[name]
+        comparison.append((name, baseline[name], timing, ratio, ratio > 1 + threshold))
+    return comparison
+
+
+def main(argv=None):
+    """
+    Run benchmarks from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.bench_grader',
+        description='Benchmark grading logic of the Vector Drawing XBlock.'
+    )
+    parser.add_argument('-k', '--select', help='only run benchmarks whose names contain SELECT')
+    parser.add_argument('--seed', type=int, default=0, help='seed for generating workloads')
+    parser.add_argument(
+        '--repeat', type=int, default=5, help='number of runs per benchmark (default: 5)'
+    )
+    parser.add_argument('--save', metavar='PATH', help='save results to baseline file at PATH')
+    parser.add_argument('--compare', metavar='PATH', help='compare results to baseline at PATH')
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='relative slowdown that counts as a regression (default: 0.2)'
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.select, args.seed, args.repeat)
+
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        print(f"{'benchmark':<28}{'baseline':>12}{'current':>12}{'ratio':>8}")
+        for name, old, new, ratio, regressed in compare(results, baseline, args.threshold):
+            if old is None:
+                print(f'{name:<28}{"-":>12}{new:>12.0f}{"-":>8}')
+                continue
+            flag = '  REGRESSION' if regressed else ''
+            print(f'{name:<28}{old:>12.0f}{new:>12.0f}{ratio:>8.2f}{flag}')
+            if regressed:
+                status = 1
+    else:
+        print(f"{'benchmark':<28}{'ns/op':>12}")
+        for name, timing in results.items():
+            print(f'{name:<28}{timing:>12.0f}')
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as baseline_file:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'seed': args.seed,
+                'results': results,
+            }, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
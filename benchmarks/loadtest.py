@@ -0,0 +1,279 @@
+"""
+Load test for the Vector Drawing XBlock, running in the xblock-sdk workbench runtime.
+
+Sets up a workbench runtime backed by a temporary database (the same way `run_tests.py` does),
+creates a number of Vector Drawing blocks from the scenarios in `vectordraw/templates/xml`,
+and replays simulated students who load the `student_view` of a block and then submit a number
+of answers to it via `check_answer`. Students run concurrently, either in threads or processes,
+and the tool reports throughput and latency percentiles for both operations.
+
+Requires the xblock-sdk package, and this package to be installed (e.g. via `pip install -e .`),
+so that the runtime can find the Vector Drawing XBlock.
+
+Example:
+
+    python -m benchmarks.loadtest --blocks 20 --students 200 --concurrency 16
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Answers are built around the solution of an exercise; correct answers deviate from it
+# by at most this fraction of the tolerance of the checks, incorrect ones are moved by a lot more
+JITTER = 0.1
+DISPLACEMENT = 3
+
+
+def setup_workbench(database):
+    """
+    Configure Django to use workbench settings with SQLite `database`, and create its tables.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'workbench.settings')
+    os.environ['WORKBENCH_DATABASES'] = json.dumps({
+        'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': database},
+    })
+    # pylint: disable=import-outside-toplevel
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    # Workbench settings log to a file in the `var` directory
+    os.makedirs('var', exist_ok=True)
+    if 'vectordraw' not in settings.INSTALLED_APPS:
+        settings.INSTALLED_APPS += ('vectordraw', )
+    # Don't keep track of (and log) every query
+    settings.DEBUG = False
+    django.setup()
+    for noisy_logger in ('django.db.backends', 'workbench.runtime', 'workbench.views'):
+        logging.getLogger(noisy_logger).setLevel(logging.ERROR)
+    call_command('migrate', run_syncdb=True, verbosity=0, interactive=False)
+
+
+def create_blocks(count):
+    """
+    Create `count` Vector Drawing blocks from workbench scenarios, and return their usage IDs.
+    """
+    # pylint: disable=import-outside-toplevel
+    from workbench.runtime import WorkbenchRuntime
+    from vectordraw.vectordraw import VectorDrawXBlock
+
+    scenarios = VectorDrawXBlock.workbench_scenarios()
+    usage_ids = []
+    index = 0
+    while len(usage_ids) < count:
+        _, xml = scenarios[index % len(scenarios)]
+        runtime = WorkbenchRuntime()
+        runtime.id_generator.set_scenario(f'loadtest-{index}')
+        root = runtime.get_block(runtime.parse_xml_string(xml))
+        usage_ids.extend(
+            child for child in [root.scope_ids.usage_id] + list(getattr(root, 'children', []))
+            if runtime.id_reader.get_block_type(runtime.id_reader.get_definition_id(child)) ==
+            'vectordraw'
+        )
+        index += 1
+    return usage_ids[:count]
+
+
+def _vector_coords(vector):
+    """
+    Return initial (tail, tip) of `vector` as defined by the author of an exercise.
+    """
+    if 'coords' in vector:
+        return list(vector['coords'][0]), list(vector['coords'][1])
+    tail = list(vector.get('tail', [0, 0]))
+    length = vector.get('length', 1)
+    angle = math.radians(vector.get('angle', 0))
+    return tail, [tail[0] + length * math.cos(angle), tail[1] + length * math.sin(angle)]
+
+
+def _solve_vector(vector, expected):
+    """
+    Return coordinates of `vector` that satisfy `expected` properties.
+    """
+    tail, tip = _vector_coords(vector)
+    if 'coords' in expected:
+        tail, tip = expected['coords']
+    tail = list(expected.get('tail', tail))
+    length = expected.get('length', math.hypot(tip[0] - tail[0], tip[1] - tail[1]))
+    angle = math.radians(expected.get(
+        'angle', math.degrees(math.atan2(tip[1] - tail[1], tip[0] - tail[0]))
+    ))
+    tip = list(expected.get('tip', [
+        tail[0] + length * math.cos(angle), tail[1] + length * math.sin(angle)
+    ]))
+    return {'tail': tail, 'tip': tip}
+
+
+def solution(block):
+    """
+    Return answer to exercise of `block` that satisfies its expected result.
+
+    Covers the properties that expected results of the bundled scenarios use
+    (tail, tip, coords, length and angle); other properties are ignored.
+    """
+    expected_result = block.get_expected_result
+    vectors = {
+        vector['name']: _solve_vector(vector, expected_result.get(vector['name'], {}))
+        for vector in block.get_vectors
+    }
+    points = {
+        point['name']: list(expected_result.get(point['name'], {}).get('coords', point['coords']))
+        for point in block.get_points
+    }
+    return {'vectors': vectors, 'points': points}
+
+
+def simulated_answer(rng, answer, correct):
+    """
+    Return copy of `answer` whose coordinates are moved by a small amount if it should be
+    `correct`, and by a large amount otherwise.
+    """
+    offset = JITTER if correct else DISPLACEMENT
+
+    def move(coords):
+        return [coord + rng.uniform(-offset, offset) for coord in coords]
+    return {
+        'vectors': {
+            name: {'tail': move(vector['tail']), 'tip': move(vector['tip'])}
+            for name, vector in answer['vectors'].items()
+        },
+        'points': {name: move(coords) for name, coords in answer['points'].items()},
+    }
+
+
+def run_student(student, usage_id, submissions, pass_ratio, seed):
+    """
+    Simulate `student` who views block with `usage_id` and submits `submissions` answers.
+
+    Return list of (operation, latency in seconds) tuples.
+    """
+    # pylint: disable=import-outside-toplevel
+    from webob import Request
+    from workbench.runtime import WorkbenchRuntime
+
+    rng = random.Random(f'{seed}-{student}')
+    runtime = WorkbenchRuntime(user_id=f'student-{student}')
+    timings = []
+
+    start = time.perf_counter()
+    block = runtime.get_block(usage_id)
+    runtime.render(block, 'student_view')
+    timings.append(('student_view', time.perf_counter() - start))
+
+    answer = solution(block)
+    for _ in range(submissions):
+        body = json.dumps(simulated_answer(rng, answer, rng.random() < pass_ratio))
+        start = time.perf_counter()
+        block = runtime.get_block(usage_id)
+        response = runtime.handle(
+            block, 'check_answer', Request.blank('/', method='POST', body=body.encode('utf-8'))
+        )
+        timings.append(('check_answer', time.perf_counter() - start))
+        if response.status_code != 200:
+            raise RuntimeError(f'check_answer failed with status {response.status_code}')
+    return timings
+
+
+def _init_worker(database):
+    """
+    Set up workbench in a worker process.
+    """
+    setup_workbench(database)
+
+
+def run(usage_ids, args, database):
+    """
+    Simulate `args.students` students, and return (operation, latency) tuples and total time.
+    """
+    if args.processes:
+        executor = ProcessPoolExecutor(
+            max_workers=args.concurrency, initializer=_init_worker, initargs=(database,)
+        )
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.concurrency)
+    start = time.perf_counter()
+    with executor:
+        futures = [
+            executor.submit(
+                run_student, student, usage_ids[student % len(usage_ids)],
+                args.submissions, args.pass_ratio, args.seed
+            )
+            for student in range(args.students)
+        ]
+        timings = [timing for future in futures for timing in future.result()]
+    return timings, time.perf_counter() - start
+
+
+def report(timings, elapsed):
+    """
+    Return lines reporting throughput and latency percentiles of each operation.
+    """
+    lines = [
+        f"{'operation':<16}{'count':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    ]
+    for operation in ('student_view', 'check_answer'):
+        latencies = [latency for name, latency in timings if name == operation]
+        if len(latencies) < 2:
+            continue
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p95, p99 = (percentiles[index - 1] * 1000 for index in (50, 95, 99))
+        lines.append(
+            f'{operation:<16}{len(latencies):>8}{len(latencies) / elapsed:>10.1f}'
+            f'{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}'
+        )
+    lines.append(f'Total: {len(timings)} requests in {elapsed:.2f} s '
+                 f'({len(timings) / elapsed:.1f} requests/s)')
+    return lines
+
+
+def main(argv=None):
+    """
+    Run load test from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.loadtest',
+        description='Load test the Vector Drawing XBlock in the workbench runtime.'
+    )
+    parser.add_argument('--blocks', type=int, default=10, help='number of blocks (default: 10)')
+    parser.add_argument(
+        '--students', type=int, default=100, help='number of simulated students (default: 100)'
+    )
+    parser.add_argument(
+        '--submissions', type=int, default=5,
+        help='number of answers each student submits (default: 5)'
+    )
+    parser.add_argument(
+        '--pass-ratio', type=float, default=0.5,
+        help='fraction of answers that are correct (default: 0.5)'
+    )
+    parser.add_argument(
+        '--concurrency', type=int, default=8,
+        help='number of students active at the same time (default: 8)'
+    )
+    parser.add_argument(
+        '--processes', action='store_true',
+        help='run students in separate processes instead of threads'
+    )
+    parser.add_argument('--seed', type=int, default=0, help='seed for simulating answers')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, 'loadtest.db')
+        setup_workbench(database)
+        usage_ids = create_blocks(args.blocks)
+        timings, elapsed = run(usage_ids, args, database)
+    print('\n'.join(report(timings, elapsed)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
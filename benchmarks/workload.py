@@ -0,0 +1,233 @@
+"""
+Generator for synthetic Vector Drawing problems and answers.
+
+Problems are defined the same way course authors define them, i.e. as an expected result
+and a list of points. Answers are generated from the solution of a problem:
+correct answers are slightly perturbed (staying well within default tolerances),
+incorrect answers have one of the graded elements moved or removed.
+"""
+
+import math
+
+from vectordraw.grader import Grader, checks_from_expected_result
+
+# Relative weights of the properties that problems check for each vector
+DEFAULT_CHECK_MIX = {
+    'tail': 1,
+    'tail_x': 1,
+    'tail_y': 1,
+    'tip': 2,
+    'tip_x': 1,
+    'tip_y': 1,
+    'coords': 2,
+    'length': 2,
+    'angle': 2,
+    'segment_angle': 1,
+    'segment_coords': 1,
+    'points_on_line': 1,
+}
+
+# Maximum distance by which coordinates of correct answers deviate from the solution
+NOISE = 0.05
+
+
+def _angle(tail, tip):
+    """
+    Return angle of vector from `tail` to `tip` in degrees, in the range [0, 360).
+    """
+    return math.degrees(math.atan2(tip[1] - tail[1], tip[0] - tail[0])) % 360
+
+
+def _expected_value(prop, tail, tip):
+    """
+    Return expected value of property `prop` of vector from `tail` to `tip`.
+    """
+    values = {
+        'tail': list(tail),
+        'tail_x': tail[0],
+        'tail_y': tail[1],
+        'tip': list(tip),
+        'tip_x': tip[0],
+        'tip_y': tip[1],
+        'coords': [list(tail), list(tip)],
+        'length': math.hypot(tip[0] - tail[0], tip[1] - tail[1]),
+        'angle': _angle(tail, tip),
+        'segment_angle': (_angle(tail, tip) + 180) % 360,
+        'segment_coords': [list(tip), list(tail)],
+        'points_on_line': [
+            list(tail), list(tip), [2 * tip[0] - tail[0], 2 * tip[1] - tail[1]]
+        ],
+    }
+    return values[prop]
+
+
+def _random_vector(rng):
+    """
+    Return (tail, tip) of random vector with integer coordinates and a length of at least 3.
+    """
+    while True:
+        tail = (rng.randint(-5, 5), rng.randint(-5, 5))
+        tip = (rng.randint(-5, 5), rng.randint(-5, 5))
+        if math.hypot(tip[0] - tail[0], tip[1] - tail[1]) >= 3:
+            return tail, tip
+
+
+def _pick_properties(rng, check_mix, count):
+    """
+    Return list of `count` distinct properties picked at random according to weights of `check_mix`.
+    """
+    props = list(check_mix)
+    weights = [check_mix[prop] for prop in props]
+    chosen = []
+    while len(chosen) < min(count, len(props)):
+        prop = rng.choices(props, weights)[0]
+        if prop not in chosen:
+            chosen.append(prop)
+    return chosen
+
+
+def make_problem(rng, vectors=3, points=1, checks_per_vector=2, check_mix=None):
+    """
+    Return random problem with given number of `vectors` and (graded) `points`.
+
+    Each vector gets a presence check followed by `checks_per_vector` distinct property checks,
+    which are picked at random according to the weights of `check_mix`.
+    Each point gets a presence check and a coordinate check.
+
+    The problem is returned as a dictionary containing its `expected_result`, `points`,
+    `checks` derived from them, and a `solution` (i.e. a correct answer).
+    """
+    check_mix = check_mix or DEFAULT_CHECK_MIX
+    expected_result = {}
+    solution = {'vectors': {}, 'points': {}}
+    for index in range(vectors):
+        name = f'V{index}'
+        tail, tip = _random_vector(rng)
+        solution['vectors'][name] = {'tail': list(tail), 'tip': list(tip)}
+        expected_result[name] = {
+            prop: _expected_value(prop, tail, tip)
+            for prop in _pick_properties(rng, check_mix, checks_per_vector)
+        }
+    point_list = []
+    for index in range(points):
+        name = f'P{index}'
+        coords = [rng.randint(-5, 5), rng.randint(-5, 5)]
+        point_list.append({'name': name, 'coords': coords, 'fixed': False})
+        solution['points'][name] = list(coords)
+        expected_result[name] = {'coords': list(coords)}
+    point_names = {point['name'] for point in point_list}
+    return {
+        'expected_result': expected_result,
+        'points': point_list,
+        'checks': checks_from_expected_result(expected_result, point_names),
+        'solution': solution,
+    }
+
+
+def make_free_body_problem(rng, forces=4):
+    """
+    Return random free-body diagram with `forces` forces (with tails at the origin)
+    that are in equilibrium.
+
+    Each force gets a presence check. In addition, the problem checks that forces add up to zero,
+    as well as the relative angle and length ratio of each pair of forces,
+    so the number of relational checks grows quadratically with the number of forces.
+    The problem is returned in the same format as problems returned by `make_problem`.
+    """
+    def random_force():
+        tail, tip = _random_vector(rng)
+        return tip[0] - tail[0], tip[1] - tail[1]
+
+    tips = [random_force() for _ in range(forces - 1)]
+    while True:
+        last = (-sum(tip[0] for tip in tips), -sum(tip[1] for tip in tips))
+        if math.hypot(*last) >= 3:
+            break
+        tips[-1] = random_force()
+    tips.append(last)
+    names = [f'F{index}' for index in range(forces)]
+    solution = {
+        'vectors': {name: {'tail': [0, 0], 'tip': list(tip)} for name, tip in zip(names, tips)},
+        'points': {},
+    }
+    checks = [{'vector': name, 'check': 'presence'} for name in names]
+    checks.append({
+        'vectors': names, 'check': 'sum', 'expected': [0, 0], 'tolerance': 0.15 * forces
+    })
+    for first, first_tip in zip(names, tips):
+        for second, second_tip in zip(names, tips):
+            if first >= second:
+                continue
+            checks.append({
+                'vectors': [first, second], 'check': 'relative_angle',
+                'expected': _angle((0, 0), second_tip) - _angle((0, 0), first_tip), 'tolerance': 5,
+            })
+            ratio = math.hypot(*first_tip) / math.hypot(*second_tip)
+            checks.append({
+                'vectors': [first, second], 'check': 'length_ratio',
+                'expected': ratio, 'tolerance': 0.1 * ratio + 0.05,
+            })
+    return {
+        'expected_result': {name: {} for name in names},
+        'points': [],
+        'checks': checks,
+        'solution': solution,
+    }
+
+
+def _jitter(rng, coords):
+    """
+    Return `coords` moved by a small random offset.
+    """
+    return [coord + rng.uniform(-NOISE, NOISE) for coord in coords]
+
+
+def _correct_answer(rng, problem):
+    """
+    Return answer that deviates from solution of `problem` by a small amount.
+    """
+    solution = problem['solution']
+    return {
+        'vectors': {
+            name: {'tail': _jitter(rng, props['tail']), 'tip': _jitter(rng, props['tip'])}
+            for name, props in solution['vectors'].items()
+        },
+        'points': {name: _jitter(rng, coords) for name, coords in solution['points'].items()},
+        'checks': problem['checks'],
+    }
+
+
+def _incorrect_answer(rng, problem, plan):
+    """
+    Return answer in which one of the elements of the solution of `problem` is wrong.
+
+    Elements are moved to random positions until `plan` rejects the answer;
+    if that does not happen within a few attempts, the element is removed instead.
+    """
+    answer = _correct_answer(rng, problem)
+    kind = rng.choice([kind for kind in ('vectors', 'points') if answer[kind]])
+    name = rng.choice(sorted(answer[kind]))
+    for _ in range(10):
+        if kind == 'vectors':
+            tail, tip = _random_vector(rng)
+            answer[kind][name] = {'tail': list(tail), 'tip': list(tip)}
+        else:
+            answer[kind][name] = [rng.randint(-5, 5), rng.randint(-5, 5)]
+        if not plan.grade(answer)['correct']:
+            return answer
+    del answer[kind][name]
+    return answer
+
+
+def make_answers(rng, problem, count, pass_ratio=0.5):
+    """
+    Return list of `count` answers to `problem`, `pass_ratio` of which are correct.
+
+    Correct and incorrect answers are shuffled.
+    """
+    plan = Grader().compile(problem['checks'])
+    correct = round(count * pass_ratio)
+    answers = [_correct_answer(rng, problem) for _ in range(correct)]
+    answers += [_incorrect_answer(rng, problem, plan) for _ in range(count - correct)]
+    rng.shuffle(answers)
+    return answers
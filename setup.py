@@ -39,10 +39,17 @@ setup(
         'XBlock',
         'xblock-utils',
     ],
+    extras_require={
+        'batch': ['numpy'],
+        'matching': ['scipy'],
+    },
     entry_points={
         'xblock.v1': [
             'vectordraw = vectordraw.vectordraw:VectorDrawXBlock',
-        ]
+        ],
+        'console_scripts': [
+            'vectordraw-grade = vectordraw.cli:main',
+        ],
     },
     package_data=package_data("vectordraw", ["static", "public", "templates"]),
 )
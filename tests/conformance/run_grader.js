@@ -0,0 +1,18 @@
+/* Grades the cases from a conformance corpus with the JavaScript grader.
+ *
+ * Usage: node run_grader.js grader_cases.json
+ *
+ * Writes a JSON list with the result for each case to standard output.
+ */
+'use strict';
+
+var fs = require('fs');
+var path = require('path');
+
+var VectorDrawGrader = require(path.join(__dirname, '../../vectordraw/public/js/vectordraw_grader.js'));
+
+var cases = JSON.parse(fs.readFileSync(process.argv[2], 'utf8'));
+var results = cases.map(function(testCase) {
+    return VectorDrawGrader.grade(testCase.checks, testCase.answer);
+});
+process.stdout.write(JSON.stringify(results));
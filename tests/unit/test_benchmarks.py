@@ -0,0 +1,82 @@
+from __future__ import absolute_import
+
+import json
+import random
+import unittest
+from unittest.mock import Mock
+
+from lxml import etree
+
+from benchmarks import bench_grader, loadtest
+from benchmarks.workload import make_answers, make_free_body_problem, make_problem
+from vectordraw.grader import Grader, checks_from_expected_result
+from vectordraw.vectordraw import VectorDrawXBlock
+
+
+class WorkloadTest(unittest.TestCase):
+
+    def test_make_answers(self):
+        rng = random.Random(0)
+        for vectors, points, checks_per_vector in [(1, 0, 1), (5, 2, 3), (10, 3, 6)]:
+            problem = make_problem(rng, vectors, points, checks_per_vector)
+            self.assertEqual(len(problem['expected_result']), vectors + points)
+            self.assertEqual(len(problem['checks']), vectors * (checks_per_vector + 1) + points * 2)
+            answers = make_answers(rng, problem, 50, pass_ratio=0.4)
+            results = [Grader().grade(answer) for answer in answers]
+            self.assertEqual(sum(result['correct'] for result in results), 20)
+
+    def test_make_free_body_problem(self):
+        rng = random.Random(0)
+        for forces in (2, 5, 10):
+            problem = make_free_body_problem(rng, forces)
+            self.assertEqual(len(problem['checks']), forces + 1 + forces * (forces - 1))
+            answers = make_answers(rng, problem, 50, pass_ratio=0.4)
+            plan = Grader().compile(problem['checks'])
+            self.assertEqual(sum(plan.grade(answer)['correct'] for answer in answers), 20)
+
+
+class BenchGraderTest(unittest.TestCase):
+
+    def test_check_samples(self):
+        for name, check_fn in Grader.check_registry.items():
+            check = bench_grader.CHECK_SAMPLES[name]
+            elements = bench_grader.SAMPLE_POINTS if 'point' in check else bench_grader.SAMPLE_VECTORS
+            check_fn(check, elements)
+
+    def test_compare(self):
+        results = {'check:tip': 120, 'check:tail': 100, 'grade:small': 1000}
+        baseline = {'check:tip': 100, 'check:tail': 100}
+        self.assertEqual(bench_grader.compare(results, baseline, threshold=0.1), [
+            ('check:tip', 100, 120, 1.2, True),
+            ('check:tail', 100, 100, 1.0, False),
+            ('grade:small', None, 1000, None, False),
+        ])
+
+
+class LoadTestTest(unittest.TestCase):
+
+    def test_solution(self):
+        for _, xml in VectorDrawXBlock.workbench_scenarios():
+            attributes = etree.fromstring(xml).find('vectordraw').attrib
+            expected_result = json.loads(attributes['expected_result'])
+            points = json.loads(attributes['points'])
+            block = Mock(
+                get_expected_result=expected_result,
+                get_vectors=json.loads(attributes['vectors']),
+                get_points=points,
+            )
+            plan = Grader().compile(checks_from_expected_result(
+                expected_result, {point['name'] for point in points}
+            ))
+            answer = loadtest.solution(block)
+            self.assertEqual(plan.grade(answer), {'correct': True, 'msg': 'Test passed'})
+            rng = random.Random(0)
+            self.assertTrue(plan.grade(loadtest.simulated_answer(rng, answer, True))['correct'])
+            self.assertFalse(plan.grade(loadtest.simulated_answer(rng, answer, False))['correct'])
+
+    def test_report(self):
+        timings = [('student_view', 0.01 * index) for index in range(1, 101)] + [('check_answer', 0.002)] * 10
+        lines = loadtest.report(timings, elapsed=2)
+        self.assertEqual(lines[1].split(), ['student_view', '100', '50.0', '505.00', '950.50', '990.10'])
+        self.assertEqual(lines[2].split(), ['check_answer', '10', '5.0', '2.00', '2.00', '2.00'])
+        self.assertEqual(lines[3], 'Total: 110 requests in 2.00 s (55.0 requests/s)')
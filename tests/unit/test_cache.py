@@ -0,0 +1,35 @@
+from __future__ import absolute_import
+
+import unittest
+
+from vectordraw.cache import LRUCache, answer_fingerprint
+
+
+class CacheTest(unittest.TestCase):
+
+    def test_lru_cache(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.get('b', 'missing'), 'missing')
+        self.assertEqual(cache.get_or_create('c', lambda: 4), 3)
+        self.assertEqual(cache.get_or_create('d', lambda: 4), 4)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+
+    def test_answer_fingerprint(self):
+        answer = {'vectors': {'a': {'tail': [0, 0], 'tip': [1, 1]}, 'b': {'tail': [1, 1], 'tip': [2, 2]}},
+                  'points': {'p': [0.5, 0.5]}}
+        reordered = {'vectors': {'b': {'tail': [1, 1], 'tip': [2, 2]}, 'a': {'tail': [0, 0], 'tip': [1, 1]}},
+                     'points': {'p': [0.5, 0.5]}}
+        moved = {'vectors': {'a': {'tail': [0, 0], 'tip': [1, 1]}, 'b': {'tail': [1, 1], 'tip': [2, 2.001]}},
+                 'points': {'p': [0.5, 0.5]}}
+        self.assertEqual(answer_fingerprint(answer), answer_fingerprint(reordered))
+        self.assertNotEqual(answer_fingerprint(answer), answer_fingerprint(moved))
+        self.assertNotEqual(answer_fingerprint(answer, 0.001), answer_fingerprint(moved, 0.001))
+        self.assertEqual(answer_fingerprint(answer, 0.01), answer_fingerprint(moved, 0.01))
@@ -0,0 +1,86 @@
+from __future__ import absolute_import
+
+import io
+import json
+import unittest
+from unittest import mock
+
+from vectordraw import cli
+
+
+class GradeCommandTest(unittest.TestCase):
+
+    def record(self, tip, **kwargs):
+        record = {
+            'expected_result': json.dumps({'vec': {'angle': 45, 'tail': [0, 0]}}),
+            'answer': {'vectors': {'vec': {'tail': [0, 0], 'tip': tip}}, 'points': {}},
+        }
+        record.update(kwargs)
+        return json.dumps(record)
+
+    def test_grade_lines(self):
+        lines = [
+            self.record([1, 1], id='a'),
+            self.record([1, 0]),
+            self.record([1, 0], checks=[{'vector': 'vec', 'check': 'length', 'expected': 1}]),
+            '{"answer": {}}',
+            self.record([0, 1], id='b'),
+        ]
+        self.assertEqual(cli.grade_lines(lines), [
+            {'id': 'a', 'result': {'correct': True, 'msg': 'Test passed'}},
+            {'result': {'correct': False, 'msg': 'The angle of vec is incorrect. Your angle: 0.0'}},
+            {'result': {'correct': True, 'msg': 'Test passed'}},
+            {'error': "KeyError: 'expected_result'"},
+            {'id': 'b', 'result': {'correct': False, 'msg': 'The angle of vec is incorrect. Your angle: 90.0'}},
+        ])
+
+    def test_grade_lines_like_xblock(self):
+        expected_result = {'F1': {'angle': 0}, 'F2': {'angle': 90}}
+        answer = {
+            'vectors': {'F1': {'tail': [0, 0], 'tip': [0, 2]}, 'F2': {'tail': [0, 0], 'tip': [1, 0]}},
+            'points': {},
+        }
+        custom_checks = [{'check': 'length_ratio', 'vectors': ['F1', 'F2'], 'expected': 1, 'errmsg': 'Same length!'}]
+        records = [
+            {'expected_result': expected_result, 'answer': answer},
+            {'expected_result': expected_result, 'answer': answer, 'match_vectors': True},
+            {
+                'expected_result': expected_result, 'answer': answer, 'match_vectors': True,
+                'custom_checks': custom_checks,
+            },
+            {'expected_result': expected_result, 'answer': answer, 'custom_checks': ['(' * 100 + '1 > 0' + ')' * 100]},
+        ]
+        self.assertEqual(cli.grade_lines([json.dumps(record) for record in records]), [
+            {'result': {'correct': False, 'msg': 'The angle of F1 is incorrect. Your angle: 90.0'}},
+            {'result': {'correct': True, 'msg': 'Test passed', 'assignment': {'F1': 'F2', 'F2': 'F1'}}},
+            {'result': {'correct': False, 'msg': 'Same length!', 'assignment': {'F1': 'F2', 'F2': 'F1'}}},
+            {'error': 'ExpressionError: Expression is nested too deeply at position 21'},
+        ])
+        self.assertEqual(
+            cli.grade_lines([json.dumps(records[1])], correctness_only=True), [{'result': {'correct': True}}]
+        )
+
+    def test_main(self):
+        lines = [self.record([1, 1], id=i) if i % 3 else self.record([2, 1], id=i) for i in range(50)]
+        expected = cli.grade_lines(lines)
+        for jobs in ('1', '2'):
+            output = io.StringIO()
+            with mock.patch('sys.stdin', io.StringIO('\n'.join(lines) + '\n')), \
+                    mock.patch('sys.stdout', output):
+                cli.main(['--jobs', jobs, '--chunk-size', '7'])
+            self.assertEqual([json.loads(line) for line in output.getvalue().splitlines()], expected)
+
+    def test_correctness_only(self):
+        lines = [self.record([1, 1], id='a'), self.record([1, 0]), '{"answer": {}}']
+        self.assertEqual(cli.grade_lines(lines, correctness_only=True), [
+            {'id': 'a', 'result': {'correct': True}},
+            {'result': {'correct': False}},
+            {'error': "KeyError: 'expected_result'"},
+        ])
+        output = io.StringIO()
+        with mock.patch('sys.stdin', io.StringIO('\n'.join(lines) + '\n')), mock.patch('sys.stdout', output):
+            cli.main(['--jobs', '1', '--correctness-only'])
+        self.assertEqual(
+            [json.loads(line) for line in output.getvalue().splitlines()],
+            cli.grade_lines(lines, correctness_only=True),
+        )
@@ -0,0 +1,43 @@
+from __future__ import absolute_import
+
+import json
+import os
+import shutil
+import subprocess
+import unittest
+
+from vectordraw.grader import Grader
+
+CONFORMANCE_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'conformance')
+CASES_PATH = os.path.join(CONFORMANCE_DIR, 'grader_cases.json')
+
+
+def load_cases():
+    with open(CASES_PATH, encoding='utf-8') as cases_file:
+        return json.load(cases_file)
+
+
+class GraderConformanceTest(unittest.TestCase):
+    """
+    The Python and JavaScript graders must both give the expected results for the shared corpus.
+    """
+
+    def test_python_grader(self):
+        grader = Grader()
+        for case in load_cases():
+            with self.subTest(case['description']):
+                result = grader.grade(dict(case['answer'], checks=case['checks']))
+                self.assertEqual(result, case['result'])
+
+    @unittest.skipUnless(shutil.which('node'), 'Node.js is not installed')
+    def test_javascript_grader(self):
+        output = subprocess.run(
+            ['node', os.path.join(CONFORMANCE_DIR, 'run_grader.js'), CASES_PATH],
+            check=True, capture_output=True, timeout=60,
+        ).stdout
+        cases = load_cases()
+        results = json.loads(output)
+        self.assertEqual(len(results), len(cases))
+        for case, result in zip(cases, results):
+            with self.subTest(case['description']):
+                self.assertEqual(result, case['result'])
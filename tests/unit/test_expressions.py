@@ -0,0 +1,125 @@
+from __future__ import absolute_import
+
+import json
+import unittest
+
+import ddt
+
+from vectordraw.expressions import (
+    ExpressionError, compile_check, compile_expression, custom_checks_from_json
+)
+from vectordraw.grader import Grader, Point, Vector
+
+
+@ddt.ddt
+class ExpressionsTest(unittest.TestCase):
+
+    def setUp(self):
+        super(ExpressionsTest, self).setUp()
+        self.vectors = {
+            'F1': Vector('F1', 0, 0, 4, 0),
+            'F2': Vector('F2', 1, 1, 1, 3),
+            'N': Vector('N', 0, 0, 0, 3),
+            'f': Vector('f', 0, 0, -2, 0),
+        }
+        self.points = {'P': Point(1, -2)}
+
+    def evaluate(self, expression):
+        return compile_expression(expression)(self.vectors, self.points)
+
+    @ddt.data(
+        ('length(F1) == 2 * length(F2)', True),
+        ('length(F1) == 3', True),
+        ('length(F1) == 3 +- 0.5', False),
+        ('length(F1) != 3 +- 0.5', True),
+        ('angle(N) - angle(f) ~ 90 +- 2', False),
+        ('angle(f) - angle(N) ~ 90 +- 2', True),
+        ('angle(N) - angle(f) ~ -90', True),
+        ('angle(F1) ~ 359', True),
+        ('tail_x(F2) + tail_y(F2) == 2 +- 0', True),
+        ('tip_x(F2) * tip_y(F2) == 3 +- 0', True),
+        ('dx(f) / dy(N) < 0', True),
+        ('-x(P) >= -1 and y(P) <= -2', True),
+        ('x(P) > 0 and y(P) > 0', False),
+        ('x(P) > 0 and not y(P) > 0', True),
+        ('x(P) < 0 or (y(P) < 0 and 1 < 2)', True),
+        ("length('F1') == hypot(3, 4) - 1 +- 0", True),
+        ('abs(dx(f)) == sqrt(4) +- 0', True),
+        ('min(length(F1), length(F2), 3) == 2 +- 0', True),
+        ('max(length(F1), length(F2)) == 4 +- 0', True),
+        ('length(N) * cos(60) == 1.5 +- 1e-9', True),
+        ('sin(30) == .5 +- 1e-9 and tan(45) == 1e0 +- 1e-9', True),
+    )
+    @ddt.unpack
+    def test_evaluate(self, expression, expected):
+        self.assertIs(self.evaluate(expression), expected)
+
+    @ddt.data(
+        ('', 'Expected a number, function call or "(" at position 0'),
+        ('length(F1)', 'Expected a comparison at position 0'),
+        ('length(F1) >', 'Expected a number, function call or "(" at position 12'),
+        ('length(F1) > 1 +- 2', 'Unexpected input at position 15'),
+        ('length(F1) $ 1', 'Invalid character at position 11'),
+        ('F1 > 1', 'Expected a number, function call or "(" at position 0'),
+        ('presence(F1) > 1', 'Unknown function "presence" at position 0'),
+        ('length(1) > 0', 'Expected name of a vector or point at position 7'),
+        ('length(F1, F2) > 0', 'Expected ")" at position 9'),
+        ('min(1) > 0', 'Wrong number of arguments for "min" at position 0'),
+        ('(1 > 0) + 1 > 0', 'Expected a number at position 0'),
+        ('x(P) > 0 and y(P)', 'Expected a comparison at position 13'),
+        ('not x(P)', 'Expected a comparison at position 4'),
+        ('(x(P) > 0', 'Expected ")" at position 9'),
+        ('1 / 0 > 1', 'Invalid operation (float division by zero) at position 2'),
+        ('(' * 21 + '1 > 0' + ')' * 21, 'Expression is nested too deeply at position 21'),
+        ('-' * 21 + '1 > 0', 'Expression is nested too deeply at position 21'),
+        ('not ' * 21 + '1 > 0', 'Expression is nested too deeply at position 84'),
+        ('sqrt(' * 21 + '1' + ')' * 21 + ' > 0', 'Expression is nested too deeply at position 105'),
+    )
+    @ddt.unpack
+    def test_invalid(self, expression, message):
+        with self.assertRaises(ExpressionError) as context:
+            compile_expression(expression)
+        self.assertEqual(str(context.exception), message)
+
+    def test_compile_check(self):
+        check_fn = compile_check('length(F1) / (length(N) - 3) > 0')
+        with self.assertRaises(ValueError) as context:
+            check_fn({}, self.vectors, self.points)
+        self.assertEqual(str(context.exception), 'Your answer is not correct.')
+        with self.assertRaises(ValueError) as context:
+            check_fn({'errmsg': 'Not quite.'}, self.vectors, self.points)
+        self.assertEqual(str(context.exception), 'Not quite.')
+        del self.vectors['N']
+        with self.assertRaises(ValueError) as context:
+            check_fn({'errmsg': 'Not quite.'}, self.vectors, self.points)
+        self.assertEqual(str(context.exception), 'You need to use the N vector.')
+        self.assertIsNone(compile_check('x(P) > 0')({}, self.vectors, self.points))
+        with self.assertRaises(ValueError) as context:
+            compile_check('x(Q) > 0')({}, self.vectors, self.points)
+        self.assertEqual(str(context.exception), 'You need to use the Q point.')
+
+    def test_custom_checks_from_json(self):
+        checks, check_functions = custom_checks_from_json(
+            '["length(F1) > 5", {"expression": "x(P) > 0", "errmsg": "Move P."}]'
+        )
+        self.assertEqual(checks, [
+            {'check': 'length(F1) > 5'},
+            {'check': 'x(P) > 0', 'errmsg': 'Move P.'},
+        ])
+        answer = {
+            'vectors': {'F1': {'tail': [0, 0], 'tip': [6, 0]}},
+            'points': {'P': [-1, 0]},
+            'checks': [{'vector': 'F1', 'check': 'presence'}] + checks,
+        }
+        self.assertEqual(
+            Grader(custom_checks=check_functions).grade(answer), {'correct': False, 'msg': 'Move P.'}
+        )
+        self.assertEqual(custom_checks_from_json('[]'), ([], {}))
+        # Expressions can be nested up to the limit
+        checks, _ = custom_checks_from_json(json.dumps(['(' * 20 + '1 > 0' + ')' * 20]))
+        self.assertEqual(len(checks), 1)
+
+    @ddt.data('{}', '[1]', '[{"errmsg": "Oops"}]', '["x(P)"]', 'not json', '[' * 100000)
+    def test_custom_checks_from_json_invalid(self, custom_checks):
+        with self.assertRaises(ValueError):
+            custom_checks_from_json(custom_checks)
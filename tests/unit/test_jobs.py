@@ -0,0 +1,86 @@
+from __future__ import absolute_import
+
+import threading
+import unittest
+
+from vectordraw.jobs import GradingQueue, QueueFull
+
+
+class GradingQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        super(GradingQueueTest, self).setUp()
+        self.queue = GradingQueue(workers=1, max_pending=2, max_finished=2)
+        self.addCleanup(self.queue.shutdown)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def blocked(self, value):
+        def grade():
+            self.release.wait(5)
+            return value
+        return grade
+
+    def test_submit(self):
+        ticket = self.queue.submit('student', 'answer', lambda: 'result')
+        job = self.queue.get(ticket, timeout=5)
+        self.assertTrue(job.done())
+        self.assertEqual(job.result(), 'result')
+        self.assertEqual(self.queue.pending, 0)
+        self.assertIsNone(self.queue.get('unknown'))
+        self.queue.discard(ticket)
+        self.assertIsNone(self.queue.get(ticket))
+
+    def test_repeated_submissions(self):
+        ticket = self.queue.submit('student', 'answer', self.blocked('first'))
+        self.assertEqual(self.queue.submit('student', 'answer', self.blocked('second')), ticket)
+        self.assertNotEqual(self.queue.submit('other student', 'answer', self.blocked('other')), ticket)
+        self.release.set()
+        self.assertEqual(self.queue.get(ticket, timeout=5).result(), 'first')
+        # Same answer is not graded again once it is done
+        self.assertEqual(self.queue.submit('student', 'answer', self.blocked('third')), ticket)
+
+    def test_newer_answers_supersede_queued_ones(self):
+        running = self.queue.submit('other student', 'answer', self.blocked('other'))
+        queued = self.queue.submit('student', 'answer', self.blocked('first'))
+        ticket = self.queue.submit('student', 'new answer', self.blocked('second'))
+        self.assertTrue(self.queue.get(queued).future.cancelled())
+        self.release.set()
+        self.assertEqual(self.queue.get(ticket, timeout=5).result(), 'second')
+        self.assertEqual(self.queue.get(running, timeout=5).result(), 'other')
+        self.assertEqual(self.queue.pending, 0)
+
+    def test_backpressure(self):
+        self.queue.submit('first student', 'answer', self.blocked('first'))
+        self.queue.submit('second student', 'answer', self.blocked('second'))
+        with self.assertRaises(QueueFull):
+            self.queue.submit('third student', 'answer', self.blocked('third'))
+        # Repeated submissions don't count against the limit
+        self.queue.submit('first student', 'answer', self.blocked('first'))
+        self.release.set()
+        self.queue.shutdown()
+        self.assertEqual(self.queue.pending, 0)
+        self.queue.submit('third student', 'answer', self.blocked('third'))
+
+    def test_failed_jobs_are_retried(self):
+        def fail():
+            raise ValueError('Oops')
+        ticket = self.queue.submit('student', 'answer', fail)
+        with self.assertRaises(ValueError):
+            self.queue.get(ticket, timeout=5).result()
+        self.assertNotEqual(self.queue.submit('student', 'answer', lambda: 'result'), ticket)
+
+    def test_finished_jobs_are_discarded(self):
+        tickets = []
+        for student in range(4):
+            tickets.append(self.queue.submit(student, 'answer', lambda: None))
+            self.queue.get(tickets[-1], timeout=5)
+        self.queue.submit('student', 'answer', lambda: None)
+        self.assertIsNone(self.queue.get(tickets[0]))
+        self.assertIsNotNone(self.queue.get(tickets[-1]))
+
+    def test_from_environ(self):
+        queue = GradingQueue.from_environ({
+            'VECTORDRAW_GRADING_WORKERS': '8', 'VECTORDRAW_GRADING_QUEUE_SIZE': '100',
+        })
+        self.assertEqual((queue.workers, queue.max_pending), (8, 100))
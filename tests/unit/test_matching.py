@@ -0,0 +1,80 @@
+from __future__ import absolute_import
+
+import itertools
+import random
+import unittest
+from unittest import mock
+
+import ddt
+
+from vectordraw import matching
+from vectordraw.grader import Grader, checks_from_expected_result
+
+
+def answer(**tips):
+    return {'vectors': {name: {'tail': [0, 0], 'tip': list(tip)} for name, tip in tips.items()}, 'points': {}}
+
+
+@ddt.ddt
+class MatchingTest(unittest.TestCase):
+
+    def setUp(self):
+        super(MatchingTest, self).setUp()
+        expected_result = {
+            'F1': {'angle': 0, 'length': 2},
+            'F2': {'angle': 90, 'length': 2},
+            'F3': {'angle': 180, 'length': 1},
+        }
+        checks = checks_from_expected_result(expected_result)
+        checks.append({'check': 'sum', 'vectors': ['F1', 'F3'], 'expected': [1, 0], 'tolerance': 0.1})
+        self.plan = Grader().compile(checks)
+        self.matcher = matching.VectorMatcher(self.plan, expected_result)
+
+    def grade(self, submitted):
+        relabeled, assignment = self.matcher.match(submitted)
+        return self.plan.grade(relabeled), assignment
+
+    @ddt.data(matching.assign, matching._hungarian)
+    def test_assign_finds_cheapest_assignment(self, assign):
+        rng = random.Random(42)
+        for size in range(1, 7):
+            for _ in range(20):
+                cost = [[rng.choice([0, 1, 2, 2.5, rng.random()]) for _ in range(size)] for _ in range(size)]
+                assignment = assign(cost)
+                self.assertEqual(sorted(assignment), list(range(size)))
+                best = min(
+                    sum(cost[row][column] for row, column in enumerate(permutation))
+                    for permutation in itertools.permutations(range(size))
+                )
+                self.assertAlmostEqual(sum(cost[row][column] for row, column in enumerate(assignment)), best)
+
+    def test_assign_without_scipy(self):
+        with mock.patch.object(matching, 'linear_sum_assignment', None):
+            self.assertEqual(matching.assign([[4, 1, 3], [2, 0, 5], [3, 2, 2]]), [1, 0, 2])
+        self.assertEqual(matching.assign([]), [])
+
+    def test_swapped_labels(self):
+        result, assignment = self.grade(answer(F1=(0, 2), F2=(2, 0), F3=(-1, 0)))
+        self.assertEqual(result, {'correct': True, 'msg': 'Test passed'})
+        self.assertEqual(assignment, {'F1': 'F2', 'F2': 'F1', 'F3': 'F3'})
+
+    def test_labels_are_kept_if_they_match(self):
+        result, assignment = self.grade(answer(F1=(2, 0), F2=(0, 2), F3=(-1, 0)))
+        self.assertTrue(result['correct'])
+        self.assertEqual(assignment, {'F1': 'F1', 'F2': 'F2', 'F3': 'F3'})
+        # Ties between equally wrong vectors are broken in favor of keeping labels
+        _, assignment = self.grade(answer(F1=(5, 5), F2=(5, 5), F3=(-1, 0)))
+        self.assertEqual(assignment, {'F1': 'F1', 'F2': 'F2', 'F3': 'F3'})
+
+    def test_missing_vectors(self):
+        result, assignment = self.grade(answer(F3=(0, 2), F1=(-1, 0)))
+        self.assertEqual(assignment, {'F1': 'F3', 'F3': 'F2'})
+        self.assertEqual(result, {'correct': False, 'msg': 'You need to use the F1 vector.'})
+
+    def test_other_vectors_keep_their_labels(self):
+        submitted = answer(F1=(0, 2), F2=(2, 0), F3=(-1, 0), G=(1, 1))
+        relabeled, _ = self.matcher.match(submitted)
+        self.assertEqual(relabeled['vectors']['G'], submitted['vectors']['G'])
+        self.assertEqual(relabeled['vectors']['F1'], submitted['vectors']['F2'])
+        self.assertEqual(submitted['vectors']['F1'], {'tail': [0, 0], 'tip': [0, 2]})
+        self.assertEqual(self.matcher.match(answer(G=(1, 1))), (answer(G=(1, 1)), {}))
@@ -0,0 +1,75 @@
+from __future__ import absolute_import
+
+import os
+import unittest
+
+from vectordraw.cache import LRUCache
+from vectordraw.metrics import MetricsRegistry
+
+
+class MetricsRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        super(MetricsRegistryTest, self).setUp()
+        self.registry = MetricsRegistry()
+        self.latency = self.registry.histogram('test_seconds', 'Latency.', bounds=(0.1, 1))
+        self.rejected = self.registry.counter('test_rejected', 'Rejections.')
+        self.cache = LRUCache(maxsize=10)
+        self.registry.register_cache('test_cache', self.cache)
+
+    def test_snapshot(self):
+        self.assertIs(self.registry.counter('test_rejected', 'Rejections.'), self.rejected)
+        self.latency.observe(0.05)
+        self.latency.observe(0.5)
+        self.latency.observe(5)
+        self.rejected.inc()
+        self.cache.set('key', 'value')
+        self.cache.get('key')
+        self.cache.get('other')
+        self.assertEqual(self.registry.snapshot(), {
+            'pid': os.getpid(),
+            'metrics': {
+                'test_seconds': {'count': 3, 'sum': 5.55, 'buckets': {0.1: 1, 1: 2, float('inf'): 3}},
+                'test_rejected': 1,
+            },
+            'caches': {
+                'test_cache': {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'size': 1, 'maxsize': 10},
+            },
+        })
+        self.registry.reset()
+        self.assertEqual(self.registry.snapshot()['metrics']['test_rejected'], 0)
+        self.assertEqual(self.registry.snapshot()['metrics']['test_seconds']['count'], 0)
+
+    def test_render(self):
+        self.latency.observe(0.5)
+        self.rejected.inc(2)
+        self.cache.get('key')
+        pid = os.getpid()
+        self.assertEqual(self.registry.render().splitlines(), [
+            '# TYPE vectordraw_worker info',
+            '# HELP vectordraw_worker Worker process that reported these metrics.',
+            f'vectordraw_worker_info{{pid="{pid}"}} 1',
+            '# TYPE test_seconds histogram',
+            '# HELP test_seconds Latency.',
+            f'test_seconds_bucket{{le="0.1",pid="{pid}"}} 0',
+            f'test_seconds_bucket{{le="1.0",pid="{pid}"}} 1',
+            f'test_seconds_bucket{{le="+Inf",pid="{pid}"}} 1',
+            f'test_seconds_count{{pid="{pid}"}} 1',
+            f'test_seconds_sum{{pid="{pid}"}} 0.5',
+            '# TYPE test_rejected counter',
+            '# HELP test_rejected Rejections.',
+            f'test_rejected_total{{pid="{pid}"}} 2',
+            '# TYPE vectordraw_cache_hits counter',
+            '# HELP vectordraw_cache_hits Cache lookups that found an entry.',
+            f'vectordraw_cache_hits_total{{cache="test_cache",pid="{pid}"}} 0',
+            '# TYPE vectordraw_cache_misses counter',
+            '# HELP vectordraw_cache_misses Cache lookups that found no entry.',
+            f'vectordraw_cache_misses_total{{cache="test_cache",pid="{pid}"}} 1',
+            '# TYPE vectordraw_cache_entries gauge',
+            '# HELP vectordraw_cache_entries Number of cached entries.',
+            f'vectordraw_cache_entries{{cache="test_cache",pid="{pid}"}} 0',
+            '# TYPE vectordraw_cache_capacity gauge',
+            '# HELP vectordraw_cache_capacity Maximum number of cached entries.',
+            f'vectordraw_cache_capacity{{cache="test_cache",pid="{pid}"}} 10',
+            '# EOF',
+        ])
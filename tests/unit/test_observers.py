@@ -0,0 +1,75 @@
+from __future__ import absolute_import
+
+import logging
+import unittest
+from unittest.mock import Mock
+
+from vectordraw.grader import Grader
+from vectordraw.observers import CheckHistogram, CheckObserver, CompositeObserver, LoggingCheckObserver
+
+
+class ObserversTest(unittest.TestCase):
+
+    checks = [
+        {'vector': 'N', 'check': 'presence'},
+        {'vector': 'N', 'check': 'length', 'expected': 5},
+        {'point': 'cm', 'check': 'point_coords', 'expected': [1, 1]},
+    ]
+
+    def answer(self, tip):
+        return {'vectors': {'N': {'tail': [0, 0], 'tip': tip}}, 'points': {'cm': [1, 1]}}
+
+    def test_grader_notifies_observer(self):
+        observer = Mock()
+        plan = Grader(observer=observer).compile(self.checks)
+        self.assertTrue(plan.grade(self.answer([3, 4]))['correct'])
+        self.assertEqual([call.args[:2] for call in observer.check_evaluated.call_args_list], [
+            ('presence', 'N'), ('length', 'N'), ('point_coords', 'cm')
+        ])
+        observer.reset_mock()
+        self.assertFalse(plan.grade(self.answer([1, 1]))['correct'])
+        (check_name, target, elapsed_ns, passed), = [
+            call.args for call in observer.check_evaluated.call_args_list if not call.args[3]
+        ]
+        self.assertEqual((check_name, target, passed), ('length', 'N', False))
+        self.assertIsInstance(elapsed_ns, int)
+        self.assertEqual(observer.check_evaluated.call_count, 2)
+
+    def test_base_observer_ignores_checks(self):
+        class IdleObserver(CheckObserver):
+            pass
+
+        plan = Grader(observer=IdleObserver()).compile(self.checks)
+        self.assertTrue(plan.grade(self.answer([3, 4]))['correct'])
+
+    def test_histogram(self):
+        histogram = CheckHistogram(bounds=(100, 1000))
+        histogram.check_evaluated('length', 'N', 50, True)
+        histogram.check_evaluated('length', 'N', 500, False)
+        histogram.check_evaluated('length', 'F', 5000, True)
+        histogram.check_evaluated('angle', 'N', 100, True)
+        self.assertEqual(histogram.snapshot(), {
+            'length': {'count': 3, 'failed': 1, 'total_ns': 5550, 'max_ns': 5000, 'buckets': [1, 1, 1]},
+            'angle': {'count': 1, 'failed': 0, 'total_ns': 100, 'max_ns': 100, 'buckets': [1, 0, 0]},
+        })
+        histogram.clear()
+        self.assertEqual(histogram.snapshot(), {})
+
+    def test_logging_observer(self):
+        logger = logging.getLogger('vectordraw.tests')
+        samples = iter([0.3, 0.05])
+        observer = LoggingCheckObserver(logger, sample_rate=0.1, rng=lambda: next(samples))
+        with self.assertLogs(logger, logging.DEBUG) as logs:
+            observer.check_evaluated('tip', 'N', 1200, True)
+            observer.check_evaluated('length', 'N', 800, False)
+        record, = logs.records
+        self.assertEqual(record.getMessage(), 'Evaluated check length for N in 800 ns (passed: False)')
+        self.assertEqual(record.vectordraw_check, {
+            'check': 'length', 'target': 'N', 'elapsed_ns': 800, 'passed': False
+        })
+
+    def test_composite_observer(self):
+        observers = Mock(), Mock()
+        CompositeObserver(*observers).check_evaluated('tip', 'N', 1200, True)
+        for observer in observers:
+            observer.check_evaluated.assert_called_once_with('tip', 'N', 1200, True)
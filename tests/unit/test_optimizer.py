@@ -0,0 +1,111 @@
+from __future__ import absolute_import
+
+import random
+import unittest
+
+from vectordraw.grader import Grader, GradingPlan
+from vectordraw.optimizer import implied_checks
+
+
+def plan(checks, optimize=True):
+    return GradingPlan(checks, Grader.check_registry, optimize=optimize)
+
+
+class OptimizerTest(unittest.TestCase):
+
+    def implied(self, checks):
+        compiled = plan(checks)
+        return implied_checks(compiled.compiled_checks, compiled.check_functions)
+
+    def test_implied_checks(self):
+        self.assertEqual(self.implied([
+            {'vector': 'a', 'check': 'coords', 'expected': [[0, 0], [3, '_']], 'tolerance': 0.5},
+            {'vector': 'a', 'check': 'presence'},
+            {'vector': 'a', 'check': 'tail', 'expected': [0, 0]},
+            {'vector': 'a', 'check': 'tip', 'expected': [3, 4]},
+            {'vector': 'a', 'check': 'segment_coords', 'expected': [[0, 0], [3, '_']], 'errmsg': 'Nope'},
+            {'vector': 'a', 'check': 'coords', 'expected': [[0, 0], [3, '_']], 'tolerance': 0.25},
+            {'vector': 'a', 'check': 'coords', 'expected': [[0, 0], [3, '_']]},
+            {'vector': 'b', 'check': 'tail', 'expected': [0, 0]},
+        ]), {1, 2, 4, 6})
+
+    def test_implied_angles_and_lines(self):
+        self.assertEqual(self.implied([
+            {'vector': 'a', 'check': 'angle', 'expected': 30},
+            {'vector': 'a', 'check': 'segment_angle', 'expected': 30, 'tolerance': 3},
+            {'vector': 'a', 'check': 'segment_angle', 'expected': 210, 'tolerance': 3},
+            {'vector': 'a', 'check': 'angle', 'expected': 30, 'tolerance': 1},
+            {'vector': 'l', 'check': 'points_on_line', 'expected': [[0, 0], [1, 1], [2, 2]]},
+            {'vector': 'l', 'check': 'points_on_line', 'expected': [[2, 2], [0, 0]]},
+            {'vector': 'l', 'check': 'points_on_line', 'expected': [[2, 2], [3, 3]]},
+            {'point': 'p', 'check': 'point_coords', 'expected': [1, 1]},
+            {'point': 'p', 'check': 'point_presence'},
+        ]), {1, 5, 8})
+
+    def test_checks_are_not_implied_for_non_finite_coordinates(self):
+        # `tail_x` fails if the tail is far off horizontally, even if `tail` passes for NaN coordinates
+        checks = [
+            {'vector': 'a', 'check': 'tail', 'expected': [0, 0]},
+            {'vector': 'a', 'check': 'tail_x', 'expected': 0},
+        ]
+        self.assertEqual(self.implied(checks), set())
+        answer = {'vectors': {'a': {'tail': [5, float('nan')], 'tip': [1, 1]}}, 'points': {}}
+        self.assertEqual(plan(checks).grade(answer), {
+            'correct': False, 'msg': 'Vector a does not start at correct point.'
+        })
+
+    def test_schedule(self):
+        checks = [
+            {'vector': 'a', 'check': 'presence'},
+            {'vector': 'a', 'check': 'tail', 'expected': [0, 0]},
+            {'vector': 'a', 'check': 'tail_x', 'expected': 0},
+            {'vector': 'a', 'check': 'tail', 'expected': [0, 0]},
+            {'vector': 'a', 'check': 'length', 'expected': 5},
+            {'vector': 'a', 'check': 'points_on_line', 'expected': [[0, 0]]},
+            {'vector': 'b', 'check': 'presence'},
+            {'point': 'p', 'check': 'point_presence'},
+        ]
+        schedule = plan(checks).schedule
+        self.assertEqual([indices for _, indices in schedule], [(0, 1, 2, 4), (5,), (6,), (7,)])
+        self.assertEqual([step is not None for step, _ in schedule], [True, False, False, False])
+        self.assertEqual(plan(checks, optimize=False).schedule, [(None, (index,)) for index in range(8)])
+
+    def test_optimized_plans_give_same_results(self):
+        rng = random.Random(42)
+        checks = []
+        for name in ('a', 'b'):
+            checks += [
+                {'vector': name, 'check': 'presence'},
+                {'vector': name, 'check': 'coords', 'expected': [[0, 0], [3, 4]], 'tolerance': 1.5},
+                {'vector': name, 'check': 'tail', 'expected': [0, 0]},
+                {'vector': name, 'check': 'tail_x', 'expected': 0, 'tolerance': 0.5},
+                {'vector': name, 'check': 'tip_y', 'expected': 4},
+                {'vector': name, 'check': 'length', 'expected': 5, 'errmsg': '{name}: {length:.2f}'},
+                {'vector': name, 'check': 'angle', 'expected': 53},
+                {'vector': name, 'check': 'segment_angle', 'expected': 233, 'tolerance': 3},
+                {'vector': name, 'check': 'segment_coords', 'expected': [[0, 0], [3, 4]]},
+                {'vector': name, 'check': 'points_on_line', 'expected': [[6, 8]], 'tolerance': 2},
+            ]
+        checks += [
+            {'point': 'p', 'check': 'point_presence'},
+            {'point': 'p', 'check': 'point_coords', 'expected': [1, 1]},
+            {'point': 'p', 'check': 'point_coords', 'expected': [1, 1], 'tolerance': 2},
+        ]
+        optimized, unoptimized = plan(checks), plan(checks, optimize=False)
+        self.assertLess(len(optimized.schedule), len(checks) / 2)
+
+        def vector():
+            return {
+                'tail': [rng.gauss(0, 0.7), rng.gauss(0, 0.7)],
+                'tip': [3 + rng.gauss(0, 0.7), 4 + rng.gauss(0, 0.7)],
+            }
+        for _ in range(2000):
+            answer = {
+                'vectors': {name: vector() for name in ('a', 'b') if rng.random() < 0.95},
+                'points': {'p': [1 + rng.gauss(0, 1), 1]} if rng.random() < 0.95 else {},
+            }
+            self.assertEqual(optimized.grade(answer), unoptimized.grade(answer))
+            self.assertEqual(optimized.grade_incrementally(answer), unoptimized.grade_incrementally(answer))
+            self.assertEqual(
+                optimized.grade_incrementally(answer, stop=12), unoptimized.grade_incrementally(answer, stop=12)
+            )
@@ -0,0 +1,73 @@
+from __future__ import absolute_import
+
+import random
+import unittest
+
+from vectordraw.grader import Grader, GradingPlan
+from vectordraw.ordering import CheckOrdering
+
+
+class CheckOrderingTest(unittest.TestCase):
+
+    def test_orders_checks_by_cost_per_rejection(self):
+        ordering = CheckOrdering([0, 1, 2, 3], sample_every=1, min_samples=4, refresh=4)
+        # Check 0 is expensive and never fails, and 2 is cheap and fails often;
+        # 1 and 3 cost the same, but 3 was evaluated less often, so it's more likely to fail
+        for _ in range(3):
+            ordering.record([(0, 1000, True), (1, 100, True), (2, 10, False)])
+            self.assertEqual(ordering.order, (0, 1, 2, 3))
+        ordering.record([(0, 1000, True), (1, 100, True), (2, 10, True), (3, 100, True)])
+        self.assertEqual(ordering.order, (2, 3, 1, 0))
+        self.assertEqual(ordering.snapshot()[2], {'evaluated': 4, 'failed': 3, 'total_ns': 40})
+
+    def test_order_is_deterministic(self):
+        orderings = [CheckOrdering(range(5), sample_every=1, min_samples=1, refresh=1) for _ in range(2)]
+        for ordering in orderings:
+            ordering.record([(index, 50, True) for index in range(5)])
+        self.assertEqual(orderings[0].order, (0, 1, 2, 3, 4))
+        self.assertEqual(orderings[0].order, orderings[1].order)
+
+    def test_samples_every_nth_answer(self):
+        ordering = CheckOrdering([0], sample_every=3)
+        self.assertEqual([ordering.should_sample() for _ in range(6)], [False, False, True, False, False, True])
+
+
+class IsCorrectTest(unittest.TestCase):
+
+    checks = [
+        {'vector': 'a', 'check': 'presence'},
+        {'vector': 'a', 'check': 'points_on_line', 'expected': [[x, x] for x in range(50)], 'tolerance': 5},
+        {'vector': 'a', 'check': 'coords', 'expected': [[0, 0], [3, 3]]},
+        {'vector': 'a', 'check': 'tail', 'expected': [0, 0]},
+        {'vector': 'a', 'check': 'length', 'expected': 4.24, 'tolerance': 0.5},
+    ]
+
+    def plan(self):
+        plan = GradingPlan(self.checks, Grader.check_registry)
+        plan.ordering = CheckOrdering(plan.ordering.indices, sample_every=1, min_samples=8, refresh=8)
+        return plan
+
+    def test_agrees_with_grade(self):
+        rng = random.Random(7)
+        plan = self.plan()
+        for _ in range(500):
+            answer = {'vectors': {}, 'points': {}}
+            if rng.random() < 0.9:
+                answer['vectors']['a'] = {
+                    'tail': [rng.gauss(0, 0.5), rng.gauss(0, 0.5)], 'tip': [3 + rng.gauss(0, 1), 3],
+                }
+            correct = plan.grade(answer)['correct']
+            self.assertEqual(plan.is_correct(answer), correct)
+            self.assertEqual(plan.is_correct(answer, adaptive=False), correct)
+        # The expensive check that rarely fails is evaluated last, the implied `tail` check never
+        self.assertEqual(plan.ordering.indices, (0, 1, 2, 4))
+        self.assertEqual(plan.ordering.order[-1], 1)
+
+    def test_falls_back_on_author_order(self):
+        plan = self.plan()
+        plan.ordering.order = (2, 4, 1, 0)
+        self.assertFalse(plan.is_correct({'vectors': {}, 'points': {}}))
+        # Errors that evaluating checks in the author's order raises are not masked
+        plan = GradingPlan([{'vector': 'a', 'check': 'tail', 'expected': [0, 0]}], Grader.check_registry)
+        with self.assertRaises(KeyError):
+            plan.is_correct({'vectors': {}, 'points': {}})
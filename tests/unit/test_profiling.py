@@ -0,0 +1,110 @@
+from __future__ import absolute_import
+
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+from vectordraw import profiling
+from vectordraw.profiling import Profiler
+
+
+def busy(size):
+    return [str(number) for number in range(size)]
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        super(ProfilerTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def profiles(self, suffix):
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(suffix))
+
+    def test_from_environ(self):
+        profiler = Profiler.from_environ({
+            'VECTORDRAW_PROFILE_RATE': '0.25',
+            'VECTORDRAW_PROFILE_DIR': self.directory,
+            'VECTORDRAW_PROFILE_MEMORY': '1',
+            'VECTORDRAW_PROFILE_KEEP': '3',
+        })
+        self.assertEqual(
+            (profiler.directory, profiler.rate, profiler.memory, profiler.calls_per_dump, profiler.keep),
+            (self.directory, 0.25, True, 50, 3)
+        )
+        self.assertEqual(Profiler.from_environ({}).rate, 0)
+
+    def test_sample(self):
+        samples = iter([0.5, 0.1, 0.1, 0.9, 0.5, 0.1])
+        profiler = Profiler(
+            self.directory, rate=0.2, memory=True, calls_per_dump=3, rng=lambda: next(samples)
+        )
+        for _ in range(5):
+            with profiler.sample('check_answer'):
+                busy(1000)
+        self.assertEqual(self.profiles('.prof'), [])
+        with profiler.sample('check_answer'):
+            busy(1000)
+        prof, = self.profiles('.prof')
+        stats = pstats.Stats(os.path.join(self.directory, prof))
+        self.assertIn(('test_profiling.py', 'busy'), [
+            (os.path.basename(path), func) for path, _, func in stats.stats
+        ])
+        memory, = self.profiles('.memory.txt')
+        with open(os.path.join(self.directory, memory), encoding='utf-8') as memory_file:
+            self.assertEqual(memory_file.readline(), '# Memory allocated during 3 calls to check_answer\n')
+
+    def test_sample_one_call_at_a_time(self):
+        profiler = Profiler(self.directory, rate=1, memory=True, calls_per_dump=10)
+        profiling_started, call_done = threading.Event(), threading.Event()
+
+        def profiled_call():
+            with profiler.sample('check_answer'):
+                profiling_started.set()
+                call_done.wait(5)
+
+        thread = threading.Thread(target=profiled_call)
+        thread.start()
+        profiling_started.wait(5)
+        # Not profiled, since the other thread's call is being profiled
+        with profiler.sample('check_answer'):
+            busy(10)
+        call_done.set()
+        thread.join()
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(profiler._calls['check_answer'], 1)
+        with profiler.sample('check_answer'):
+            busy(10)
+        self.assertEqual(profiler._calls['check_answer'], 2)
+
+    def test_sample_with_active_profiler(self):
+        profiler = Profiler(self.directory, rate=1, calls_per_dump=10)
+        with patch('cProfile.Profile.enable', side_effect=ValueError('Another profiling tool is already active')):
+            with profiler.sample('check_answer'):
+                busy(10)
+        self.assertEqual(profiler._calls['check_answer'], 0)
+        with profiler.sample('check_answer'):
+            busy(10)
+        self.assertEqual(profiler._calls['check_answer'], 1)
+
+    def test_rotate(self):
+        profiler = Profiler(self.directory, rate=1, calls_per_dump=1, keep=2)
+        with patch('time.time', side_effect=range(1000, 1004)):
+            for _ in range(4):
+                with profiler.sample('student_view'):
+                    busy(10)
+        pid = os.getpid()
+        self.assertEqual(self.profiles('.prof'), [f'student_view-{pid}-1002.prof', f'student_view-{pid}-1003.prof'])
+
+    def test_profiled(self):
+        profiler = Profiler(self.directory, rate=1, calls_per_dump=10)
+        with patch.object(profiling, 'profiler', profiler):
+            self.assertEqual(profiling.profiled('test')(busy)(2), ['0', '1'])
+            profiler.flush()
+        self.assertEqual(len(self.profiles('.prof')), 1)
@@ -0,0 +1,168 @@
+from __future__ import absolute_import
+
+import itertools
+import math
+import random
+import unittest
+from unittest import mock
+
+import ddt
+
+from vectordraw import relations
+from vectordraw.expressions import custom_checks_from_json
+from vectordraw.grader import Grader, GradingPlan, Vector
+
+
+def plan(checks, optimize=True):
+    return GradingPlan(checks, Grader.check_registry, optimize=optimize)
+
+
+@ddt.ddt
+class RelationsTest(unittest.TestCase):
+
+    def setUp(self):
+        super(RelationsTest, self).setUp()
+        self.vectors = {
+            'N': Vector('N', 0, 0, 0, 3),
+            'f': Vector('f', 0, 0, -2, 0),
+            'g': Vector('g', 0, 0, 0, -3),
+            'v': Vector('v', 1, 1, 5, 1),
+            'zero': Vector('zero', 1, 1, 1, 1),
+        }
+
+    def grade(self, check):
+        try:
+            Grader.check_registry[check['check']](check, self.vectors)
+        except ValueError as e:
+            return str(e)
+        return None
+
+    @ddt.data(
+        ({'check': 'sum', 'vectors': ['N', 'g'], 'expected': [0, 0]}, None),
+        ({'check': 'sum', 'vectors': ['N', 'f', 'g'], 'expected': [0, 0]}, 'The sum of N, f, g is incorrect.'),
+        ({'check': 'sum', 'vectors': ['N', 'f', 'g'], 'expected': [0, 0], 'tolerance': 2}, None),
+        ({'check': 'sum', 'vectors': ['f', 'v'], 'expected': [2, 0]}, None),
+        (
+            {'check': 'sum', 'vectors': ['f', 'N'], 'expected': [0, 0], 'errmsg': 'Net force: {x}, {y}'},
+            'Net force: -2.0, 3.0'
+        ),
+        ({'check': 'parallel', 'vectors': ['f', 'v']}, None),
+        ({'check': 'parallel', 'vectors': ['N', 'g']}, None),
+        ({'check': 'parallel', 'vectors': ['N', 'f']}, 'N and f are not parallel.'),
+        ({'check': 'parallel', 'vectors': ['N', 'zero']}, 'N and zero are not parallel.'),
+        ({'check': 'perpendicular', 'vectors': ['N', 'v']}, None),
+        ({'check': 'perpendicular', 'vectors': ['g', 'f']}, None),
+        (
+            {'check': 'perpendicular', 'vectors': ['N', 'g'], 'errmsg': '{first}, {second}: {angle:.0f}'},
+            'N, g: 180'
+        ),
+        ({'check': 'relative_angle', 'vectors': ['v', 'f'], 'expected': 180}, None),
+        ({'check': 'relative_angle', 'vectors': ['v', 'N'], 'expected': 90}, None),
+        ({'check': 'relative_angle', 'vectors': ['v', 'N'], 'expected': -270}, None),
+        ({'check': 'relative_angle', 'vectors': ['v', 'N'], 'expected': 85, 'tolerance': 5}, None),
+        (
+            {'check': 'relative_angle', 'vectors': ['v', 'N'], 'expected': 270},
+            'The angle between v and N is incorrect. Your angle: 90.0'
+        ),
+        (
+            {'check': 'relative_angle', 'vectors': ['v', 'zero'], 'expected': 0},
+            'The angle between v and zero is incorrect. Your angle: 0.0'
+        ),
+        ({'check': 'length_ratio', 'vectors': ['v', 'f'], 'expected': 2}, None),
+        ({'check': 'length_ratio', 'vectors': ['N', 'g'], 'expected': 1.05}, None),
+        (
+            {'check': 'length_ratio', 'vectors': ['N', 'v'], 'expected': 1},
+            'The ratio of the lengths of N and v is incorrect. Your ratio: 0.75'
+        ),
+        (
+            {'check': 'length_ratio', 'vectors': ['N', 'zero'], 'expected': 1},
+            'The ratio of the lengths of N and zero is incorrect. Your ratio: inf'
+        ),
+        ({'check': 'parallel', 'vectors': ['N', 'F']}, 'You need to use the F vector.'),
+        ({'check': 'sum', 'vectors': ['N', 'F', 'G'], 'expected': [0, 0]}, 'You need to use the F vector.'),
+    )
+    @ddt.unpack
+    def test_check_functions(self, check, message):
+        self.assertEqual(self.grade(check), message)
+
+    def test_schedule(self):
+        checks = [
+            {'vector': 'N', 'check': 'presence'},
+            {'check': 'parallel', 'vectors': ['N', 'g']},
+            {'check': 'sum', 'vectors': ['N', 'g'], 'expected': [0, 0]},
+            {'vector': 'f', 'check': 'presence'},
+            {'check': 'perpendicular', 'vectors': ['N', 'f']},
+        ]
+        with mock.patch.object(relations, 'MIN_ARRAY_CHECKS', 2):
+            compiled = plan(checks)
+        self.assertEqual([indices for _, indices in compiled.schedule], [(0,), (1, 2), (3,), (4,)])
+        self.assertEqual(compiled.vector_names, {'N', 'g', 'f'})
+        self.assertEqual(len(plan(checks).schedule), 5)
+
+    def test_fused_checks_give_same_results(self):
+        rng = random.Random(42)
+        tips = {'F0': (3, 0), 'F1': (-3, 0), 'F2': (0, 2), 'F3': (0, -4), 'F4': (1, 1), 'F5': (-1, 1)}
+        names = sorted(tips)
+        checks = [{'check': 'sum', 'vectors': names, 'expected': [0, 0], 'tolerance': 0.2}]
+        for first, second in itertools.combinations(names, 2):
+            (ax, ay), (bx, by) = tips[first], tips[second]
+            vectors = [first, second]
+            if ax * by == ay * bx:
+                checks.append({'check': 'parallel', 'vectors': vectors, 'tolerance': 3})
+            if ax * bx + ay * by == 0:
+                checks.append({'check': 'perpendicular', 'vectors': vectors, 'tolerance': 3})
+            checks += [
+                {
+                    'check': 'relative_angle', 'vectors': vectors, 'tolerance': 3,
+                    'expected': math.degrees(math.atan2(by, bx) - math.atan2(ay, ax)),
+                },
+                {
+                    'check': 'length_ratio', 'vectors': vectors, 'tolerance': 0.05,
+                    'expected': math.hypot(ax, ay) / math.hypot(bx, by),
+                },
+            ]
+        checks.append({'check': 'sum', 'vectors': names[:2], 'expected': [0, 0], 'tolerance': 0.1})
+        unoptimized = plan(checks, optimize=False)
+        answers = [
+            {
+                'vectors': {
+                    name: {'tail': [0, 0], 'tip': [x + rng.gauss(0, 0.02), y + rng.gauss(0, 0.02)]}
+                    for name, (x, y) in tips.items() if rng.random() < 0.99
+                },
+                'points': {},
+            }
+            for _ in range(1000)
+        ]
+        results = [unoptimized.grade(answer) for answer in answers]
+        self.assertGreater(sum(result['correct'] for result in results), 100)
+        self.assertGreater(len({result['msg'] for result in results}), 10)
+        with mock.patch.object(relations, 'MIN_ARRAY_CHECKS', 1):
+            optimized = plan(checks)
+        self.assertEqual(len(optimized.schedule), 1)
+        self.assertEqual([optimized.grade(answer) for answer in answers], results)
+
+    def test_custom_checks_from_json(self):
+        checks, check_functions = custom_checks_from_json(
+            '[{"check": "perpendicular", "vectors": ["N", "f"], "errmsg": "Nope"}, "length(N) > 1"]'
+        )
+        self.assertEqual(checks[0], {'check': 'perpendicular', 'vectors': ['N', 'f'], 'errmsg': 'Nope'})
+        self.assertEqual(list(check_functions), ['length(N) > 1'])
+
+    @ddt.data(
+        {'check': 'coplanar', 'vectors': ['N', 'f']},
+        {'check': 'parallel', 'vectors': ['N']},
+        {'check': 'parallel', 'vectors': 'Nf'},
+        {'check': 'parallel', 'vectors': ['N', 1]},
+        {'check': 'parallel', 'vectors': ['N', 'f'], 'expected': 0},
+        {'check': 'parallel', 'vectors': ['N', 'f'], 'tolerance': -1},
+        {'check': 'parallel', 'vectors': ['N', 'f'], 'errmsg': None},
+        {'check': 'parallel', 'vectors': ['N', 'f'], 'weight': 2},
+        {'check': 'sum', 'vectors': []},
+        {'check': 'sum', 'vectors': ['N', 'f'], 'expected': [0]},
+        {'check': 'sum', 'vectors': ['N', 'f'], 'expected': [0, True]},
+        {'check': 'length_ratio', 'vectors': ['N', 'f']},
+        {'check': 'relative_angle', 'vectors': ['N', 'f'], 'expected': '90'},
+    )
+    def test_invalid_checks(self, entry):
+        with self.assertRaises(ValueError):
+            relations.check_from_json(entry)
@@ -0,0 +1,108 @@
+from __future__ import absolute_import
+
+import multiprocessing
+import time
+import unittest
+from unittest.mock import patch
+
+from vectordraw import sandbox
+from vectordraw.expressions import custom_checks_from_json
+from vectordraw.grader import Grader, check_points_on_line
+
+
+def slow_grade(task):
+    time.sleep(10)
+
+
+def greedy_grade(task):
+    return bytearray(2 ** 30)
+
+
+class SandboxTest(unittest.TestCase):
+
+    def setUp(self):
+        super(SandboxTest, self).setUp()
+        self.sandbox = sandbox.Sandbox(
+            workers=1, timeout=2, memory_limit=64 * 2 ** 20, context=multiprocessing.get_context('fork')
+        )
+        self.addCleanup(self.sandbox.close)
+        custom_checks, check_functions = custom_checks_from_json('["length(N) < 2"]')
+        self.plan = Grader(custom_checks=check_functions).compile(
+            [{'vector': 'N', 'check': 'presence'}] + custom_checks
+        )
+
+    def answer(self, tip):
+        return {'vectors': {'N': {'tail': [0, 0], 'tip': tip}}, 'points': {}}
+
+    def test_needs_sandbox(self):
+        points = [[0, 0]] * (sandbox.MAX_INLINE_POINTS + 1)
+        self.assertTrue(sandbox.needs_sandbox({'check': 'points_on_line', 'expected': points}, check_points_on_line))
+        self.assertFalse(
+            sandbox.needs_sandbox({'check': 'points_on_line', 'expected': points[1:]}, check_points_on_line)
+        )
+        self.assertEqual(sandbox.first_sandboxed_check(self.plan), 1)
+        self.assertIsNone(sandbox.first_sandboxed_check(Grader().compile([{'vector': 'N', 'check': 'presence'}])))
+
+    def test_grade_incrementally(self):
+        for tip in ([1, 0], [3, 0]):
+            self.assertEqual(
+                self.sandbox.grade_incrementally(self.plan, 'version', self.answer(tip)),
+                self.plan.grade_incrementally(self.answer(tip))
+            )
+        # Outcomes of checks that ran in the sandbox can be reused
+        result, outcomes = self.sandbox.grade_incrementally(self.plan, 'version', self.answer([3, 0]))
+        self.assertEqual(
+            self.sandbox.grade_incrementally(self.plan, 'version', self.answer([1, 0]), outcomes),
+            (result, outcomes)
+        )
+
+    def test_sandbox_only_used_if_needed(self):
+        answer = {'vectors': {}, 'points': {}}
+        result, _ = self.sandbox.grade_incrementally(self.plan, 'version', answer)
+        self.assertEqual(result, {'correct': False, 'msg': 'You need to use the N vector.'})
+        plan = Grader().compile([{'vector': 'N', 'check': 'length', 'expected': 1}])
+        result, _ = self.sandbox.grade_incrementally(plan, 'version', self.answer([1, 0]))
+        self.assertTrue(result['correct'])
+        self.assertTrue(self.sandbox._idle.empty())
+
+    def test_timeout(self):
+        self.sandbox.timeout = 0.2
+        with patch('vectordraw.sandbox._grade', slow_grade):
+            with self.assertRaises(sandbox.SandboxTimeout):
+                self.sandbox.grade_incrementally(self.plan, 'version', self.answer([1, 0]))
+        # Worker that timed out is replaced in the background
+        worker = self.sandbox._idle.get(timeout=5)
+        self.assertTrue(worker.process.is_alive())
+        self.sandbox._idle.put(worker)
+        result, _ = self.sandbox.grade_incrementally(self.plan, 'version', self.answer([1, 0]))
+        self.assertTrue(result['correct'])
+
+    @patch('vectordraw.sandbox._grade', greedy_grade)
+    def test_memory_limit(self):
+        with self.assertRaises(sandbox.SandboxError) as context:
+            self.sandbox.grade_incrementally(self.plan, 'version', self.answer([1, 0]))
+        self.assertEqual(str(context.exception), 'Memory limit exceeded')
+
+    def test_replace_worker_failure(self):
+        with patch('vectordraw.sandbox._Worker', side_effect=OSError('Too many processes')):
+            self.sandbox._respawn()
+        self.assertIsNone(self.sandbox._idle.get_nowait())
+        # Empty slots get a new worker when they are used
+        self.sandbox._idle.put(None)
+        self.sandbox._started = True
+        result, _ = self.sandbox.grade_incrementally(self.plan, 'version', self.answer([1, 0]))
+        self.assertTrue(result['correct'])
+
+    def test_default_context(self):
+        self.assertNotEqual(sandbox.Sandbox().context.get_start_method(), 'fork')
+
+    def test_from_environ(self):
+        configured = sandbox.Sandbox.from_environ({
+            'VECTORDRAW_SANDBOX_WORKERS': '4',
+            'VECTORDRAW_SANDBOX_TIMEOUT': '0.5',
+            'VECTORDRAW_SANDBOX_MEMORY': '128',
+        })
+        self.assertEqual(
+            (configured.workers, configured.timeout, configured.memory_limit), (4, 0.5, 128 * 2 ** 20)
+        )
+        self.assertFalse(sandbox.Sandbox.from_environ({}).enabled)
@@ -0,0 +1,49 @@
+from __future__ import absolute_import
+
+import unittest
+
+import ddt
+
+from vectordraw.validator import AnswerValidator
+
+
+@ddt.ddt
+class AnswerValidatorTest(unittest.TestCase):
+
+    def setUp(self):
+        super(AnswerValidatorTest, self).setUp()
+        self.validator = AnswerValidator(['N', 'F'], ['cm'], max_coordinate=100, max_checks=2)
+
+    @ddt.data(
+        {'vectors': {}, 'points': {}},
+        {'vectors': {'N': {'tail': [0, 0], 'tip': [1, 1.5]}}, 'points': {'cm': [-100, 100]}},
+        {'vectors': {'N': {'tail': [0, 0], 'tip': [1, 1]}}, 'points': {}, 'checks': [{}, {}]},
+    )
+    def test_valid(self, data):
+        self.validator.validate(data)
+
+    @ddt.data(
+        [],
+        {'vectors': {}},
+        {'points': {}},
+        {'vectors': {}, 'points': {}, 'extra': 1},
+        {'vectors': [], 'points': {}},
+        {'vectors': {}, 'points': []},
+        {'vectors': {'X': {'tail': [0, 0], 'tip': [1, 1]}}, 'points': {}},
+        {'vectors': {}, 'points': {'X': [0, 0]}},
+        {'vectors': {'N': {'tail': [0, 0]}}, 'points': {}},
+        {'vectors': {'N': {'tail': [0, 0], 'tip': [1, 1], 'x': 1}}, 'points': {}},
+        {'vectors': {'N': {'tail': [0, 0], 'tip': [1]}}, 'points': {}},
+        {'vectors': {'N': {'tail': [0, 0], 'tip': [1, '1']}}, 'points': {}},
+        {'vectors': {'N': {'tail': [0, 0], 'tip': [1, True]}}, 'points': {}},
+        {'vectors': {'N': {'tail': [0, 0], 'tip': [1, float('nan')]}}, 'points': {}},
+        {'vectors': {'N': {'tail': [0, 0], 'tip': [1, float('inf')]}}, 'points': {}},
+        {'vectors': {'N': {'tail': [0, 0], 'tip': [1, 10 ** 400]}}, 'points': {}},
+        {'vectors': {}, 'points': {'cm': [0, 100.5]}},
+        {'vectors': {}, 'points': {'cm': [0, None]}},
+        {'vectors': {}, 'points': {}, 'checks': {}},
+        {'vectors': {}, 'points': {}, 'checks': [{}, {}, {}]},
+    )
+    def test_invalid(self, data):
+        with self.assertRaises(ValueError):
+            self.validator.validate(data)
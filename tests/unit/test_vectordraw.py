@@ -1,7 +1,10 @@
 from __future__ import absolute_import
 
+import math
+import random
 import unittest
-from vectordraw import grader
+
+from vectordraw import batch, grader
 from vectordraw.grader import Vector
 
 
@@ -212,6 +215,10 @@ class VectorDrawTest(unittest.TestCase):
             grader.check_angle, self.check(30, 9, errmsg=custom_errmsg), vectors,
             custom_errmsg.format(name='vec', angle=45.0)
         )
+        # Rounding errors must not push the cosine out of the domain of acos
+        self.assertPasses(grader.check_angle, self.check(45, 0.1), {'vec': self.vector(0, 0, 3, 3)})
+        errmsg = 'The angle of vec is incorrect. Your angle: 0.0'
+        self.assertFails(grader.check_angle, self.check(0, 5), {'vec': self.vector(1, 1, 1, 1)}, errmsg)
 
     def test_check_segment_angle(self):
         errmsg = 'The angle of vec is incorrect. Your angle: 45.0'
@@ -245,3 +252,197 @@ class VectorDrawTest(unittest.TestCase):
         vectors = {'vec': self.vector(1, 1, 5, 1)}  # horizontal line
         self.assertPasses(grader.check_points_on_line, self.check([[3, 1], [99, 1], [55, 1.9]]), vectors)
         self.assertFails(grader.check_points_on_line, self.check([[3, 2.1]]), vectors, errmsg)
+        vectors = {'vec': self.vector(1, 1, 1, 1)}  # no length
+        self.assertPasses(grader.check_points_on_line, self.check([[1, 1.5]]), vectors)
+        self.assertFails(grader.check_points_on_line, self.check([[1, 3]]), vectors, errmsg)
+
+    # Test grading plans
+
+    def test_checks_from_expected_result(self):
+        expected_result = {
+            'N': {'angle': 110, 'angle_tolerance': 2, 'presence_errmsg': 'Draw N!'},
+            'g': {'tail': [0, 1], 'tail_errmsg': 'Bad tail.', 'length': 5},
+        }
+        self.assertEqual(grader.checks_from_expected_result(expected_result), [
+            {'vector': 'N', 'check': 'presence', 'errmsg': 'Draw N!'},
+            {'vector': 'N', 'check': 'angle', 'expected': 110, 'tolerance': 2},
+            {'vector': 'g', 'check': 'presence'},
+            {'vector': 'g', 'check': 'tail', 'expected': [0, 1], 'errmsg': 'Bad tail.'},
+            {'vector': 'g', 'check': 'length', 'expected': 5},
+        ])
+
+    def test_checks_from_expected_result_for_points(self):
+        expected_result = {
+            'cm': {'coords': [1, 2], 'coords_tolerance': 0.5, 'presence_errmsg': 'Place {name}!'},
+            'vec': {'length': 5},
+        }
+        checks = grader.checks_from_expected_result(expected_result, point_names={'cm'})
+        self.assertEqual(checks, [
+            {'point': 'cm', 'check': 'point_presence', 'errmsg': 'Place {name}!'},
+            {'point': 'cm', 'check': 'point_coords', 'expected': [1, 2], 'tolerance': 0.5},
+            {'vector': 'vec', 'check': 'presence'},
+            {'vector': 'vec', 'check': 'length', 'expected': 5},
+        ])
+        plan = grader.Grader().compile(checks)
+        vectors = {'vec': {'tail': [0, 0], 'tip': [3, 4]}}
+        self.assertEqual(plan.grade({'vectors': vectors, 'points': {}}), {'correct': False, 'msg': 'Place cm!'})
+        self.assertEqual(
+            plan.grade({'vectors': vectors, 'points': {'cm': [1.4, 2.4]}}),
+            {'correct': False, 'msg': 'Point cm is not at the correct location.'}
+        )
+        self.assertEqual(
+            plan.grade({'vectors': vectors, 'points': {'cm': [1.2, 2.2]}}),
+            {'correct': True, 'msg': 'Test passed'}
+        )
+
+    def test_grading_plan(self):
+        checks = [
+            {'vector': 'vec', 'check': 'presence'},
+            {'vector': 'vec', 'check': 'angle', 'expected': 45},
+            {'vector': 'vec', 'check': 'length', 'expected': 5, 'tolerance': 0.5},
+            {'vector': 'vec', 'check': 'tail', 'expected': [0, 0], 'errmsg': 'Start at the origin.'},
+        ]
+        plan = grader.Grader(success_message='Well done!').compile(checks)
+        self.assertEqual(plan.checks, checks)
+
+        def answer(tail=None, tip=None):
+            vectors = {'vec': {'tail': tail, 'tip': tip}} if tail else {}
+            return {'vectors': vectors, 'points': {}, 'checks': checks}
+
+        self.assertEqual(plan.grade(answer()), {'correct': False, 'msg': 'You need to use the vec vector.'})
+        self.assertEqual(
+            plan.grade(answer([0, 0], [3, 4])),
+            {'correct': False, 'msg': 'The angle of vec is incorrect. Your angle: 53.1'}
+        )
+        self.assertEqual(
+            plan.grade(answer([1, 1], [3, 3])),
+            {'correct': False, 'msg': 'The length of vec is incorrect. Your length: 2.8'}
+        )
+        self.assertEqual(plan.grade(answer([1, 1], [4.5, 4.5])), {'correct': False, 'msg': 'Start at the origin.'})
+        self.assertEqual(plan.grade(answer([0, 0], [3.5, 3.5])), {'correct': True, 'msg': 'Well done!'})
+        for tail, tip in (([0, 0], [3, 4]), ([1, 1], [4.5, 4.5]), ([0, 0], [3.5, 3.5])):
+            self.assertEqual(grader.Grader(success_message='Well done!').grade(answer(tail, tip)),
+                             plan.grade(answer(tail, tip)))
+
+    def test_grade_many(self):
+        checks = [
+            {'vector': 'vec', 'check': 'presence'},
+            {'vector': 'vec', 'check': 'tail', 'expected': [0, 0], 'tolerance': 2},
+            {'vector': 'vec', 'check': 'tip_x', 'expected': 3, 'tolerance': 2.5},
+            {'vector': 'vec', 'check': 'coords', 'expected': [['_', '_'], [3, '_']], 'tolerance': 2.5},
+            {'vector': 'vec', 'check': 'segment_coords', 'expected': [[0, 0], ['_', 4]], 'tolerance': 3},
+            {'vector': 'vec', 'check': 'length', 'expected': 5, 'tolerance': 2},
+            {'vector': 'vec', 'check': 'angle', 'expected': 50, 'tolerance': 40, 'errmsg': '{angle:.0f}?'},
+            {'vector': 'vec', 'check': 'segment_angle', 'expected': 60, 'tolerance': 20},
+            {'vector': 'vec', 'check': 'points_on_line', 'expected': [[0, 0], [6, 8]], 'tolerance': 1.5},
+            {'point': 'pt', 'check': 'point_presence'},
+            {'point': 'pt', 'check': 'point_coords', 'expected': [1, 1]},
+        ]
+        grader_ = grader.Grader()
+        answers = []
+        for i in range(400):
+            vectors = {}
+            if i % 17:
+                vectors['vec'] = {'tail': [i % 5 - 2, i % 3 - 1], 'tip': [i % 7, i % 11 - 1]}
+            points = {'pt': [1 + (i % 4) / 2.0, 1]} if i % 13 else {}
+            answers.append({'vectors': vectors, 'points': points, 'checks': checks})
+        results = grader_.grade_many(answers)
+        self.assertEqual(results, [grader_.grade(answer) for answer in answers])
+        self.assertIn({'correct': True, 'msg': 'Test passed'}, results)
+        self.assertEqual(grader_.grade_many([]), [])
+
+    @unittest.skipIf(batch.np is None, 'NumPy is not installed')
+    def test_grade_many_near_tolerances(self):
+        # Tolerances that NumPy and `math` functions might round either way
+        np = batch.np
+        rng = random.Random(42)
+        grader_ = grader.Grader()
+        for _ in range(500):
+            a, b = rng.uniform(-10, 10), rng.uniform(-10, 10)
+            tip = [rng.uniform(-10, 10), rng.uniform(-10, 10)]
+            angle = np.degrees(np.arccos((tip[0] * np.cos(0.5) + tip[1] * np.sin(0.5)) / np.hypot(*tip)))
+            checks = [
+                {'vector': 'vec', 'check': 'tail', 'expected': [a, b], 'tolerance': float(np.hypot(a, b))},
+                {'vector': 'vec', 'check': 'length', 'expected': a, 'tolerance': float(abs(np.hypot(*tip) - a))},
+                {'vector': 'vec', 'check': 'angle', 'expected': math.degrees(0.5), 'tolerance': float(angle)},
+            ]
+            for check in checks:
+                answer = {'vectors': {'vec': {'tail': [0, 0], 'tip': tip}}, 'points': {}, 'checks': [check]}
+                self.assertEqual(grader_.grade_many([answer]), [grader_.grade(answer)])
+
+    def test_grade_incrementally(self):
+        old_checks = [
+            {'vector': 'vec', 'check': 'presence'},
+            {'vector': 'vec', 'check': 'length', 'expected': 5, 'tolerance': 0.5},
+            {'vector': 'vec', 'check': 'angle', 'expected': 45},
+        ]
+        new_checks = [
+            {'vector': 'vec', 'check': 'presence'},
+            {'vector': 'vec', 'check': 'length', 'expected': 5, 'tolerance': 1.5},
+            {'vector': 'vec', 'check': 'angle', 'expected': 45},
+        ]
+        old_plan = grader.Grader().compile(old_checks)
+        new_plan = grader.Grader().compile(new_checks)
+        self.assertEqual(grader.changed_checks(old_plan, new_plan), [new_checks[1]])
+        answer = {'vectors': {'vec': {'tail': [0, 0], 'tip': [4, 3.9]}}, 'points': {}}
+        result, outcomes = old_plan.grade_incrementally(answer)
+        self.assertEqual(result, {'correct': False, 'msg': 'The length of vec is incorrect. Your length: 5.6'})
+        self.assertEqual(outcomes, {old_plan.keys[0]: None, old_plan.keys[1]: result['msg']})
+        # Outcomes of unchanged checks are reused, changed checks are evaluated
+        outcomes[new_plan.keys[0]] = 'Reused.'
+        result, new_outcomes = new_plan.grade_incrementally(answer, outcomes)
+        self.assertEqual(result, {'correct': False, 'msg': 'Reused.'})
+        del outcomes[new_plan.keys[0]]
+        result, new_outcomes = new_plan.grade_incrementally(answer, outcomes)
+        self.assertEqual(result, {'correct': True, 'msg': 'Test passed'})
+        self.assertEqual(new_outcomes, dict.fromkeys(new_plan.keys))
+        self.assertEqual(result, new_plan.grade(answer))
+
+    def test_vector(self):
+        vec = self.vector(1, 1, 1, 3)
+        self.assertEqual(vec.length, 2)
+        self.assertEqual(vec.angle, 90)
+        self.assertEqual(vec.direction, (0, 1))
+        opposite = vec.opposite()
+        self.assertEqual((opposite.tail.x, opposite.tail.y, opposite.tip.x, opposite.tip.y), (1, 3, 1, 1))
+        self.assertEqual(opposite.angle, 270)
+        with self.assertRaises(AttributeError):
+            vec.foo = 'bar'
+
+    def test_grading_plan_elements(self):
+        answer = {
+            'vectors': {name: {'tail': [0, 0], 'tip': [1, 1]} for name in ('a', 'b', 'c')},
+            'points': {'p': [1, 1], 'q': [2, 2]},
+        }
+        plan = grader.Grader().compile([
+            {'vector': 'a', 'check': 'presence'},
+            {'vector': 'b', 'check': 'length', 'expected': 1},
+            {'point': 'p', 'check': 'point_coords', 'expected': [1, 1]},
+        ])
+        vectors, points = plan.get_elements(answer)
+        self.assertEqual(set(vectors), {'a', 'b'})
+        self.assertEqual(set(points), {'p'})
+        plan = grader.Grader(custom_checks={'custom': lambda check, vectors: None}).compile([
+            {'vector': 'a', 'check': 'custom'},
+        ])
+        vectors, points = plan.get_elements(answer)
+        self.assertEqual(set(vectors), {'a', 'b', 'c'})
+        self.assertEqual(set(points), {'p', 'q'})
+
+    def test_custom_checks_are_per_grader(self):
+        answer = {'vectors': {'a': {'tail': [0, 0], 'tip': [1, 0]}}, 'points': {}}
+        checks = [{'vector': 'a', 'check': 'custom'}]
+        first = grader.Grader(custom_checks={'custom': lambda check, vectors: None})
+
+        def fail(check, vectors):
+            raise ValueError('Second error')
+        second = grader.Grader(custom_checks={'custom': fail})
+        self.assertTrue(first.grade(dict(answer, checks=checks))['correct'])
+        self.assertEqual(second.grade(dict(answer, checks=checks))['msg'], 'Second error')
+        self.assertNotIn('custom', grader.Grader.check_registry)
+        self.assertNotIn('custom', grader.Grader().check_registry)
+        self.assertIs(first.check_registry['length'], grader.check_length)
+        with self.assertRaises(TypeError):
+            grader.Grader.check_registry['custom'] = lambda check, vectors: None
+        with self.assertRaises(TypeError):
+            first.check_registry['length'] = lambda check, vectors: None
@@ -0,0 +1,386 @@
+from __future__ import absolute_import
+
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+from webob import Request
+from xblock.field_data import DictFieldData
+from xblock.fields import ScopeIds
+from xblock.scorable import Score
+from xblock.test.tools import TestRuntime
+
+from vectordraw import exercise, metrics, vectordraw
+from vectordraw.jobs import GradingQueue
+from vectordraw.sandbox import SandboxTimeout
+from vectordraw.vectordraw import VectorDrawXBlock
+
+
+class VectorDrawXBlockTest(unittest.TestCase):
+
+    def setUp(self):
+        super(VectorDrawXBlockTest, self).setUp()
+        vectordraw.student_settings.clear()
+        vectordraw.student_fragments.clear()
+        vectordraw.grading_plans.clear()
+        vectordraw.grading_results.clear()
+        metrics.registry.reset()
+        self.runtime = TestRuntime(services={'field-data': DictFieldData({})})
+        self.runtime.publish = Mock()
+        self.block = VectorDrawXBlock(
+            self.runtime, scope_ids=ScopeIds('user', 'vectordraw', 'def_id', 'usage_id')
+        )
+        self.block.vectors = json.dumps([{'name': 'N', 'tail': [0, 0]}])
+        self.block.points = json.dumps([{'name': 'cm', 'coords': [1, 1], 'fixed': False}])
+        self.block.expected_result = json.dumps({
+            'N': {'angle': 45, 'angle_tolerance': 1},
+            'cm': {'coords': [1, 1]},
+        })
+
+    # Helpers
+
+    def call_handler(self, handler, data):
+        request = Request.blank('/', method='POST', body=json.dumps(data).encode('utf-8'))
+        response = getattr(self.block, handler)(request)
+        return response.status_code, json.loads(response.body.decode('utf-8'))
+
+    def answer(self, tip=(1, 1), point=(1, 1), **kwargs):
+        answer = {'vectors': {'N': {'tail': [0, 0], 'tip': list(tip)}}, 'points': {'cm': list(point)}}
+        answer.update(kwargs)
+        return answer
+
+    # Tests
+
+    def test_settings_do_not_contain_expected_result(self):
+        self.assertNotIn('expected_result', self.block.settings)
+        self.assertNotIn('expected_result_positions', self.block.settings)
+        self.assertEqual(self.block.studio_settings['expected_result'], json.loads(self.block.expected_result))
+
+    def test_settings_are_cached_per_content_version(self):
+        settings = self.block.settings
+        self.assertEqual(settings['vectors'][0]['style']['color'], 'blue')
+        self.assertEqual(settings['points'][0]['style']['name'], 'cm')
+        self.assertEqual(self.block.settings, settings)
+        self.assertIs(self.block.get_vectors, settings['vectors'])
+        self.assertEqual(vectordraw.student_settings.misses, 1)
+        # Changing content creates new version
+        self.block.vectors = json.dumps([{'name': 'N', 'tail': [0, 0], 'style': {'color': 'red'}}])
+        self.assertEqual(self.block.settings['vectors'][0]['style']['color'], 'red')
+        self.assertEqual(vectordraw.student_settings.misses, 2)
+        # Modifying returned settings does not affect cached version
+        self.block.studio_settings['expected_result'] = {}
+        self.assertNotIn('expected_result', self.block.settings)
+
+    @patch('vectordraw.vectordraw.get_language', Mock(return_value='en'))
+    @patch('vectordraw.vectordraw.loader.render_django_template')
+    def test_student_view_caches_fragment(self, render_template):
+        render_template.side_effect = lambda path, context: context['self'].display_name
+        self.runtime.local_resource_url = Mock(side_effect=lambda block, uri: '/resource/' + uri)
+        fragment = self.block.student_view({})
+        self.assertEqual(fragment.content, 'Vector Drawing')
+        self.assertEqual(fragment.json_init_args, {'settings': self.block.settings, 'user_state': {}})
+        self.assertIn('/resource/public/js/vectordraw.js', [resource.data for resource in fragment.resources])
+        # Per-user data is filled in for each request
+        self.call_handler('check_answer', self.answer())
+        fragment = self.block.student_view({})
+        self.assertEqual(fragment.content, 'Vector Drawing')
+        self.assertEqual(fragment.json_init_args['user_state'], self.block.user_state)
+        self.assertEqual(render_template.call_count, 1)
+        # Changing content creates new version
+        self.block.display_name = 'Forces'
+        self.assertEqual(self.block.student_view({}).content, 'Forces')
+        self.assertEqual(render_template.call_count, 2)
+
+    @patch('vectordraw.vectordraw.get_language', Mock(return_value='en'))
+    @patch('vectordraw.vectordraw.loader.render_django_template', Mock(return_value=''))
+    def test_instant_feedback(self):
+        self.runtime.local_resource_url = Mock(side_effect=lambda block, uri: '/resource/' + uri)
+        self.block.custom_checks = '["length(N) > 1", {"check": "sum", "vectors": ["N"], "expected": [1, 1]}]'
+        self.assertNotIn('instant_feedback_checks', self.block.settings)
+        self.assertNotIn('grader_url', self.block.student_view({}).json_init_args)
+        self.block.instant_feedback = True
+        # Built-in checks are sent to the browser with tolerances resolved, custom checks are not
+        self.assertEqual(self.block.settings['instant_feedback_checks'], [
+            {'vector': 'N', 'check': 'presence'},
+            {'vector': 'N', 'check': 'angle', 'expected': 45, 'tolerance': 1.0},
+            {'point': 'cm', 'check': 'point_presence'},
+            {'point': 'cm', 'check': 'point_coords', 'expected': [1, 1], 'tolerance': 1.0},
+        ])
+        fragment = self.block.student_view({})
+        self.assertEqual(fragment.json_init_args['grader_url'], '/resource/public/js/vectordraw_grader.js')
+        self.assertIn('/resource/public/js/vectordraw_grader.js', [resource.data for resource in fragment.resources])
+        # Checks follow changes to the expected result
+        self.block.expected_result = json.dumps({'N': {'length': 2}})
+        self.assertEqual(self.block.settings['instant_feedback_checks'], [
+            {'vector': 'N', 'check': 'presence'},
+            {'vector': 'N', 'check': 'length', 'expected': 2, 'tolerance': 1.0},
+        ])
+
+    def test_check_answer_derives_checks_from_expected_result(self):
+        status, response = self.call_handler('check_answer', self.answer(tip=(1, 0), checks=[]))
+        self.assertEqual(status, 200)
+        self.assertEqual(response['result'], {'correct': False, 'msg': 'The angle of N is incorrect. Your angle: 0.0'})
+        status, response = self.call_handler('check_answer', self.answer(point=(3, 3)))
+        self.assertEqual(response['result'], {'correct': False, 'msg': 'Point cm is not at the correct location.'})
+        status, response = self.call_handler('check_answer', self.answer())
+        self.assertEqual(response['result'], {'correct': True, 'msg': 'Test passed'})
+        self.runtime.publish.assert_called_with(self.block, 'grade', {'value': 1, 'max_value': 1})
+
+    def test_check_answer_uses_current_expected_result(self):
+        self.call_handler('check_answer', self.answer())
+        self.block.expected_result = json.dumps({'N': {'length': 5}})
+        status, response = self.call_handler('check_answer', self.answer())
+        self.assertEqual(response['result'], {
+            'correct': False, 'msg': 'The length of N is incorrect. Your length: 1.4'
+        })
+
+    def test_check_answer_rejects_invalid_data(self):
+        status, _ = self.call_handler('check_answer', {'vectors': {'N': {'tail': [0, 0]}}, 'points': {}})
+        self.assertEqual(status, 400)
+        # Names must be defined by the exercise
+        status, _ = self.call_handler('check_answer', self.answer(points={'X': [1, 1]}))
+        self.assertEqual(status, 400)
+        # Coordinates must be finite and not too far away from the board
+        status, _ = self.call_handler('check_answer', self.answer(tip=(float('nan'), 1)))
+        self.assertEqual(status, 400)
+        status, _ = self.call_handler('check_answer', self.answer(tip=(1, 10 ** 9)))
+        self.assertEqual(status, 400)
+        self.assertEqual(metrics.rejected_answers.value, 4)
+        self.runtime.publish.assert_not_called()
+
+    def test_rescore(self):
+        self.assertFalse(self.block.has_submitted_answer())
+        with self.assertRaises(ValueError):
+            self.block.rescore(only_if_higher=False)
+        self.call_handler('check_answer', self.answer(tip=(2, 1)))
+        self.assertTrue(self.block.has_submitted_answer())
+        self.assertEqual(self.block.get_score(), Score(raw_earned=0, raw_possible=1))
+        self.runtime.publish.reset_mock()
+        # Relaxed tolerance: grade changes
+        self.block.expected_result = json.dumps({
+            'N': {'angle': 45, 'angle_tolerance': 20},
+            'cm': {'coords': [1, 1]},
+        })
+        check_outcomes = self.block.state['check_outcomes']
+        with patch('vectordraw.vectordraw.grade_incrementally', wraps=exercise.grade_incrementally) as grade:
+            self.assertEqual(self.block.calculate_score(), Score(raw_earned=1, raw_possible=1))
+            self.assertFalse(self.block.state['result']['correct'])
+            self.block.rescore(only_if_higher=True)
+        # Outcomes of checks that didn't change are reused
+        self.assertEqual(grade.call_args[0][3], check_outcomes)
+        self.assertEqual(self.block.state['result'], {'correct': True, 'msg': 'Test passed'})
+        self.assertEqual(self.block.get_score(), Score(raw_earned=1, raw_possible=1))
+        self.runtime.publish.assert_called_once_with(
+            self.block, 'grade', {'value': 1, 'max_value': 1, 'only_if_higher': True}
+        )
+        # Scores set by staff last until answers are graded again
+        self.block.set_score(Score(raw_earned=0.5, raw_possible=1))
+        self.assertEqual(self.block.get_score(), Score(raw_earned=0.5, raw_possible=1))
+        self.block.rescore(only_if_higher=False)
+        self.assertEqual(self.block.get_score(), Score(raw_earned=1, raw_possible=1))
+
+    def test_match_vectors(self):
+        self.block.vectors = json.dumps([{'name': 'F1'}, {'name': 'F2'}])
+        self.block.expected_result = json.dumps({'F1': {'angle': 0}, 'F2': {'angle': 90}})
+        swapped = {'vectors': {'F1': {'tail': [0, 0], 'tip': [0, 1]}, 'F2': {'tail': [0, 0], 'tip': [1, 0]}}}
+        _, response = self.call_handler('check_answer', dict(swapped, points={}))
+        self.assertFalse(response['result']['correct'])
+        self.block.match_vectors = True
+        _, response = self.call_handler('check_answer', dict(swapped, points={}))
+        self.assertEqual(response['result'], {
+            'correct': True, 'msg': 'Test passed', 'assignment': {'F1': 'F2', 'F2': 'F1'}
+        })
+        # Outcomes of checks are not reused if vectors are assigned differently
+        self.block.expected_result = json.dumps({'F1': {'angle': 0}, 'F2': {'angle': 90, 'length': 1}})
+        self.block.rescore(only_if_higher=False)
+        self.assertTrue(self.block.state['result']['correct'])
+        self.block.expected_result = json.dumps({'F1': {'angle': 90}, 'F2': {'angle': 0, 'length': 1}})
+        self.block.rescore(only_if_higher=False)
+        self.assertEqual(self.block.state['result'], {
+            'correct': True, 'msg': 'Test passed', 'assignment': {'F1': 'F1', 'F2': 'F2'}
+        })
+
+    def test_check_answer_caches_results(self):
+        for _ in range(3):
+            _, response = self.call_handler('check_answer', self.answer(tip=(2, 1)))
+            self.assertFalse(response['result']['correct'])
+        _, response = self.call_handler('check_answer', self.answer(tip=(2, 1 + 1e-12)))
+        self.assertEqual((vectordraw.grading_results.hits, vectordraw.grading_results.misses), (3, 1))
+        _, response = self.call_handler('check_answer', self.answer(tip=(2, 2)))
+        self.assertTrue(response['result']['correct'])
+        self.assertEqual(vectordraw.grading_results.misses, 2)
+        # Changing the expected result invalidates cached results
+        self.block.custom_checks = '["x(cm) > 0"]'
+        _, response = self.call_handler('check_answer', self.answer(tip=(2, 2)))
+        self.assertEqual(vectordraw.grading_results.misses, 3)
+
+    def test_check_answer_does_not_quantize_custom_checks(self):
+        # Custom checks compare coordinates without tolerance, so nearby answers can differ
+        self.block.custom_checks = '["x(cm) > 1"]'
+        _, response = self.call_handler('check_answer', self.answer(point=(1, 1)))
+        self.assertFalse(response['result']['correct'])
+        _, response = self.call_handler('check_answer', self.answer(point=(1 + 1e-9, 1)))
+        self.assertTrue(response['result']['correct'])
+        self.assertIsNone(self.block.grading_plan.distance_tolerance)
+        self.block.custom_checks = ''
+        self.block.expected_result = json.dumps({
+            'N': {'angle': 45, 'angle_tolerance': 0.1, 'length_tolerance': 0.5, 'length': 1},
+            'cm': {'coords': [1, 1], 'coords_tolerance': 2},
+        })
+        # Angle tolerances are not distances
+        self.assertEqual(self.block.grading_plan.distance_tolerance, 0.5)
+
+    def test_check_answer_runs_custom_checks(self):
+        self.block.custom_checks = json.dumps([
+            'x(cm) == tip_x(N)',
+            {'expression': 'length(N) < 2', 'errmsg': 'N is too long.'},
+        ])
+        _, response = self.call_handler('check_answer', self.answer(tip=(5, 5)))
+        self.assertEqual(response['result'], {'correct': False, 'msg': 'Your answer is not correct.'})
+        self.block.expected_result = '{}'
+        _, response = self.call_handler('check_answer', self.answer(tip=(5, 5), point=(5, 0)))
+        self.assertEqual(response['result'], {'correct': False, 'msg': 'N is too long.'})
+        _, response = self.call_handler('check_answer', self.answer(point=(1.5, 0)))
+        self.assertEqual(response['result'], {'correct': True, 'msg': 'Test passed'})
+
+    def test_invalid_custom_checks(self):
+        self.block.custom_checks = '["length(N) >"]'
+        messages = [message.text for message in self.block.validate().messages]
+        self.assertEqual(messages, [
+            'Custom checks are not valid: Expected a number, function call or "(" at position 11'
+        ])
+        # Invalid custom checks are ignored when grading
+        with patch('vectordraw.vectordraw.log') as log:
+            _, response = self.call_handler('check_answer', self.answer())
+        self.assertTrue(response['result']['correct'])
+        self.assertTrue(log.exception.called)
+        self.block.custom_checks = json.dumps(['(' * 10000 + 'x(cm) > 0' + ')' * 10000])
+        messages = [message.text for message in self.block.validate().messages]
+        self.assertEqual(messages, ['Custom checks are not valid: Expression is nested too deeply at position 21'])
+
+    @patch('vectordraw.exercise.sandbox')
+    def test_check_answer_sandbox_failure(self, sandbox):
+        sandbox.grade_incrementally.side_effect = SandboxTimeout('Grading took too long')
+        self.block.custom_checks = '["length(N) < 2"]'
+        status, response = self.call_handler('check_answer', self.answer())
+        self.assertEqual(status, 200)
+        self.assertEqual(response['result'], {'correct': False, 'msg': vectordraw.COULD_NOT_GRADE_MESSAGE})
+        self.assertEqual(self.block.state, {})
+        self.runtime.publish.assert_not_called()
+        self.assertEqual(metrics.sandbox_failures.value, 1)
+        # Failures are not cached
+        sandbox.grade_incrementally.side_effect = None
+        sandbox.grade_incrementally.return_value = ({'correct': True, 'msg': 'Test passed'}, {})
+        _, response = self.call_handler('check_answer', self.answer())
+        self.assertTrue(response['result']['correct'])
+        self.assertTrue(self.block.state['result']['correct'])
+
+    def test_async_grading(self):
+        self.block.async_grading = True
+        with patch('vectordraw.vectordraw.grading_queue', GradingQueue(workers=1)) as grading_queue:
+            status, response = self.call_handler('check_answer', self.answer())
+            self.assertEqual((status, response['status']), (200, 'pending'))
+            ticket = response['ticket']
+            self.assertEqual(self.block.user_state, dict(self.answer(), pending=ticket))
+            # Repeated submissions get the same ticket
+            _, response = self.call_handler('check_answer', self.answer())
+            self.assertEqual(response['ticket'], ticket)
+            # Jobs only grade answers; results are saved and grades published when clients poll for them
+            self.assertTrue(grading_queue.get(ticket, timeout=5).done())
+            self.assertEqual(self.block.user_state, dict(self.answer(), pending=ticket))
+            self.runtime.publish.assert_not_called()
+            result = {'correct': True, 'msg': 'Test passed'}
+            _, response = self.call_handler('grading_status', {'ticket': ticket})
+            self.assertEqual(response, {'status': 'done', 'result': result})
+            self.assertEqual(self.block.user_state, dict(self.answer(), result=result))
+            self.runtime.publish.assert_called_once_with(self.block, 'grade', {'value': 1, 'max_value': 1})
+            self.assertIsNone(grading_queue.get(ticket))
+            # Results are only collected once
+            _, response = self.call_handler('grading_status', {'ticket': ticket})
+            self.assertEqual(response, {'status': 'done', 'result': {'correct': True, 'msg': 'Test passed'}})
+            self.assertEqual(self.runtime.publish.call_count, 1)
+
+    def test_async_grading_unknown_ticket(self):
+        self.block.async_grading = True
+        with patch('vectordraw.vectordraw.grading_queue', GradingQueue(workers=1)):
+            _, response = self.call_handler('check_answer', self.answer(tip=(1, 0)))
+        # Answer was queued by another process
+        _, response = self.call_handler('grading_status', {'ticket': response['ticket']})
+        self.assertEqual(response['result'], {'correct': False, 'msg': 'The angle of N is incorrect. Your angle: 0.0'})
+        self.assertFalse(self.block.state['result']['correct'])
+        self.assertNotIn('pending', self.block.state)
+
+    def test_async_grading_queue_full(self):
+        self.block.async_grading = True
+        with patch('vectordraw.vectordraw.grading_queue', GradingQueue(workers=1, max_pending=0)):
+            status, _ = self.call_handler('check_answer', self.answer())
+        self.assertEqual(status, 503)
+        self.assertEqual(metrics.rejected_queued_answers.value, 1)
+        self.assertEqual(self.block.state, {})
+
+    def test_async_grading_failure(self):
+        self.call_handler('check_answer', self.answer(tip=(1, 0)))
+        self.block.async_grading = True
+        with patch('vectordraw.vectordraw.grading_queue', GradingQueue(workers=1)) as grading_queue, \
+                patch('vectordraw.vectordraw.grade_answer', side_effect=RuntimeError('Oops')):
+            _, response = self.call_handler('check_answer', self.answer())
+            ticket = response['ticket']
+            grading_queue.get(ticket, timeout=5)
+            # Students are told that the answer could not be graded, and can submit it again
+            result = {'correct': False, 'msg': vectordraw.COULD_NOT_GRADE_MESSAGE}
+            for _ in range(2):
+                status, response = self.call_handler('grading_status', {'ticket': ticket})
+                self.assertEqual((status, response), (200, {'status': 'done', 'result': result}))
+            self.assertNotIn('pending', self.block.state)
+            self.assertEqual(self.block.user_state, dict(self.answer(tip=(1, 0)), result=result))
+            _, response = self.call_handler('check_answer', self.answer())
+            self.assertNotEqual(response['ticket'], ticket)
+        self.runtime.publish.assert_called_once_with(self.block, 'grade', {'value': 0, 'max_value': 1})
+
+    def test_check_answer_skips_redundant_writes(self):
+        self.call_handler('check_answer', self.answer(tip=(2, 1)))
+        self.assertEqual(self.runtime.publish.call_count, 1)
+        self.block.save()
+        # Same answer: nothing to save or publish
+        self.call_handler('check_answer', self.answer(tip=(2, 1)))
+        self.assertEqual(self.block._get_fields_to_save(), [])  # pylint: disable=protected-access
+        self.assertEqual(self.runtime.publish.call_count, 1)
+        # Different answer with same score: save state, but don't publish
+        self.call_handler('check_answer', self.answer(tip=(3, 1)))
+        self.assertEqual(self.block._get_fields_to_save(), ['state'])  # pylint: disable=protected-access
+        self.assertEqual(self.runtime.publish.call_count, 1)
+        # Different score
+        self.call_handler('check_answer', self.answer())
+        self.assertEqual(self.runtime.publish.call_count, 2)
+
+    def test_user_state(self):
+        self.assertEqual(self.block.user_state, {})
+        # State saved by earlier versions
+        self.block.answer = self.answer()
+        self.block.result = {'correct': True, 'msg': 'Test passed'}
+        self.assertEqual(self.block.user_state, dict(self.answer(), result=self.block.result))
+        self.assertNotIn('result', self.block.answer)
+        self.call_handler('check_answer', self.answer(tip=(2, 1)))
+        self.assertEqual(self.block.user_state, dict(self.answer(tip=(2, 1)), result={
+            'correct': False, 'msg': 'The angle of N is incorrect. Your angle: 26.6'
+        }))
+
+    def test_check_answer_metrics(self):
+        self.call_handler('check_answer', self.answer())
+        self.call_handler('check_answer', {'vectors': {'N': {'tail': [0, 0]}}, 'points': {}})
+        snapshot = metrics.registry.snapshot()['metrics']
+        self.assertEqual(snapshot['vectordraw_check_answer_seconds']['count'], 2)
+        self.assertEqual(snapshot['vectordraw_check_answer_request_bytes']['count'], 2)
+        self.assertEqual(snapshot['vectordraw_check_answer_validation_seconds']['count'], 2)
+        self.assertEqual(snapshot['vectordraw_check_answer_grading_seconds']['count'], 1)
+        self.assertEqual(snapshot['vectordraw_check_answer_rejected'], 1)
+
+    def test_metrics_handler(self):
+        request = Request.blank('/')
+        self.assertEqual(self.block.metrics_handler(request).status_code, 403)
+        self.runtime.user_is_staff = True
+        response = self.block.metrics_handler(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content_type, 'application/openmetrics-text')
+        self.assertIn('vectordraw_check_answer_rejected_total', response.text)
+        self.assertIn('vectordraw_cache_hits_total{cache="grading_plans"', response.text)
@@ -0,0 +1,304 @@
+"""
+This module contains vectorized grading logic for grading many answers to the same exercise at once.
+
+Answers are packed into NumPy arrays holding the coordinates of each vector and point
+across the whole batch, so every check can be evaluated for all answers in one operation.
+Checks only use these arrays to find answers that might fail; error messages for those answers
+are produced by the scalar check functions from `vectordraw.grader`, so they are exactly the same
+as the ones produced when grading answers one by one. Distances are computed the same way
+as by scalar checks, but NumPy functions (e.g. `np.arccos`) don't always round the same way
+as the functions from `math` that scalar checks use,
+so answers are only considered to pass a check if they pass it by a margin
+that covers these differences; scalar check functions decide about all other answers.
+
+NumPy is an optional dependency; without it, answers are graded one by one.
+"""
+
+from . import grader  # pylint: disable=cyclic-import
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # pylint: disable=invalid-name
+
+
+class AnswerBatch:
+    """
+    Coordinates of vectors and points from a list of answers, packed into arrays.
+
+    Arrays are built on demand, so only vectors and points that are targeted by checks are packed.
+    """
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.size = len(answers)
+        self._vectors = {}
+        self._points = {}
+
+    def vector(self, name):
+        """
+        Return (present, tail_x, tail_y, tip_x, tip_y) arrays for vector called `name`.
+
+        Coordinates of vectors that are missing from an answer are NaN.
+        """
+        if name not in self._vectors:
+            rows = [answer['vectors'].get(name) for answer in self.answers]
+            present = np.array([row is not None for row in rows], dtype=bool)
+            coords = np.array([
+                (*row['tail'], *row['tip']) if row is not None else _MISSING_VECTOR for row in rows
+            ], dtype=float).reshape(self.size, 4)
+            self._vectors[name] = (present,) + tuple(coords.T)
+        return self._vectors[name]
+
+    def point(self, name):
+        """
+        Return (present, x, y) arrays for point called `name`.
+
+        Coordinates of points that are missing from an answer are NaN.
+        """
+        if name not in self._points:
+            rows = [answer['points'].get(name) for answer in self.answers]
+            present = np.array([row is not None for row in rows], dtype=bool)
+            coords = np.array(
+                [row if row is not None else _MISSING_POINT for row in rows], dtype=float
+            ).reshape(self.size, 2)
+            self._points[name] = (present,) + tuple(coords.T)
+        return self._points[name]
+
+
+_MISSING_VECTOR = (float('nan'),) * 4
+_MISSING_POINT = (float('nan'),) * 2
+
+# Margin relative to the magnitude of tolerances and expected values that values computed
+# by kernels must stay below tolerances by
+RELATIVE_MARGIN = 1e-9
+# Margin (in degrees) for angles, which are computed with acos;
+# its rounding errors grow to about 1e-6 degrees for angles close to 0 and 180 degrees
+ANGLE_MARGIN = 1e-5
+
+
+# Kernels
+#
+# Each kernel takes a (compiled) check and an AnswerBatch, and returns a boolean array
+# marking answers that might fail the check. Comparisons are written so that NaN values
+# (e.g. from missing vectors or degenerate angles) mark answers as failing;
+# the scalar check functions then decide what actually happens for those answers.
+
+def _clearly_within(values, tolerance, scale=0.0, margin=0.0):
+    """
+    Check if `values` are within `tolerance` by more than rounding errors can account for.
+
+    `scale` is the magnitude of the expected value that `values` are distances from,
+    and `margin` is an absolute margin to use on top of the relative one.
+    """
+    limit = tolerance - RELATIVE_MARGIN * max(tolerance, abs(scale), 1.0) - margin
+    return values <= limit
+
+
+def _distance(x, y):
+    """
+    Return lengths of vectors with components `x` and `y`, computed like `grader._distance`.
+    """
+    return np.sqrt(x * x + y * y)
+
+
+def _presence(check, batch):
+    present = batch.vector(check['vector'])[0]
+    return ~present
+
+
+def _point_presence(check, batch):
+    present = batch.point(check['point'])[0]
+    return ~present
+
+
+def _endpoint(endpoint):
+    """
+    Return kernel for checking position of `endpoint` (tail or tip) of a vector.
+    """
+    def kernel(check, batch):
+        _, tail_x, tail_y, tip_x, tip_y = batch.vector(check['vector'])
+        x, y = (tail_x, tail_y) if endpoint == 'tail' else (tip_x, tip_y)
+        expected = check['expected']
+        return ~_clearly_within(_distance(expected[0] - x, expected[1] - y), check['tolerance'])
+    return kernel
+
+
+def _coordinate(index):
+    """
+    Return kernel for checking a single coordinate of a vector.
+
+    `index` is the position of the coordinate in (tail_x, tail_y, tip_x, tip_y).
+    """
+    def kernel(check, batch):
+        coord = batch.vector(check['vector'])[index + 1]
+        return ~_clearly_within(np.abs(check['expected'] - coord), check['tolerance'])
+    return kernel
+
+
+def _coord_delta(expected, actual):
+    """
+    Return distances between `expected` coordinate and `actual` coordinates.
+    """
+    if expected == '_':
+        return np.zeros_like(actual)
+    return expected - actual
+
+
+def _coords_within_tolerance(expected, tail, tip, tolerance):
+    """
+    Check if distances between coordinates of vectors and `expected` coordinates
+    are within `tolerance`.
+
+    `tail` and `tip` are pairs of arrays holding x and y coordinates of vector tails and tips.
+    """
+    within = np.ones_like(tail[0], dtype=bool)
+    for expected_coords, (x, y) in ((expected[0], tail), (expected[1], tip)):
+        delta_x = _coord_delta(expected_coords[0], x)
+        delta_y = _coord_delta(expected_coords[1], y)
+        within &= _clearly_within(_distance(delta_x, delta_y), tolerance)
+    return within
+
+
+def _coords(check, batch):
+    _, tail_x, tail_y, tip_x, tip_y = batch.vector(check['vector'])
+    expected, tolerance = check['expected'], check['tolerance']
+    return ~_coords_within_tolerance(expected, (tail_x, tail_y), (tip_x, tip_y), tolerance)
+
+
+def _segment_coords(check, batch):
+    _, tail_x, tail_y, tip_x, tip_y = batch.vector(check['vector'])
+    expected, tolerance = check['expected'], check['tolerance']
+    # Segments are not directed, so we must check coordinates of both orientations.
+    forward = (tail_x, tail_y), (tip_x, tip_y)
+    backward = (tip_x, tip_y), (tail_x, tail_y)
+    return ~(
+        _coords_within_tolerance(expected, *forward, tolerance) |
+        _coords_within_tolerance(expected, *backward, tolerance)
+    )
+
+
+def _length(check, batch):
+    _, tail_x, tail_y, tip_x, tip_y = batch.vector(check['vector'])
+    length = _distance(tip_x - tail_x, tip_y - tail_y)
+    return ~_clearly_within(
+        np.abs(length - check['expected']), check['tolerance'], scale=check['expected']
+    )
+
+
+def _angle_within_tolerance(x, y, expected, tolerance):
+    """
+    Check if angles between vectors (`x`, `y`) and unit vector with `expected` angle
+    are within `tolerance`.
+    """
+    dot_product = x * np.cos(expected) + y * np.sin(expected)
+    angle = np.degrees(np.arccos(dot_product / _distance(x, y)))
+    return _clearly_within(np.abs(angle), tolerance, margin=ANGLE_MARGIN)
+
+
+def _angle(check, batch):
+    _, tail_x, tail_y, tip_x, tip_y = batch.vector(check['vector'])
+    expected = np.radians(check['expected'])
+    return ~_angle_within_tolerance(tip_x - tail_x, tip_y - tail_y, expected, check['tolerance'])
+
+
+def _segment_angle(check, batch):
+    _, tail_x, tail_y, tip_x, tip_y = batch.vector(check['vector'])
+    x, y = tip_x - tail_x, tip_y - tail_y
+    expected, tolerance = np.radians(check['expected']), check['tolerance']
+    return ~(
+        _angle_within_tolerance(x, y, expected, tolerance) |
+        _angle_within_tolerance(-x, -y, expected, tolerance)
+    )
+
+
+def _points_on_line(check, batch):
+    _, tail_x, tail_y, tip_x, tip_y = batch.vector(check['vector'])
+    expected = np.array(check['expected'], dtype=float).reshape(-1, 2)
+    direction_x = (tip_x - tail_x)[:, np.newaxis]
+    direction_y = (tip_y - tail_y)[:, np.newaxis]
+    determinant = (
+        (expected[:, 0] - tail_x[:, np.newaxis]) * direction_y -
+        (expected[:, 1] - tail_y[:, np.newaxis]) * direction_x
+    )
+    distance = np.abs(determinant) / _distance(direction_x, direction_y)
+    return ~np.all(_clearly_within(distance, check['tolerance']), axis=1)
+
+
+def _point_coords(check, batch):
+    _, x, y = batch.point(check['point'])
+    expected = check['expected']
+    return ~_clearly_within(_distance(expected[0] - x, expected[1] - y), check['tolerance'])
+
+
+# Kernels for built-in check functions; checks without a kernel are evaluated one answer at a time
+KERNELS = {
+    grader.check_presence: _presence,
+    grader.check_point_presence: _point_presence,
+    grader.check_tail: _endpoint('tail'),
+    grader.check_tip: _endpoint('tip'),
+    grader.check_tail_x: _coordinate(0),
+    grader.check_tail_y: _coordinate(1),
+    grader.check_tip_x: _coordinate(2),
+    grader.check_tip_y: _coordinate(3),
+    grader.check_coords: _coords,
+    grader.check_segment_coords: _segment_coords,
+    grader.check_length: _length,
+    grader.check_angle: _angle,
+    grader.check_segment_angle: _segment_angle,
+    grader.check_points_on_line: _points_on_line,
+    grader.check_point_coords: _point_coords,
+}
+
+
+def _targeted_elements(answer, check):
+    """
+    Return vectors and points from `answer` that `check` targets.
+    """
+    vectors, points = {}, {}
+    if 'vector' in check and check['vector'] in answer['vectors']:
+        name = check['vector']
+        props = answer['vectors'][name]
+        vectors[name] = grader.Vector(name, *props['tail'], *props['tip'])
+    if 'point' in check and check['point'] in answer['points']:
+        points[check['point']] = grader.Point(*answer['points'][check['point']])
+    return vectors, points
+
+
+def grade_many(plan, answers):
+    """
+    Grade each answer from `answers` against compiled checks of `plan`.
+
+    Return a list of results in the same order as `answers`.
+    Results are the same as the ones that `plan.grade` returns for individual answers.
+    """
+    if np is None:
+        return [plan.grade(answer) for answer in answers]
+    batch = AnswerBatch(answers)
+    results = [None] * batch.size
+    pending = np.ones(batch.size, dtype=bool)
+
+    with np.errstate(all='ignore'):
+        for check, check_fn, step in zip(plan.compiled_checks, plan.check_functions, plan.steps):
+            if not pending.any():
+                break
+            kernel = KERNELS.get(check_fn)
+            if kernel is None:
+                candidates = pending
+            else:
+                candidates = kernel(check, batch) & pending
+            for index in np.flatnonzero(candidates):
+                # Built-in checks only need the element they target;
+                # other checks might use any of the vectors and points from the answer.
+                if kernel is None:
+                    elements = plan.get_elements(answers[index])
+                else:
+                    elements = _targeted_elements(answers[index], check)
+                try:
+                    step(*elements)
+                except ValueError as e:
+                    results[index] = {'correct': False, 'msg': str(e)}
+                    pending[index] = False
+    for index in np.flatnonzero(pending):
+        results[index] = {'correct': True, 'msg': plan.success_message}
+    return results
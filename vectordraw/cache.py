@@ -0,0 +1,107 @@
+"""
+This module contains the process-local caches used by the Vector Drawing XBlock.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe mapping that evicts the least recently used entry when full.
+
+    Keeps track of hits and misses so that callers can monitor how effective it is.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """
+        Return value stored for `key`, marking it as recently used.
+
+        Return `default` if there is no entry for `key`.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Store `value` for `key`, evicting the least recently used entry if the cache is full.
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_create(self, key, factory):
+        """
+        Return value stored for `key`, calling `factory()` to create and store it on a miss.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        """
+        Remove all entries from the cache and reset its counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_MISSING = object()
+
+
+def cache_size(name, default):
+    """
+    Return size configured for cache called `name`.
+
+    Sizes can be configured via VECTORDRAW_<NAME>_CACHE_SIZE environment variables.
+    """
+    return int(os.environ.get(f'VECTORDRAW_{name.upper()}_CACHE_SIZE', default))
+
+
+def answer_fingerprint(answer, quantum=None):
+    """
+    Return hashable representation of vectors and points from `answer`.
+
+    Coordinates are rounded to multiples of `quantum` (if given), so that answers
+    whose coordinates differ by less than that get the same fingerprint.
+    """
+    if quantum:
+        def quantize(coords):
+            return tuple(round(coord / quantum) for coord in coords)
+    else:
+        quantize = tuple
+    vectors = tuple(sorted(
+        (name, quantize(props['tail']), quantize(props['tip']))
+        for name, props in answer['vectors'].items()
+    ))
+    points = tuple(sorted(
+        (name, quantize(coords)) for name, coords in answer['points'].items()
+    ))
+    return vectors, points
@@ -0,0 +1,284 @@
+"""
+Command line interface for grading answers to Vector Drawing exercises in bulk.
+
+Reads answer records from a JSONL file (or standard input) and writes one result per record
+(in input order) to standard output. Each record is a JSON object with the following entries:
+
+- `answer`: The answer to grade, i.e. a dictionary with `vectors` and `points` entries
+  that has the same format as the answer data that students submit.
+
+- `expected_result`: Expected result of the exercise, as a JSON object or a JSON string
+  (i.e. the value of the `expected_result` field of a Vector Drawing block).
+
+- `points` (optional): Points of the exercise, as a list or a JSON string
+  (i.e. the value of the `points` field of a Vector Drawing block).
+  Required for grading checks that target points.
+
+- `custom_checks` (optional): Custom checks of the exercise, as a list or a JSON string
+  (i.e. the value of the `custom_checks` field of a Vector Drawing block).
+
+- `match_vectors` (optional): Whether to ignore the labels of vectors
+  (i.e. the value of the `match_vectors` field of a Vector Drawing block).
+  If true, full results include the assignment of labels (see `vectordraw.matching`).
+
+- `checks` (optional): A list of checks to use instead of the ones derived from `expected_result`
+  and `custom_checks`.
+
+- `id` (optional): An identifier that is copied to the corresponding result.
+
+With `--correctness-only`, results only say whether answers are correct, without feedback messages.
+Checks can then be evaluated in the order that rejects wrong answers fastest,
+which each worker process learns from the answers it grades (see `vectordraw.ordering`).
+
+Plans for grading answers are compiled the same way as by the XBlock (see `vectordraw.exercise`),
+so answers get the same results as when students submit them, except that invalid custom checks
+make records fail instead of being left out.
+
+Records are graded in chunks that are distributed across a pool of worker processes.
+Only a bounded number of chunks is in flight at any time, so memory use does not depend
+on the size of the input.
+
+Example:
+
+    vectordraw-grade --jobs 8 answers.jsonl > results.jsonl
+"""
+
+import argparse
+import contextlib
+import functools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .cache import LRUCache
+from .exercise import compile_grading_plan
+from .expressions import custom_checks_from_json
+from .grader import Grader
+
+# Grading plans compiled by the current process, keyed by problem definition
+grading_plans = LRUCache(maxsize=64)  # pylint: disable=invalid-name
+
+# Errors that indicate that a record could not be graded because it is malformed
+RECORD_ERRORS = (
+    AttributeError, KeyError, TypeError, ValueError, ZeroDivisionError, RecursionError
+)
+
+
+def _load(value):
+    """
+    Return `value`, decoding it first if it is a JSON string.
+    """
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def _problem_key(record):
+    """
+    Return key identifying problem definition of `record`.
+    """
+    return json.dumps([
+        record.get('expected_result'), record.get('points'), record.get('custom_checks'),
+        bool(record.get('match_vectors')), record.get('checks'),
+    ], sort_keys=True)
+
+
+def _compile_plan(record):
+    """
+    Compile GradingPlan for problem definition of `record`.
+    """
+    checks = record.get('checks')
+    if checks is not None:
+        return Grader().compile(checks)
+    point_names = {point['name'] for point in _load(record.get('points', []))}
+    custom_checks = record.get('custom_checks')
+    if custom_checks is not None:
+        if not isinstance(custom_checks, str):
+            custom_checks = json.dumps(custom_checks)
+        custom_checks = custom_checks_from_json(custom_checks)
+    return compile_grading_plan(
+        _load(record['expected_result']), point_names, custom_checks,
+        bool(record.get('match_vectors')),
+    )
+
+
+def _read_record(line, output):
+    """
+    Parse answer record from `line`, and copy its identifier to `output`.
+
+    Return key identifying problem definition of the record, GradingPlan for it,
+    and the answer to grade.
+    """
+    record = json.loads(line)
+    if 'id' in record:
+        output['id'] = record['id']
+    key = _problem_key(record)
+    return key, grading_plans.get_or_create(key, lambda: _compile_plan(record)), record['answer']
+
+
+def grade_lines(lines, correctness_only=False):
+    """
+    Grade answer records from `lines` and return list of result records.
+
+    Records that belong to the same problem are graded together.
+    If `correctness_only` is True, results don't contain feedback messages
+    (or assignments of vector labels).
+    """
+    outputs = [None] * len(lines)
+    groups = {}
+    # Assignments of vector labels for answers to problems that ignore labels
+    assignments = {}
+    for index, line in enumerate(lines):
+        output = outputs[index] = {}
+        try:
+            key, plan, answer = _read_record(line, output)
+            if plan.matcher is not None:
+                answer, assignments[index] = plan.matcher.match(answer)
+        except RECORD_ERRORS as error:
+            output['error'] = f'{type(error).__name__}: {error}'
+            continue
+        groups.setdefault(key, (plan, [], []))
+        groups[key][1].append(index)
+        groups[key][2].append(answer)
+    for plan, indices, answers in groups.values():
+        for index, result in zip(indices, _grade_group(plan, answers, correctness_only)):
+            if isinstance(result, Exception):
+                outputs[index]['error'] = f'{type(result).__name__}: {result}'
+            elif index in assignments and not correctness_only:
+                outputs[index]['result'] = dict(result, assignment=assignments[index])
+            else:
+                outputs[index]['result'] = result
+    return outputs
+
+
+def _grade_group(plan, answers, correctness_only):
+    """
+    Grade `answers` to the same problem against `plan`.
+
+    Return a list of results, with exceptions in place of results for answers
+    that could not be graded.
+    """
+    if correctness_only:
+        return [_check_one(plan, answer) for answer in answers]
+    try:
+        return plan.grade_many(answers)
+    except RECORD_ERRORS:
+        # Grade answers one by one to isolate the ones that can't be graded
+        return [_grade_one(plan, answer) for answer in answers]
+
+
+def _grade_one(plan, answer):
+    """
+    Grade `answer`, returning the exception that occurred if it could not be graded.
+    """
+    try:
+        return plan.grade(answer)
+    except RECORD_ERRORS as error:
+        return error
+
+
+def _check_one(plan, answer):
+    """
+    Check whether `answer` is correct, returning the exception that occurred if it could not be.
+    """
+    try:
+        return {'correct': plan.is_correct(answer)}
+    except RECORD_ERRORS as error:
+        return error
+
+
+def _chunks(lines, chunk_size):
+    """
+    Split iterable of `lines` into lists of at most `chunk_size` non-blank lines.
+    """
+    lines = (line for line in lines if line.strip())
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def grade_stream(  # pylint: disable=too-many-arguments
+        lines, jobs=None, chunk_size=1000, max_pending=None, correctness_only=False
+):
+    """
+    Grade answer records from iterable of `lines`, yielding result records in input order.
+
+    Chunks of `chunk_size` records are graded by a pool of `jobs` processes
+    (defaulting to the number of CPUs), keeping at most `max_pending` chunks in flight.
+    If `correctness_only` is True, results don't contain feedback messages.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    grade_chunk = functools.partial(grade_lines, correctness_only=correctness_only)
+    if jobs == 1:
+        for chunk in _chunks(lines, chunk_size):
+            yield from grade_chunk(chunk)
+        return
+    max_pending = max_pending or 2 * jobs
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(executor.submit(grade_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _open(path, std_stream, mode):
+    """
+    Return context manager for file at `path`, or for `std_stream` if `path` is '-'.
+    """
+    if path == '-':
+        return contextlib.nullcontext(std_stream)
+    return open(path, mode, encoding='utf-8')
+
+
+def main(argv=None):
+    """
+    Entry point of the `vectordraw-grade` command.
+    """
+    parser = argparse.ArgumentParser(
+        prog='vectordraw-grade',
+        description='Grade answers to Vector Drawing exercises from a JSONL file.'
+    )
+    parser.add_argument(
+        'input', nargs='?', default='-',
+        help='JSONL file containing answer records (default: read from standard input)'
+    )
+    parser.add_argument(
+        '-o', '--output', default='-',
+        help='file to write results to (default: write to standard output)'
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help='number of worker processes (default: number of CPUs)'
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, default=1000,
+        help='number of records to send to a worker process at a time (default: 1000)'
+    )
+    parser.add_argument(
+        '--correctness-only', action='store_true',
+        help='only report whether answers are correct, without feedback messages (faster)'
+    )
+    args = parser.parse_args(argv)
+
+    with _open(args.input, sys.stdin, 'r') as infile, \
+            _open(args.output, sys.stdout, 'w') as outfile:
+        outputs = grade_stream(
+            infile, jobs=args.jobs, chunk_size=args.chunk_size,
+            correctness_only=args.correctness_only,
+        )
+        for output in outputs:
+            outfile.write(json.dumps(output))
+            outfile.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+This module contains logic for compiling the grading-related content of Vector Drawing exercises
+into grading plans, and for grading answers against them.
+
+Both the XBlock and the bulk grader (see `vectordraw.cli`) compile plans this way,
+so answers get the same results no matter which of them grades them.
+Grading functions don't touch any XBlock, so they can also run in the background
+(see `vectordraw.jobs`).
+"""
+
+from .cache import LRUCache, answer_fingerprint, cache_size
+from .grader import Grader, checks_from_expected_result
+from .matching import VectorMatcher
+from .sandbox import sandbox
+
+# Results of grading answers, keyed by content version and answer fingerprint
+grading_results = LRUCache(maxsize=cache_size('result', 4096))  # pylint: disable=invalid-name
+
+# Answers whose coordinates differ by less than this fraction of the `distance_tolerance`
+# of the plan used for grading them are considered identical when looking up cached results
+RESULT_CACHE_RESOLUTION = 1e-6
+
+
+def compile_grading_plan(expected_result, point_names, custom_checks=None, match_vectors=False):
+    """
+    Compile checks for `expected_result` (a dictionary) and `custom_checks` into a GradingPlan.
+
+    Entries of `expected_result` whose names are listed in `point_names` are treated as points.
+    `custom_checks` is a (checks, check_functions) pair as returned by `custom_checks_from_json`;
+    custom checks run after checks for the expected result. If `match_vectors` is True,
+    the plan gets a matcher for the expected vectors (see `vectordraw.matching`).
+    """
+    checks = checks_from_expected_result(expected_result, point_names)
+    custom_checks, check_functions = custom_checks or ([], {})
+    plan = Grader(custom_checks=check_functions).compile(checks + custom_checks)
+    if match_vectors:
+        plan.matcher = VectorMatcher(plan, set(expected_result) - set(point_names))
+    return plan
+
+
+def _relabeled(assignment):
+    """
+    Return entries of vector `assignment` that change labels.
+    """
+    return {label: name for label, name in (assignment or {}).items() if label != name}
+
+
+def grade_incrementally(plan, version, answer, outcomes=None, assignment=None):
+    """
+    Grade `answer` against `plan` (whose content version is `version`),
+    reusing `outcomes` of checks that were evaluated before.
+
+    If `plan` has a matcher, vectors of `answer` are relabeled before grading
+    (see `vectordraw.matching`), and the result includes the assignment of labels.
+    `outcomes` are only reused if vectors are relabeled the same way
+    as for the `assignment` they were obtained with.
+
+    If the sandbox is enabled, expensive and author-supplied checks run in the sandbox;
+    raises SandboxError if they can't be evaluated there.
+    """
+    new_assignment = None
+    if plan.matcher is not None:
+        answer, new_assignment = plan.matcher.match(answer)
+    if _relabeled(new_assignment) != _relabeled(assignment):
+        outcomes = None
+    if sandbox.enabled:
+        result, outcomes = sandbox.grade_incrementally(plan, version, answer, outcomes)
+    else:
+        result, outcomes = plan.grade_incrementally(answer, outcomes)
+    if new_assignment is not None:
+        result = dict(result, assignment=new_assignment)
+    return result, outcomes
+
+
+def grade_answer(plan, version, answer):
+    """
+    Grade `answer` against `plan` (whose content version is `version`),
+    returning result and outcomes of checks that were evaluated.
+
+    Results are cached, so students re-submitting the same answer don't need to be graded again.
+    """
+    quantum = plan.distance_tolerance * RESULT_CACHE_RESOLUTION if plan.distance_tolerance else None
+    try:
+        key = (version, answer_fingerprint(answer, quantum))
+    except (TypeError, ValueError, OverflowError):
+        # Coordinates can't be quantized (e.g. because they are not finite)
+        return grade_incrementally(plan, version, answer)
+    result, outcomes = grading_results.get_or_create(
+        key, lambda: grade_incrementally(plan, version, answer)
+    )
+    return dict(result), dict(outcomes)
@@ -0,0 +1,456 @@
+"""
+This module contains a small expression language for custom checks of Vector Drawing exercises.
+
+Custom checks let course authors grade properties of answers that can't be expressed in terms
+of expected results for individual vectors and points, such as relations between vectors:
+
+    length(F1) == 2 * length(F2) +- 0.5
+    angle(N) - angle(f) ~ 90 +- 2
+    x(P) > 0 and y(P) > 0
+
+Expressions are parsed once and compiled into Python closures, which the grader runs
+like any other check. They are never passed to `eval`, so all they can do is compute
+the following functions and operators:
+
+- Vector properties: length(v), angle(v), tail_x(v), tail_y(v), tip_x(v), tip_y(v), dx(v), dy(v)
+- Point properties: x(p), y(p)
+- Math functions: abs, sqrt, min, max, hypot, as well as sin, cos and tan of angles in degrees
+- Arithmetic: +, -, *, / and parentheses
+- Comparisons: <, <=, >, >=, as well as `a == b +- t` and `a != b +- t` (values are equal
+  if they differ by at most `t`, which defaults to 1) and `a ~ b +- t` (angles in degrees
+  are equal if they differ by at most `t` modulo 360; `t` defaults to 2)
+- Logic: and, or, not
+
+Names of vectors and points that are not valid identifiers can be quoted, e.g. length('F 1').
+"""
+
+import functools
+import json
+import math
+import operator
+import re
+
+from . import relations
+
+# Message for custom checks that fail, unless the author specified one
+DEFAULT_ERRMSG = 'Your answer is not correct.'
+
+# Default tolerances of the comparison operators that support them
+DEFAULT_TOLERANCES = {'==': 1.0, '!=': 1.0, '~': 2.0}
+
+# Maximum depth of nested parentheses, function calls and unary operators in expressions;
+# parsing and evaluating expressions recurses once per level
+MAX_NESTING = 20
+
+_TOKEN_RE = re.compile(r"""
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<string>'[^']*'|"[^"]*")
+  | (?P<op>\+-|==|!=|<=|>=|[-+*/<>~(),])
+""", re.VERBOSE)
+
+
+class ExpressionError(ValueError):
+    """
+    Raised when an expression can't be compiled.
+    """
+
+    def __init__(self, message, position):
+        super().__init__(f'{message} at position {position}')
+        self.position = position
+
+
+class MissingElementError(ValueError):
+    """
+    Raised when an expression refers to a vector or point that is not part of an answer.
+    """
+
+
+def _degrees(function):
+    return lambda angle: function(math.radians(angle))
+
+
+def _angles_equal(first, second, tolerance):
+    return abs((first - second + 180) % 360 - 180) <= tolerance
+
+
+VECTOR_PROPERTIES = {
+    'length': lambda vec: vec.length,
+    'angle': lambda vec: vec.angle,
+    'tail_x': lambda vec: vec.tail.x,
+    'tail_y': lambda vec: vec.tail.y,
+    'tip_x': lambda vec: vec.tip.x,
+    'tip_y': lambda vec: vec.tip.y,
+    'dx': lambda vec: vec.tip.x - vec.tail.x,
+    'dy': lambda vec: vec.tip.y - vec.tail.y,
+}
+
+POINT_PROPERTIES = {
+    'x': lambda point: point.x,
+    'y': lambda point: point.y,
+}
+
+# Math functions, mapped to (minimum number of arguments, maximum number of arguments, function)
+MATH_FUNCTIONS = {
+    'abs': (1, 1, abs),
+    'sqrt': (1, 1, math.sqrt),
+    'min': (2, None, min),
+    'max': (2, None, max),
+    'hypot': (2, 2, math.hypot),
+    'sin': (1, 1, _degrees(math.sin)),
+    'cos': (1, 1, _degrees(math.cos)),
+    'tan': (1, 1, _degrees(math.tan)),
+}
+
+ARITHMETIC_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+COMPARISON_OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': lambda first, second, tolerance: abs(first - second) <= tolerance,
+    '!=': lambda first, second, tolerance: abs(first - second) > tolerance,
+    '~': _angles_equal,
+}
+
+
+class _Node:
+    """
+    A compiled (sub)expression.
+
+    `evaluate` is a callable that takes `vectors` and `points` and returns the value
+    of the expression, which is a number or a boolean depending on `kind`.
+    """
+    __slots__ = ('kind', 'evaluate', 'constant')
+
+    def __init__(self, kind, evaluate, constant=False):
+        self.kind = kind
+        self.evaluate = evaluate
+        self.constant = constant
+
+
+def _apply(kind, function, operands, position):
+    """
+    Return node that applies `function` to values of `operands`.
+
+    If all operands are constant, `function` is applied right away.
+    """
+    if all(operand.constant for operand in operands):
+        try:
+            value = function(*(operand.evaluate(None, None) for operand in operands))
+        except (ArithmeticError, ValueError) as error:
+            raise ExpressionError(f'Invalid operation ({error})', position) from error
+        return _Node(kind, lambda vectors, points: value, constant=True)
+    evaluators = [operand.evaluate for operand in operands]
+    if len(evaluators) == 1:
+        first, = evaluators
+        return _Node(kind, lambda vectors, points: function(first(vectors, points)))
+    if len(evaluators) == 2:
+        first, second = evaluators
+        return _Node(
+            kind, lambda vectors, points: function(first(vectors, points), second(vectors, points))
+        )
+    return _Node(
+        kind,
+        lambda vectors, points: function(*[evaluate(vectors, points) for evaluate in evaluators])
+    )
+
+
+def _vector_property(name, getter):
+    """
+    Return node that applies `getter` to vector called `name`.
+    """
+    message = f'You need to use the {name} vector.'
+
+    def evaluate(vectors, points):  # pylint: disable=unused-argument
+        vec = vectors.get(name)
+        if vec is None:
+            raise MissingElementError(message)
+        return getter(vec)
+    return _Node('number', evaluate)
+
+
+def _point_property(name, getter):
+    """
+    Return node that applies `getter` to point called `name`.
+    """
+    message = f'You need to use the {name} point.'
+
+    def evaluate(vectors, points):  # pylint: disable=unused-argument
+        point = points.get(name)
+        if point is None:
+            raise MissingElementError(message)
+        return getter(point)
+    return _Node('number', evaluate)
+
+
+class _Parser:
+    """
+    Recursive descent parser that compiles an expression into a tree of closures.
+    """
+
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.index = 0
+        self.depth = 0
+
+    @property
+    def token(self):
+        """
+        Return current (kind, value, position) token.
+        """
+        return self.tokens[self.index]
+
+    def _next(self):
+        token = self.token
+        self.index += 1
+        return token
+
+    def _accept(self, *values):
+        """
+        Consume and return current token if it is an operator or keyword from `values`.
+        """
+        kind, value, _ = self.token
+        if kind in ('op', 'name') and value in values:
+            return self._next()
+        return None
+
+    def _expect(self, value):
+        if not self._accept(value):
+            raise ExpressionError(f'Expected "{value}"', self.token[2])
+
+    def _check_kind(self, node, kind, position):
+        if node.kind != kind:
+            raise ExpressionError(
+                'Expected a comparison' if kind == 'bool' else 'Expected a number', position
+            )
+        return node
+
+    def _nested(self, parse, kind='number'):
+        """
+        Parse nested operand via `parse`, and check that it is of the given `kind` (if any).
+
+        Raises ExpressionError if operands are nested more than MAX_NESTING levels deep.
+        """
+        if self.depth >= MAX_NESTING:
+            raise ExpressionError('Expression is nested too deeply', self.token[2])
+        self.depth += 1
+        try:
+            return parse() if kind is None else self._operand(parse, kind)
+        finally:
+            self.depth -= 1
+
+    def _operand(self, parse, kind='number'):
+        """
+        Parse operand via `parse`, and check that it is of the given `kind`.
+        """
+        position = self.token[2]
+        return self._check_kind(parse(), kind, position)
+
+    def parse(self):
+        """
+        Return node for the whole expression, which must evaluate to a boolean.
+        """
+        node = self._operand(self._disjunction, 'bool')
+        if self.token[0] != 'end':
+            raise ExpressionError('Unexpected input', self.token[2])
+        return node
+
+    def _disjunction(self):
+        return self._logical('or', self._conjunction, any)
+
+    def _conjunction(self):
+        return self._logical('and', self._negation, all)
+
+    def _logical(self, keyword, operand, combine):
+        position = self.token[2]
+        nodes = [operand()]
+        while self._accept(keyword):
+            nodes.append(self._operand(operand, 'bool'))
+        if len(nodes) == 1:
+            return nodes[0]
+        self._check_kind(nodes[0], 'bool', position)
+        evaluators = [node.evaluate for node in nodes]
+        # Short-circuits like the corresponding Python operator
+        return _Node('bool', lambda vectors, points: combine(
+            evaluate(vectors, points) for evaluate in evaluators
+        ))
+
+    def _negation(self):
+        if self._accept('not'):
+            position = self.token[2]
+            node = self._nested(self._negation, 'bool')
+            return _apply('bool', operator.not_, [node], position)
+        return self._comparison()
+
+    def _comparison(self):
+        position = self.token[2]
+        first = self._sum()
+        token = self._accept(*COMPARISON_OPERATORS)
+        if token is None:
+            return first
+        comparison, operator_position = token[1], token[2]
+        self._check_kind(first, 'number', position)
+        operands = [first, self._operand(self._sum)]
+        if comparison in DEFAULT_TOLERANCES:
+            if self._accept('+-'):
+                operands.append(self._operand(self._sum))
+            else:
+                tolerance = DEFAULT_TOLERANCES[comparison]
+                operands.append(_Node('number', lambda vectors, points: tolerance, True))
+        return _apply('bool', COMPARISON_OPERATORS[comparison], operands, operator_position)
+
+    def _sum(self):
+        return self._binary(('+', '-'), self._product)
+
+    def _product(self):
+        return self._binary(('*', '/'), self._unary)
+
+    def _binary(self, operators, operand):
+        position = self.token[2]
+        node = operand()
+        token = self._accept(*operators)
+        while token is not None:
+            self._check_kind(node, 'number', position)
+            node = _apply(
+                'number', ARITHMETIC_OPERATORS[token[1]], [node, self._operand(operand)], token[2]
+            )
+            token = self._accept(*operators)
+        return node
+
+    def _unary(self):
+        if self._accept('-'):
+            position = self.token[2]
+            node = self._nested(self._unary)
+            return _apply('number', operator.neg, [node], position)
+        return self._atom()
+
+    def _atom(self):
+        kind, value, position = self._next()
+        if kind == 'number':
+            number = float(value)
+            return _Node('number', lambda vectors, points: number, constant=True)
+        if kind == 'op' and value == '(':
+            node = self._nested(self._disjunction, None)
+            self._expect(')')
+            return node
+        if kind == 'name' and self.token[1] == '(':
+            return self._call(value, position)
+        raise ExpressionError('Expected a number, function call or "("', position)
+
+    def _call(self, function, position):
+        self._expect('(')
+        if function in VECTOR_PROPERTIES or function in POINT_PROPERTIES:
+            kind, name, name_position = self._next()
+            if kind == 'string':
+                name = name[1:-1]
+            elif kind != 'name':
+                raise ExpressionError('Expected name of a vector or point', name_position)
+            self._expect(')')
+            if function in VECTOR_PROPERTIES:
+                return _vector_property(name, VECTOR_PROPERTIES[function])
+            return _point_property(name, POINT_PROPERTIES[function])
+        if function not in MATH_FUNCTIONS:
+            raise ExpressionError(f'Unknown function "{function}"', position)
+        min_args, max_args, math_function = MATH_FUNCTIONS[function]
+        args = []
+        if not self._accept(')'):
+            args.append(self._nested(self._sum))
+            while self._accept(','):
+                args.append(self._nested(self._sum))
+            self._expect(')')
+        if len(args) < min_args or (max_args is not None and len(args) > max_args):
+            raise ExpressionError(f'Wrong number of arguments for "{function}"', position)
+        return _apply('number', math_function, args, position)
+
+
+def _tokenize(text):
+    """
+    Return list of (kind, value, position) tuples for tokens of `text`, terminated by an end token.
+    """
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        if text[position].isspace():
+            position += 1
+            continue
+        match = _TOKEN_RE.match(text, position)
+        if match is None:
+            raise ExpressionError('Invalid character', position)
+        tokens.append((match.lastgroup, match.group(), position))
+        position = match.end()
+    tokens.append(('end', None, len(text)))
+    return tokens
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_expression(text):
+    """
+    Compile expression `text` into a predicate that takes `vectors` and `points`.
+
+    Raises ExpressionError if `text` is not a valid expression. Compiled expressions are cached,
+    so every distinct expression only needs to be parsed once per process.
+    """
+    return _Parser(text).parse().evaluate
+
+
+def compile_check(text):
+    """
+    Return check function that passes if expression `text` is true for an answer.
+    """
+    predicate = compile_expression(text)
+
+    def check_expression(check, vectors, points):
+        try:
+            passed = predicate(vectors, points)
+        except MissingElementError:
+            raise
+        except (ArithmeticError, ValueError):
+            # E.g. division by zero, or square root of a negative number
+            passed = False
+        if not passed:
+            raise ValueError(check.get('errmsg', DEFAULT_ERRMSG))
+    return check_expression
+
+
+def custom_checks_from_json(custom_checks):
+    """
+    Turn JSON list of custom checks specified by course author into a list of checks,
+    and a dictionary of check functions that the grader needs for running them.
+
+    Entries of the list are expressions, or objects with an `expression`
+    and an optional `errmsg` to show to students if the expression is false.
+    Entries can also be relational checks that the grader comes with,
+    e.g. {"check": "perpendicular", "vectors": ["N", "f"]} (see `vectordraw.relations`).
+    Raises ValueError if `custom_checks` is not valid.
+    """
+    try:
+        entries = json.loads(custom_checks)
+    except RecursionError as error:
+        raise ValueError('Custom checks are nested too deeply') from error
+    if not isinstance(entries, list):
+        raise ValueError('Custom checks must be a list')
+    checks, check_functions = [], {}
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {'expression': entry}
+        if isinstance(entry, dict) and 'check' in entry:
+            checks.append(relations.check_from_json(entry))
+            continue
+        if not isinstance(entry, dict) or not isinstance(entry.get('expression'), str):
+            raise ValueError('Custom checks must be expressions or objects with an "expression"')
+        expression = entry['expression']
+        # Valid expressions are never names of built-in checks, so they can be used as check names
+        check_functions[expression] = compile_check(expression)
+        check = {'check': expression}
+        if 'errmsg' in entry:
+            check['errmsg'] = entry['errmsg']
+        checks.append(check)
+    return checks, check_functions
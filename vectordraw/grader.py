@@ -18,6 +18,7 @@ It uses the following data structures:
    Contains the name of the check itself (e.g., 'presence', 'coords', 'angle'),
    the name of the element on which to perform the check, as well as
    the expected value of the property being checked.
+   Relational checks (e.g., 'parallel', 'sum') target a list of `vectors` instead.
    Optionally contains information about tolerance to apply when performing the check,
    and/or a custom error message to present to the user if the check fails.
 
@@ -34,12 +35,24 @@ It uses the following data structures:
 
 from __future__ import absolute_import
 
-import sys
+import functools
+import hashlib
 import inspect
+import json
 import logging
 import math
+import string
+import time
+from collections import ChainMap
+from itertools import islice
+from types import MappingProxyType
+
 import six
 
+from .ordering import CheckOrdering
+from .relations import (
+    check_length_ratio, check_parallel, check_perpendicular, check_relative_angle, check_sum
+)
 
 log = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
@@ -54,14 +67,34 @@ def _errmsg(default_message, check, vectors):
     """
     template = check.get('errmsg', default_message)
     vec = vectors[check['vector']]
-    return template.format(
-        name=vec.name,
-        tail_x=vec.tail.x,
-        tail_y=vec.tail.y,
-        tip_x=vec.tip.x,
-        tip_y=vec.tip.y,
-        length=vec.length,
-        angle=vec.angle
+    fields = _template_fields(template)
+    return template.format(**{
+        field: getter(vec) for field, getter in six.iteritems(_VECTOR_FIELDS) if field in fields
+    })
+
+
+_VECTOR_FIELDS = {
+    'name': lambda vec: vec.name,
+    'tail_x': lambda vec: vec.tail.x,
+    'tail_y': lambda vec: vec.tail.y,
+    'tip_x': lambda vec: vec.tip.x,
+    'tip_y': lambda vec: vec.tip.y,
+    'length': lambda vec: vec.length,
+    'angle': lambda vec: vec.angle,
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def _template_fields(template):
+    """
+    Return names of replacement fields used by error message `template`.
+
+    Results are cached, so every distinct template only needs to be parsed once.
+    """
+    return frozenset(
+        field_name.split('.')[0].split('[')[0]
+        for _, field_name, _, _ in string.Formatter().parse(template)
+        if field_name
     )
 
 
@@ -75,6 +108,18 @@ def _errmsg_point(default_message, check, point):
     return template.format(name=check['point'], x=point.x, y=point.y)
 
 
+def _distance(x, y):
+    """
+    Return length of vector with components `x` and `y`.
+
+    Computed as the square root of the sum of squares of components converted to floats
+    (rather than with `math.hypot`, which rounds differently), so that the browser grader
+    (see vectordraw_grader.js) gets exactly the same lengths and distances.
+    """
+    x, y = float(x), float(y)
+    return math.sqrt(x * x + y * y)
+
+
 def check_presence(check, vectors):
     """
     Check if `vectors` contains vector targeted by `check`.
@@ -93,7 +138,7 @@ def _check_vector_endpoint(check, vectors, endpoint):
     expected = check['expected']
     verb = 'start' if endpoint == 'tail' else 'end'
     endpoint = getattr(vec, endpoint)
-    dist = math.hypot(expected[0] - endpoint.x, expected[1] - endpoint.y)
+    dist = _distance(expected[0] - endpoint.x, expected[1] - endpoint.y)
     if dist > tolerance:
         raise ValueError(_errmsg(
             f"Vector {{name}} does not {verb} at correct point.",
@@ -172,14 +217,17 @@ def _coord_delta(expected, actual):
     return distance
 
 
-def _coords_within_tolerance(vec, expected, tolerance):
+def _coords_within_tolerance(vec, expected, tolerance, reverse=False):
     """
     Check if distance between coordinates of `vec` and `expected` coordinates is within `tolerance`.
+
+    If `reverse` is True, compare coordinates of the opposite of `vec` instead.
     """
-    for expected_coords, vec_coords in ([expected[0], vec.tail], [expected[1], vec.tip]):
+    tail, tip = (vec.tip, vec.tail) if reverse else (vec.tail, vec.tip)
+    for expected_coords, vec_coords in ((expected[0], tail), (expected[1], tip)):
         delta_x = _coord_delta(expected_coords[0], vec_coords.x)
         delta_y = _coord_delta(expected_coords[1], vec_coords.y)
-        if math.hypot(delta_x, delta_y) > tolerance:
+        if _distance(delta_x, delta_y) > tolerance:
             return False
     return True
 
@@ -203,7 +251,7 @@ def check_segment_coords(check, vectors):
     expected = check['expected']
     tolerance = check.get('tolerance', 1.0)
     if not (_coords_within_tolerance(vec, expected, tolerance) or
-            _coords_within_tolerance(vec.opposite(), expected, tolerance)):
+            _coords_within_tolerance(vec, expected, tolerance, reverse=True)):
         raise ValueError(_errmsg('Segment {name} coordinates are not correct.', check, vectors))
 
 
@@ -219,17 +267,26 @@ def check_length(check, vectors):
         ))
 
 
-def _angle_within_tolerance(vec, expected, tolerance):
+def _angle_within_tolerance(vec, expected, tolerance, reverse=False):
     """
     Check if difference between angle of `vec` and `expected` angle is within `tolerance`.
+
+    If `reverse` is True, check angle of the opposite of `vec` instead.
     """
     # Calculate angle between vec and identity vector with expected angle
     # using the formula:
     # angle = acos((A . B) / len(A)*len(B))
+    # Vectors without length don't have an angle
+    if not vec.length:
+        return False
     x = vec.tip.x - vec.tail.x
     y = vec.tip.y - vec.tail.y
+    if reverse:
+        x, y = -x, -y
     dot_product = x * math.cos(expected) + y * math.sin(expected)
-    angle = math.degrees(math.acos(dot_product / vec.length))
+    # Rounding errors can push the cosine slightly outside of the domain of acos
+    cosine = max(-1.0, min(1.0, dot_product / vec.length))
+    angle = math.degrees(math.acos(cosine))
     return abs(angle) <= tolerance
 
 
@@ -256,7 +313,7 @@ def check_segment_angle(check, vectors):
     tolerance = check.get('tolerance', 2.0)
     expected = math.radians(check['expected'])
     if not (_angle_within_tolerance(vec, expected, tolerance) or
-            _angle_within_tolerance(vec.opposite(), expected, tolerance)):
+            _angle_within_tolerance(vec, expected, tolerance, reverse=True)):
         raise ValueError(
             _errmsg('The angle of {name} is incorrect. Your angle: {angle:.1f}', check, vectors)
         )
@@ -266,12 +323,15 @@ def _dist_line_point(line, point):
     """
     Return distance between `line` and `point`.
 
-    The line is passed in as a Vector instance, the point as a Point instance.
+    The line is passed in as a Vector instance, the point as a pair of coordinates.
+    If the line has no length, return distance between its tail and `point`.
     """
+    if not line.length:
+        return _distance(point[0] - line.tail.x, point[1] - line.tail.y)
     direction_x = line.tip.x - line.tail.x
     direction_y = line.tip.y - line.tail.y
-    determinant = (point.x - line.tail.x) * direction_y - (point.y - line.tail.y) * direction_x
-    return abs(determinant) / math.hypot(direction_x, direction_y)
+    determinant = (point[0] - line.tail.x) * direction_y - (point[1] - line.tail.y) * direction_x
+    return abs(determinant) / line.length
 
 
 def check_points_on_line(check, vectors):
@@ -282,13 +342,21 @@ def check_points_on_line(check, vectors):
     tolerance = check.get('tolerance', 1.0)
     points = check['expected']
     for point in points:
-        point = Point(point[0], point[1])
         if _dist_line_point(line, point) > tolerance:
             raise ValueError(_errmsg(
                 'The line {name} does not pass through the correct points.', check, vectors
             ))
 
 
+def check_point_presence(check, points):
+    """
+    Check if `points` contains point targeted by `check`.
+    """
+    if check['point'] not in points:
+        errmsg = check.get('errmsg', 'You need to use the {name} point.')
+        raise ValueError(errmsg.format(name=check['point']))
+
+
 def check_point_coords(check, points):
     """
     Check if coordinates of point targeted by `check` are correct.
@@ -296,7 +364,7 @@ def check_point_coords(check, points):
     point = points[check['point']]
     tolerance = check.get('tolerance', 1.0)
     expected = check['expected']
-    dist = math.hypot(expected[0] - point.x, expected[1] - point.y)
+    dist = _distance(expected[0] - point.x, expected[1] - point.y)
     if dist > tolerance:
         raise ValueError(_errmsg_point(
             'Point {name} is not at the correct location.', check, point
@@ -305,22 +373,77 @@ def check_point_coords(check, points):
 
 class Point:
     """ Represents a single point on the vector drawing board. """
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
 
 
 class Vector:
-    """ Represents a single vector on the vector drawing board. """
+    """
+    Represents a single vector on the vector drawing board.
+
+    Derived quantities (length, angle, direction, components) are computed on first access
+    and cached.
+    """
+    __slots__ = ('name', 'tail', 'tip', '_length', '_angle', '_direction', '_components')
+
     def __init__(self, name, x1, y1, x2, y2):  # pylint: disable=too-many-arguments
         self.name = name
         self.tail = Point(x1, y1)
         self.tip = Point(x2, y2)
-        self.length = math.hypot(x2 - x1, y2 - y1)
-        angle = math.degrees(math.atan2(y2 - y1, x2 - x1))
-        if angle < 0:
-            angle += 360
-        self.angle = angle
+        self._length = None
+        self._angle = None
+        self._direction = None
+        self._components = None
+
+    @property
+    def length(self):
+        """
+        Return length of this vector.
+        """
+        if self._length is None:
+            self._length = _distance(self.tip.x - self.tail.x, self.tip.y - self.tail.y)
+        return self._length
+
+    @property
+    def angle(self):
+        """
+        Return angle of this vector in degrees, in the range [0, 360).
+        """
+        if self._angle is None:
+            angle = math.degrees(math.atan2(self.tip.y - self.tail.y, self.tip.x - self.tail.x))
+            if angle < 0:
+                angle += 360
+            self._angle = angle
+        return self._angle
+
+    @property
+    def direction(self):
+        """
+        Return (x, y) components of unit vector pointing in the direction of this vector.
+        """
+        if self._direction is None:
+            length = self.length
+            self._direction = (
+                (self.tip.x - self.tail.x) / length, (self.tip.y - self.tail.y) / length
+            )
+        return self._direction
+
+    @property
+    def components(self):
+        """
+        Return (x, y, length) components of this vector, as used by relational checks.
+
+        Coordinates are converted to floats first, so that results are exactly the same
+        as for components computed from arrays of coordinates (see `vectordraw.relations`).
+        """
+        if self._components is None:
+            x = float(self.tip.x) - float(self.tail.x)
+            y = float(self.tip.y) - float(self.tail.y)
+            self._components = (x, y, _distance(x, y))
+        return self._components
 
     def opposite(self):
         """
@@ -329,11 +452,386 @@ class Vector:
         return Vector(self.name, self.tip.x, self.tip.y, self.tail.x, self.tail.y)
 
 
+# Check lists
+
+EXPECTED_RESULT_PROPERTIES = (
+    'tail', 'tail_x', 'tail_y', 'tip', 'tip_x', 'tip_y', 'coords',
+    'length', 'angle', 'segment_angle', 'segment_coords', 'points_on_line'
+)
+
+
+# Point properties that can be checked, mapped to names of the corresponding checks
+EXPECTED_RESULT_POINT_PROPERTIES = {
+    'coords': 'point_coords',
+}
+
+
+def _expected_result_check(answer, target, name, prop, check_name):
+    """
+    Return check for property `prop` of element `name` as specified in `answer`.
+    """
+    check = {target: name, 'check': check_name, 'expected': answer[prop]}
+    if prop + '_tolerance' in answer:
+        check['tolerance'] = answer[prop + '_tolerance']
+    if prop + '_errmsg' in answer:
+        check['errmsg'] = answer[prop + '_errmsg']
+    return check
+
+
+def checks_from_expected_result(expected_result, point_names=()):
+    """
+    Turn `expected_result` specified by course author into a list of checks.
+
+    For every element listed in `expected_result`, this produces a presence check
+    followed by a check for each property that has an expected value.
+    Entries whose names are listed in `point_names` are treated as points,
+    all other entries are treated as vectors.
+    """
+    checks = []
+    for name, answer in six.iteritems(expected_result):
+        if name in point_names:
+            target, presence = 'point', 'point_presence'
+            properties = six.iteritems(EXPECTED_RESULT_POINT_PROPERTIES)
+        else:
+            target, presence = 'vector', 'presence'
+            properties = zip(EXPECTED_RESULT_PROPERTIES, EXPECTED_RESULT_PROPERTIES)
+        presence_check = {target: name, 'check': presence}
+        if 'presence_errmsg' in answer:
+            presence_check['errmsg'] = answer['presence_errmsg']
+        checks.append(presence_check)
+        for prop, check_name in properties:
+            if prop in answer:
+                checks.append(_expected_result_check(answer, target, name, prop, check_name))
+    return checks
+
+
+@functools.lru_cache(maxsize=256)
+def _check_parameters(check_fn):
+    """
+    Return names of parameters that `check_fn` expects.
+
+    Results are cached, so the signature of every check function only needs to be inspected once.
+    """
+    return tuple(inspect.signature(check_fn).parameters)
+
+
+def check_key(check):
+    """
+    Return string that identifies `check` by its contents.
+    """
+    return hashlib.sha1(json.dumps(check, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def changed_checks(old_plan, new_plan):
+    """
+    Return checks of `new_plan` that are not part of `old_plan`.
+
+    These are the only checks that need to be evaluated when regrading answers
+    that were graded with `old_plan` (see `GradingPlan.grade_incrementally`).
+    """
+    old_keys = set(old_plan.keys)
+    return [check for key, check in zip(new_plan.keys, new_plan.checks) if key not in old_keys]
+
+
+def _parse_check(check, check_fn):
+    """
+    Return copy of `check` with tolerance resolved for built-in `check_fn`.
+    """
+    default_tolerance = DEFAULT_TOLERANCES.get(check_fn)
+    if default_tolerance is None:
+        return check
+    check = dict(check)
+    check['tolerance'] = float(check.get('tolerance', default_tolerance))
+    return check
+
+
+def _bind_check(check, check_fn):
+    """
+    Return a callable that runs `check_fn` for `check` when given `vectors` and `points`.
+    """
+    parameters = _check_parameters(check_fn)
+    if parameters == ('check', 'vectors'):
+        return lambda vectors, points: check_fn(check, vectors)
+    if parameters == ('check', 'points'):
+        return lambda vectors, points: check_fn(check, points)
+    if parameters == ('check', 'vectors', 'points'):
+        return lambda vectors, points: check_fn(check, vectors, points)
+
+    def run_check(vectors, points):
+        check_data = {'check': check, 'vectors': vectors, 'points': points}
+        return check_fn(*[check_data[param] for param in parameters])
+    return run_check
+
+
+def _observe_check(step, check, observer):
+    """
+    Return a callable that runs `step` for `check`, and reports its outcome to `observer`.
+    """
+    check_name = check['check']
+    target = check.get('vector', check.get('point'))
+    clock = time.perf_counter_ns
+
+    def observed_step(vectors, points):
+        start = clock()
+        try:
+            step(vectors, points)
+        except ValueError:
+            observer.check_evaluated(check_name, target, clock() - start, False)
+            raise
+        observer.check_evaluated(check_name, target, clock() - start, True)
+    return observed_step
+
+
+class GradingPlan:
+    """
+    A list of checks compiled into callables that can be run against any number of answers.
+
+    Compiling resolves check functions, tolerances and check function signatures once,
+    so grading an answer only has to run through a flat list of closures.
+    Unless `optimize` is False, checks are also scheduled so that checks implied by earlier checks
+    are skipped, and consecutive checks for the same vector are evaluated together
+    (see `vectordraw.optimizer`); results are the same either way.
+    If an `observer` (see `vectordraw.observers`) is given, it gets notified
+    about every check that is evaluated, so checks are not optimized.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+            self, checks, check_registry, success_message='Test passed', observer=None,
+            optimize=True
+    ):
+        self.checks = checks
+        self.success_message = success_message
+        self.check_functions = [check_registry[check['check']] for check in checks]
+        self.compiled_checks = [
+            _parse_check(check, check_fn) for check, check_fn in zip(checks, self.check_functions)
+        ]
+        self.steps = [
+            _bind_check(check, check_fn)
+            for check, check_fn in zip(self.compiled_checks, self.check_functions)
+        ]
+        if observer is not None:
+            self.steps = [
+                _observe_check(step, check, observer) for step, check in zip(self.steps, checks)
+            ]
+        self.keys = [check_key(check) for check in checks]
+        if optimize and observer is None:
+            from . import optimizer  # pylint: disable=import-outside-toplevel,cyclic-import
+            self.schedule = optimizer.optimize(self.compiled_checks, self.check_functions)
+        else:
+            self.schedule = [(None, (index,)) for index in range(len(checks))]
+        # Checks that are implied by other checks don't need to be evaluated to find out
+        # whether an answer is correct, no matter which order checks are evaluated in
+        self.ordering = CheckOrdering(index for _, indices in self.schedule for index in indices)
+        # Smallest tolerance of checks that compare distances on the board; None unless
+        # all checks target individual vectors and points, since custom and relational checks
+        # might compare any quantity (or none at all) without a tolerance
+        tolerances = [
+            check['tolerance']
+            for check, check_fn in zip(self.compiled_checks, self.check_functions)
+            if check_fn in DISTANCE_CHECKS
+        ]
+        if tolerances and all(check_fn in ELEMENT_CHECKS for check_fn in self.check_functions):
+            self.distance_tolerance = min(tolerances)
+        else:
+            self.distance_tolerance = None
+        # Custom checks might use any vector or point, so we only know
+        # which ones are needed if all checks are built-in checks
+        if all(check_fn in BUILTIN_CHECKS for check_fn in self.check_functions):
+            self.vector_names = frozenset(
+                name for check in checks for name in check.get('vectors', [check.get('vector')])
+                if name is not None
+            )
+            self.point_names = frozenset(check['point'] for check in checks if 'point' in check)
+        else:
+            self.vector_names = self.point_names = None
+        # Assigns vectors of answers to expected vectors regardless of their labels
+        # if set by the caller (see `vectordraw.matching`)
+        self.matcher = None
+
+    def get_elements(self, answer):
+        """
+        Return vectors and points from `answer` as dictionaries of Vector and Point objects.
+
+        Vectors and points that none of the checks target are left out.
+        """
+        return _get_vectors(answer, self.vector_names), _get_points(answer, self.point_names)
+
+    def grade(self, answer):
+        """
+        Check correctness of `answer` by running compiled checks one by one.
+
+        Short-circuit as soon as a single check fails.
+        """
+        failure = self._first_failure(*self.get_elements(answer))
+        if failure is not None:
+            return {'correct': False, 'msg': failure[1]}
+        return {'correct': True, 'msg': self.success_message}
+
+    def is_correct(self, answer, adaptive=True):
+        """
+        Return True if `answer` passes all checks.
+
+        This doesn't produce an error message, so it can stop at any check that fails.
+        If `adaptive` is True, checks are evaluated in the order that is expected to reject
+        wrong answers most cheaply, as learned from earlier answers (see `vectordraw.ordering`).
+        Otherwise, or if a check raises an error other than ValueError when evaluated out of order
+        (e.g. because a presence check that would have failed first was not evaluated yet),
+        checks are evaluated in the author's order.
+        """
+        vectors, points = self.get_elements(answer)
+        ordering = self.ordering
+        if not adaptive or ordering.order == ordering.indices:
+            return self._passes(ordering.indices, vectors, points)
+        try:
+            return self._passes(ordering.order, vectors, points)
+        except Exception:  # pylint: disable=broad-except
+            return self._passes(ordering.indices, vectors, points)
+
+    def _passes(self, order, vectors, points):
+        """
+        Return True if checks at indices from `order` pass for `vectors` and `points`.
+        """
+        ordering = self.ordering
+        if not ordering.should_sample():
+            try:
+                for index in order:
+                    self.steps[index](vectors, points)
+            except ValueError:
+                return False
+            return True
+        clock = time.perf_counter_ns
+        evaluations = []
+        try:
+            for index in order:
+                start = clock()
+                try:
+                    self.steps[index](vectors, points)
+                except ValueError:
+                    evaluations.append((index, clock() - start, False))
+                    return False
+                evaluations.append((index, clock() - start, True))
+            return True
+        finally:
+            ordering.record(evaluations)
+
+    def _first_failure(self, vectors, points, stop=None):
+        """
+        Return index and error message of the first check that fails for `vectors` and `points`,
+        or None if all checks pass.
+
+        If `stop` is given, only checks before that index are considered.
+        """
+        for fused_step, indices in self.schedule:
+            if fused_step is not None:
+                position = fused_step(vectors, points)
+                if position is None:
+                    continue
+                # Run check functions from the first check that might fail on, to get its message
+                indices = indices[position:]
+            for index in indices:
+                if stop is not None and index >= stop:
+                    return None
+                try:
+                    self.steps[index](vectors, points)
+                except ValueError as e:
+                    return index, str(e)
+        return None
+
+    def grade_incrementally(self, answer, outcomes=None, stop=None):
+        """
+        Check correctness of `answer`, reusing `outcomes` of checks that were evaluated before.
+
+        `outcomes` maps keys of checks (see `check_key`) to error messages of checks that failed,
+        and to None for checks that passed. Checks that don't have an outcome are evaluated.
+        Returns the result, along with outcomes of all checks that were needed to obtain it,
+        so that they can be stored for regrading `answer` later on.
+
+        If `stop` is given, only checks before that index are considered.
+        """
+        if not outcomes:
+            return self._grade_with_outcomes(answer, stop)
+        new_outcomes = {}
+        elements = None
+        for key, step in islice(zip(self.keys, self.steps), stop):
+            if key in outcomes:
+                msg = outcomes[key]
+            else:
+                if elements is None:
+                    elements = self.get_elements(answer)
+                try:
+                    step(*elements)
+                    msg = None
+                except ValueError as e:
+                    msg = str(e)
+            new_outcomes[key] = msg
+            if msg is not None:
+                return {'correct': False, 'msg': msg}, new_outcomes
+        return {'correct': True, 'msg': self.success_message}, new_outcomes
+
+    def _grade_with_outcomes(self, answer, stop=None):
+        """
+        Check correctness of `answer` from scratch, and return result along with outcomes of checks.
+
+        All checks before the first check that fails pass, including checks that were skipped
+        because they are implied by earlier checks, so their outcomes don't need to be evaluated.
+        """
+        failure = self._first_failure(*self.get_elements(answer), stop)
+        if failure is None:
+            end = len(self.keys) if stop is None else min(stop, len(self.keys))
+            return {'correct': True, 'msg': self.success_message}, dict.fromkeys(self.keys[:end])
+        index, msg = failure
+        new_outcomes = dict.fromkeys(self.keys[:index])
+        new_outcomes[self.keys[index]] = msg
+        return {'correct': False, 'msg': msg}, new_outcomes
+
+    def grade_many(self, answers):
+        """
+        Check correctness of each answer from `answers`.
+
+        Return a list of results in the same order as `answers`.
+        See `vectordraw.batch` for details.
+        """
+        from .batch import grade_many  # pylint: disable=import-outside-toplevel
+        return grade_many(self, answers)
+
+
+def _get_vectors(answer, names=None):
+    """
+    Turn vector info in `answer` into a dictionary of Vector objects.
+
+    If `names` is given, only turn vectors with these names into Vector objects.
+    """
+    vectors = {}
+    for name, props in six.iteritems(answer['vectors']):
+        if names is not None and name not in names:
+            continue
+        tail = props['tail']
+        tip = props['tip']
+        vectors[name] = Vector(name, tail[0], tail[1], tip[0], tip[1])
+    return vectors
+
+
+def _get_points(answer, names=None):
+    """
+    Turn point info in `answer` into a dictionary of Point objects.
+
+    If `names` is given, only turn points with these names into Point objects.
+    """
+    return {
+        name: Point(*coords) for name, coords in six.iteritems(answer['points'])
+        if names is None or name in names
+    }
+
+
 class Grader:
     """
     Implements grading logic for student answers to Vector Drawing exercises.
+
+    Built-in checks live in a read-only registry that is shared by all graders.
+    Custom checks are only visible to the grader that they are passed to, so graders
+    with different custom checks can safely be used at the same time (e.g. from multiple threads).
     """
-    check_registry = {
+    check_registry = MappingProxyType({
         'presence': check_presence,
         'tail': check_tail,
         'tip': check_tip,
@@ -347,13 +845,32 @@ class Grader:
         'segment_angle': check_segment_angle,
         'segment_coords': check_segment_coords,
         'points_on_line': check_points_on_line,
+        'point_presence': check_point_presence,
         'point_coords': check_point_coords,
-    }
-
-    def __init__(self, success_message='Test passed', custom_checks=None):
+        'sum': check_sum,
+        'parallel': check_parallel,
+        'perpendicular': check_perpendicular,
+        'relative_angle': check_relative_angle,
+        'length_ratio': check_length_ratio,
+    })
+
+    def __init__(self, success_message='Test passed', custom_checks=None, observer=None):
         self.success_message = success_message
+        self.observer = observer
         if custom_checks:
-            self.check_registry.update(custom_checks)
+            self.check_registry = MappingProxyType(
+                ChainMap(dict(custom_checks), Grader.check_registry)
+            )
+
+    def compile(self, checks, optimize=True):
+        """
+        Compile `checks` into a GradingPlan that can be reused for grading multiple answers.
+
+        If `optimize` is False, checks are not optimized (see `vectordraw.optimizer`).
+        """
+        return GradingPlan(
+            checks, self.check_registry, self.success_message, self.observer, optimize
+        )
 
     def grade(self, answer):
         """
@@ -361,40 +878,56 @@ class Grader:
 
         Short-circuit as soon as a single check fails.
         """
-        check_data = {'vectors': self._get_vectors(answer), 'points': self._get_points(answer)}
-        for check in answer['checks']:
-            # pylint: disable=deprecated-method
-            check_data['check'] = check
-            check_fn = self.check_registry[check['check']]
-            # getargspec was deprecated in python3, and apparently
-            # getfullargspec isn't right for this use case
-            if sys.version_info >= (3, 0):
-                args = [check_data[param] for param in inspect.signature(check_fn).parameters]
-            else:
-                args = [check_data[arg] for arg in inspect.getargspec(check_fn).args]
-            try:
-                check_fn(*args)
-            except ValueError as e:
-                if hasattr(e, 'message'):  # Python 2
-                    msg = e.message
-                else:  # Python 3
-                    msg = str(e)
-                return {'correct': False, 'msg': msg}
-        return {'correct': True, 'msg': self.success_message}
+        # Optimizing checks doesn't pay off for a plan that is only used once
+        return self.compile(answer['checks'], optimize=False).grade(answer)
 
-    def _get_vectors(self, answer):
+    def grade_many(self, answers, checks=None):
         """
-        Turn vector info in `answer` into a dictionary of Vector objects.
-        """
-        vectors = {}
-        for name, props in six.iteritems(answer['vectors']):
-            tail = props['tail']
-            tip = props['tip']
-            vectors[name] = Vector(name, tail[0], tail[1], tip[0], tip[1])
-        return vectors
+        Check correctness of multiple answers to the same exercise.
 
-    def _get_points(self, answer):
-        """
-        Turn point info in `answer` into a dictionary of Point objects.
+        All answers are graded against `checks`, which default to the checks of the first answer.
+        Evaluates each check for all answers at once (if NumPy is available),
+        and returns a list of results in the same order as `answers`.
         """
-        return {name: Point(*coords) for name, coords in six.iteritems(answer['points'])}
+        if not answers:
+            return []
+        if checks is None:
+            checks = answers[0]['checks']
+        return self.compile(checks).grade_many(answers)
+
+
+# Check functions that come with the grader
+BUILTIN_CHECKS = frozenset(Grader.check_registry.values())
+
+# Built-in check functions that check properties of individual vectors and points
+ELEMENT_CHECKS = BUILTIN_CHECKS - {
+    check_sum, check_parallel, check_perpendicular, check_relative_angle, check_length_ratio
+}
+
+# Built-in check functions whose tolerances are distances on the board
+DISTANCE_CHECKS = frozenset({
+    check_tail, check_tip, check_tail_x, check_tail_y, check_tip_x, check_tip_y,
+    check_coords, check_segment_coords, check_length, check_points_on_line, check_point_coords,
+})
+
+# Default tolerances of built-in checks, resolved once when compiling checks
+DEFAULT_TOLERANCES = {
+    check_tail: 1.0,
+    check_tip: 1.0,
+    check_tail_x: 1.0,
+    check_tail_y: 1.0,
+    check_tip_x: 1.0,
+    check_tip_y: 1.0,
+    check_coords: 1.0,
+    check_segment_coords: 1.0,
+    check_length: 1.0,
+    check_angle: 2.0,
+    check_segment_angle: 2.0,
+    check_points_on_line: 1.0,
+    check_point_coords: 1.0,
+    check_sum: 1.0,
+    check_parallel: 2.0,
+    check_perpendicular: 2.0,
+    check_relative_angle: 2.0,
+    check_length_ratio: 0.1,
+}
@@ -0,0 +1,187 @@
+"""
+This module contains a queue for grading answers in the background.
+
+Exercises with expensive checks can have `check_answer` queue answers for grading
+instead of grading them while the student waits for a response. Each queued answer gets a ticket,
+which the client uses to poll the `grading_status` handler for the result.
+
+The queue is bounded: once it holds the maximum number of queued and running jobs,
+new answers are rejected (see `QueueFull`) until some of them are done. If a student submits
+the same answer again while it is being graded, they get the ticket of the existing job.
+If they submit a different answer, jobs for their earlier answers are cancelled if possible.
+
+Jobs are kept in memory, so tickets are only known to the process that issued them.
+Handlers fall back on grading answers themselves if they get a ticket that they don't know about.
+
+The queue is configured via the following environment variables,
+which are read when this module is first imported:
+
+- VECTORDRAW_GRADING_WORKERS: Number of threads that grade queued answers (default: 2).
+- VECTORDRAW_GRADING_QUEUE_SIZE: Maximum number of queued and running jobs (default: 256).
+"""
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class QueueFull(Exception):
+    """
+    Raised when an answer can't be queued, because too many answers are queued already.
+    """
+
+
+class GradingJob:
+    """
+    An answer that was queued for grading, identified by `ticket`.
+
+    `key` identifies who submitted the answer to which exercise,
+    and `fingerprint` identifies the answer itself.
+    """
+    __slots__ = ('ticket', 'key', 'fingerprint', 'future')
+
+    def __init__(self, ticket, key, fingerprint, future):
+        self.ticket = ticket
+        self.key = key
+        self.fingerprint = fingerprint
+        self.future = future
+
+    def done(self):
+        """
+        Return True if this job is done (or was cancelled).
+        """
+        return self.future.done()
+
+    def result(self):
+        """
+        Return result of this job, re-raising any exception it raised.
+        """
+        return self.future.result()
+
+
+class GradingQueue:
+    """
+    Grades answers in a pool of `workers` threads, with at most `max_pending` jobs in flight.
+
+    Finished jobs are kept until their results are collected (see `discard`),
+    but at most `max_finished` of them; the oldest ones are discarded first.
+    """
+
+    def __init__(self, workers=2, max_pending=256, max_finished=1024):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.pending = 0
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environ(cls, environ=None):
+        """
+        Return grading queue configured via VECTORDRAW_GRADING_* variables from `environ`.
+        """
+        environ = os.environ if environ is None else environ
+        return cls(
+            workers=int(environ.get('VECTORDRAW_GRADING_WORKERS', 2)),
+            max_pending=int(environ.get('VECTORDRAW_GRADING_QUEUE_SIZE', 256)),
+        )
+
+    def submit(self, key, fingerprint, grade):
+        """
+        Queue job that calls `grade()` for answer with `fingerprint`
+        submitted by whoever `key` identifies, and return its ticket.
+
+        If the most recent job for `key` has the same `fingerprint` and didn't fail,
+        return its ticket instead. Raises QueueFull if too many jobs are in flight.
+        """
+        with self._lock:
+            latest = self._jobs.get(self._latest.get(key))
+            if latest is not None:
+                if latest.fingerprint == fingerprint and not self._failed(latest):
+                    return latest.ticket
+                if latest.future.cancel():
+                    self.pending -= 1
+            if self.pending >= self.max_pending:
+                raise QueueFull(f'{self.pending} answers are queued for grading')
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='vectordraw-grading'
+                )
+            future = self._executor.submit(self._run, grade)
+            job = GradingJob(uuid.uuid4().hex, key, fingerprint, future)
+            self.pending += 1
+            self._jobs[job.ticket] = job
+            self._latest[key] = job.ticket
+            self._trim()
+        return job.ticket
+
+    @staticmethod
+    def _failed(job):
+        return job.done() and (job.future.cancelled() or job.future.exception() is not None)
+
+    def _run(self, grade):
+        """
+        Call `grade()`, and count the job that does it as done before it returns its result.
+        """
+        try:
+            return grade()
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def _trim(self):
+        """
+        Discard oldest finished jobs if there are too many of them.
+
+        Must be called with the lock held.
+        """
+        finished = len(self._jobs) - self.pending
+        for ticket in list(self._jobs):
+            if finished <= self.max_finished:
+                break
+            if self._jobs[ticket].done():
+                self._discard(ticket)
+                finished -= 1
+
+    def get(self, ticket, timeout=0):
+        """
+        Return job with `ticket`, or None if there is no such job.
+
+        If `timeout` is given, wait up to that many seconds for the job to finish.
+        """
+        job = self._jobs.get(ticket)
+        if job is not None and timeout:
+            wait([job.future], timeout=timeout)
+        return job
+
+    def discard(self, ticket):
+        """
+        Forget about job with `ticket` (e.g. because its result was collected).
+        """
+        with self._lock:
+            self._discard(ticket)
+
+    def _discard(self, ticket):
+        job = self._jobs.pop(ticket, None)
+        if job is not None and self._latest.get(job.key) == ticket:
+            del self._latest[job.key]
+
+    def shutdown(self):
+        """
+        Cancel queued jobs, and wait for running jobs to finish.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            # Jobs that were cancelled by shutting down didn't get to count themselves as done
+            self.pending = 0
+
+
+# Queue used by the XBlock, configured via environment variables
+grading_queue = GradingQueue.from_environ()  # pylint: disable=invalid-name
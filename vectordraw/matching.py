@@ -0,0 +1,160 @@
+"""
+This module contains logic for grading answers regardless of the labels that students gave vectors.
+
+Checks look vectors up by name, so an answer that has all the right vectors with swapped labels
+(e.g. F1 drawn where F2 is expected, and vice versa) fails. When matching is enabled,
+each vector that an answer contains is first assigned to one of the expected vectors:
+
+- The cost of grading a submitted vector as an expected vector is the number of checks
+  for the expected vector (as derived from the expected result) that it fails.
+  Expected vectors that no submitted vector is assigned to fail all their checks.
+- The assignment with the lowest total cost is found in polynomial time
+  (see `assign`) instead of trying every permutation of labels. Among assignments
+  with the same cost, the one that keeps the most labels wins.
+
+The answer is then graded with vectors relabeled according to the assignment, so checks
+that target multiple vectors (e.g. relational or custom checks) see the relabeled vectors too.
+Only vectors that are part of the expected result take part in matching;
+all other vectors keep their labels.
+
+SciPy is an optional dependency; without it, assignments are found with a pure Python
+implementation of the Hungarian algorithm, which is fast enough for the number of vectors
+that fit on a drawing board.
+"""
+
+from .grader import BUILTIN_CHECKS, Vector
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # pragma: no cover
+    linear_sum_assignment = None  # pylint: disable=invalid-name
+
+
+def _hungarian(cost):  # pylint: disable=too-many-locals
+    """
+    Return list that maps each row of square `cost` matrix to a column,
+    so that the total cost of the assignment is minimal.
+
+    This is the O(n^3) variant of the Hungarian algorithm that adds one row at a time,
+    and finds the shortest augmenting path for it while maintaining potentials of rows and columns.
+    """
+    size = len(cost)
+    infinity = float('inf')
+    row_potentials = [0.0] * (size + 1)
+    column_potentials = [0.0] * (size + 1)
+    # Row assigned to each column (1-based, 0 for none); column 0 is a sentinel
+    rows = [0] * (size + 1)
+    previous = [0] * (size + 1)
+    for row in range(1, size + 1):
+        rows[0] = row
+        column = 0
+        slack = [infinity] * (size + 1)
+        used = [False] * (size + 1)
+        while True:
+            used[column] = True
+            current_row = rows[column]
+            delta, next_column = infinity, None
+            for candidate in range(1, size + 1):
+                if used[candidate]:
+                    continue
+                reduced = (
+                    cost[current_row - 1][candidate - 1] -
+                    row_potentials[current_row] - column_potentials[candidate]
+                )
+                if reduced < slack[candidate]:
+                    slack[candidate] = reduced
+                    previous[candidate] = column
+                if slack[candidate] < delta:
+                    delta, next_column = slack[candidate], candidate
+            for candidate in range(size + 1):
+                if used[candidate]:
+                    row_potentials[rows[candidate]] += delta
+                    column_potentials[candidate] -= delta
+                else:
+                    slack[candidate] -= delta
+            column = next_column
+            if rows[column] == 0:
+                break
+        # Flip assignments along the augmenting path
+        while column:
+            previous_column = previous[column]
+            rows[column] = rows[previous_column]
+            column = previous_column
+    assignment = [None] * size
+    for column in range(1, size + 1):
+        assignment[rows[column] - 1] = column - 1
+    return assignment
+
+
+def assign(cost):
+    """
+    Return list that maps each row of square `cost` matrix (a list of lists) to a column,
+    so that the total cost of the assignment is minimal.
+
+    Uses SciPy if it is available.
+    """
+    if not cost:
+        return []
+    if linear_sum_assignment is not None:
+        _, columns = linear_sum_assignment(cost)
+        return [int(column) for column in columns]
+    return _hungarian(cost)
+
+
+class VectorMatcher:
+    """
+    Assigns vectors of answers to the expected vectors called `names`,
+    based on the built-in checks of `plan` that target them (see module docstring).
+    """
+
+    def __init__(self, plan, names):
+        self.names = sorted(names)
+        # Steps of checks that only target a single expected vector
+        self.steps = {name: [] for name in self.names}
+        for check, check_fn, step in zip(plan.compiled_checks, plan.check_functions, plan.steps):
+            if check_fn in BUILTIN_CHECKS and check.get('vector') in self.steps:
+                self.steps[check['vector']].append(step)
+
+    def _failures(self, props, name):
+        """
+        Return number of checks for expected vector `name` that vector with `props` fails.
+        """
+        vectors = {name: Vector(name, *props['tail'], *props['tip'])}
+        failures = 0
+        for step in self.steps[name]:
+            try:
+                step(vectors, {})
+            except ValueError:
+                failures += 1
+        return failures
+
+    def match(self, answer):
+        """
+        Return copy of `answer` with vectors relabeled according to the best assignment,
+        along with the assignment, which maps labels of submitted vectors to expected vectors.
+        """
+        submitted = sorted(name for name in answer['vectors'] if name in self.steps)
+        if not submitted:
+            return answer, {}
+        # Keeping labels breaks ties; the bonus for all kept labels is less than one failure
+        bonus = 1.0 / (len(submitted) + 1)
+        cost = [
+            [
+                self._failures(answer['vectors'][label], name) - (bonus if label == name else 0.0)
+                for name in self.names
+            ]
+            for label in submitted
+        ]
+        # Expected vectors that are left without a submitted vector fail all their checks,
+        # including their presence checks
+        cost += [
+            [len(self.steps[name]) for name in self.names]
+            for _ in range(len(self.names) - len(submitted))
+        ]
+        assignment = {
+            label: self.names[column] for label, column in zip(submitted, assign(cost))
+        }
+        vectors = {
+            assignment.get(label, label): props for label, props in answer['vectors'].items()
+        }
+        return dict(answer, vectors=vectors), assignment
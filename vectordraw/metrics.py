@@ -0,0 +1,300 @@
+"""
+This module contains process-local metrics about requests handled by the Vector Drawing XBlock.
+
+Metrics are kept in a registry, which can be inspected from Python via `registry.snapshot()`
+and exported in the OpenMetrics text format via `registry.render()`
+(which is what the `metrics_handler` handler of the XBlock serves to staff users).
+Metrics only cover the current process; with multiple worker processes,
+each worker reports its own values, labeled with its process ID.
+"""
+
+import contextlib
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Upper bounds of buckets for latency histograms, in seconds
+LATENCY_BOUNDS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0
+)
+
+# Upper bounds of buckets for payload size histograms, in bytes
+SIZE_BOUNDS = tuple(2 ** exponent for exponent in range(8, 17))
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def _format_value(value):
+    """
+    Return representation of `value` for use in OpenMetrics text.
+    """
+    if isinstance(value, float) and value == float('inf'):
+        return '+Inf'
+    return repr(value)
+
+
+class Counter:
+    """
+    A monotonically increasing value.
+    """
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """
+        Increase value of this counter by `amount`.
+        """
+        with self._lock:
+            self.value += amount
+
+    def reset(self):
+        """
+        Reset value of this counter to zero.
+        """
+        with self._lock:
+            self.value = 0
+
+    def snapshot(self):
+        """
+        Return current value of this counter.
+        """
+        return self.value
+
+    def samples(self):
+        """
+        Yield (name, labels, value) for each sample of this counter.
+        """
+        yield self.name + '_total', {}, self.value
+
+
+class Histogram:
+    """
+    Counts observed values in buckets whose upper bounds are listed in `bounds`.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, bounds):
+        self.name = name
+        self.help_text = help_text
+        self.bounds = tuple(bounds) + (float('inf'),)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def observe(self, value):
+        """
+        Record observed `value`.
+        """
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for index, bound in enumerate(self.bounds):
+                if value <= bound:
+                    self.buckets[index] += 1
+                    break
+
+    @contextlib.contextmanager
+    def time(self):
+        """
+        Return context manager that records how many seconds its body took to run.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def reset(self):
+        """
+        Discard all observed values.
+        """
+        with self._lock:
+            self.count = 0
+            self.sum = 0
+            self.buckets = [0] * len(self.bounds)
+
+    def snapshot(self):
+        """
+        Return count and sum of observed values, along with cumulative bucket counts.
+        """
+        with self._lock:
+            cumulative, total = [], 0
+            for count in self.buckets:
+                total += count
+                cumulative.append(total)
+            return {
+                'count': self.count,
+                'sum': self.sum,
+                'buckets': OrderedDict(zip(self.bounds, cumulative)),
+            }
+
+    def samples(self):
+        """
+        Yield (name, labels, value) for each sample of this histogram.
+        """
+        snapshot = self.snapshot()
+        for bound, count in snapshot['buckets'].items():
+            yield self.name + '_bucket', {'le': _format_value(float(bound))}, count
+        yield self.name + '_count', {}, snapshot['count']
+        yield self.name + '_sum', {}, snapshot['sum']
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics and caches whose statistics should be reported.
+    """
+
+    def __init__(self):
+        self._metrics = OrderedDict()
+        self._caches = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name, *args):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = metric_class(name, *args)
+            return self._metrics[name]
+
+    def counter(self, name, help_text):
+        """
+        Return counter called `name`, creating it if necessary.
+        """
+        return self._register(Counter, name, help_text)
+
+    def histogram(self, name, help_text, bounds=LATENCY_BOUNDS):
+        """
+        Return histogram called `name`, creating it if necessary.
+        """
+        return self._register(Histogram, name, help_text, bounds)
+
+    def register_cache(self, name, cache):
+        """
+        Report hits, misses and size of LRU `cache` under `name`.
+        """
+        self._caches[name] = cache
+
+    def reset(self):
+        """
+        Reset all metrics (but not statistics of caches).
+        """
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def snapshot(self):
+        """
+        Return current values of all metrics and statistics of all caches.
+        """
+        return {
+            'pid': os.getpid(),
+            'metrics': {name: metric.snapshot() for name, metric in self._metrics.items()},
+            'caches': {
+                name: {
+                    'hits': cache.hits,
+                    'misses': cache.misses,
+                    'hit_rate': cache.hits / (cache.hits + cache.misses)
+                    if cache.hits + cache.misses else None,
+                    'size': len(cache),
+                    'maxsize': cache.maxsize,
+                }
+                for name, cache in self._caches.items()
+            },
+        }
+
+    def render(self):
+        """
+        Return all metrics and statistics of all caches in the OpenMetrics text format.
+        """
+        pid = str(os.getpid())
+        lines = [
+            '# TYPE vectordraw_worker info',
+            '# HELP vectordraw_worker Worker process that reported these metrics.',
+            f'vectordraw_worker_info{{pid="{pid}"}} 1',
+        ]
+        for metric in self._metrics.values():
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            for name, labels, value in metric.samples():
+                lines.append(_sample_line(name, dict(labels, pid=pid), value))
+        caches = self.snapshot()['caches']
+        for metric_name, kind, help_text, key in CACHE_METRICS:
+            lines.append(f'# TYPE {metric_name} {kind}')
+            lines.append(f'# HELP {metric_name} {help_text}')
+            sample_name = metric_name + '_total' if kind == 'counter' else metric_name
+            for cache_name, stats in caches.items():
+                labels = {'cache': cache_name, 'pid': pid}
+                lines.append(_sample_line(sample_name, labels, stats[key]))
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+# Metrics reported for each registered cache: (name, type, help text, key of cache statistics)
+CACHE_METRICS = (
+    ('vectordraw_cache_hits', 'counter', 'Cache lookups that found an entry.', 'hits'),
+    ('vectordraw_cache_misses', 'counter', 'Cache lookups that found no entry.', 'misses'),
+    ('vectordraw_cache_entries', 'gauge', 'Number of cached entries.', 'size'),
+    ('vectordraw_cache_capacity', 'gauge', 'Maximum number of cached entries.', 'maxsize'),
+)
+
+
+def _sample_line(name, labels, value):
+    """
+    Return OpenMetrics line for sample called `name` with `labels` and `value`.
+    """
+    label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+    return f'{name}{{{label_text}}} {_format_value(value)}'
+
+
+def instrument_handler(latency, payload_size):
+    """
+    Return decorator that records `latency` and request `payload_size` of an XBlock handler.
+
+    Apply it on top of `XBlock.handler` or `XBlock.json_handler`, so it sees raw requests.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(block, request, suffix=''):
+            payload_size.observe(len(request.body))
+            with latency.time():
+                return handler(block, request, suffix)
+        return wrapper
+    return decorator
+
+
+# Registry holding metrics of the current process
+registry = MetricsRegistry()  # pylint: disable=invalid-name
+
+check_answer_seconds = registry.histogram(  # pylint: disable=invalid-name
+    'vectordraw_check_answer_seconds',
+    'Time spent handling check_answer requests.',
+)
+check_answer_request_bytes = registry.histogram(  # pylint: disable=invalid-name
+    'vectordraw_check_answer_request_bytes',
+    'Size of check_answer request bodies.',
+    SIZE_BOUNDS,
+)
+validation_seconds = registry.histogram(  # pylint: disable=invalid-name
+    'vectordraw_check_answer_validation_seconds',
+    'Time spent validating answers submitted via check_answer.',
+)
+grading_seconds = registry.histogram(  # pylint: disable=invalid-name
+    'vectordraw_check_answer_grading_seconds',
+    'Time spent grading answers submitted via check_answer.',
+)
+rejected_answers = registry.counter(  # pylint: disable=invalid-name
+    'vectordraw_check_answer_rejected',
+    'Answers submitted via check_answer that failed validation.',
+)
+rejected_queued_answers = registry.counter(  # pylint: disable=invalid-name
+    'vectordraw_grading_queue_rejected',
+    'Answers that could not be queued for grading because the grading queue was full.',
+)
+sandbox_failures = registry.counter(  # pylint: disable=invalid-name
+    'vectordraw_sandbox_failures',
+    'Answers that could not be graded because the sandbox timed out or failed.',
+)
@@ -0,0 +1,130 @@
+"""
+This module contains observers that collect data about checks evaluated by the grader.
+
+An observer is passed to `Grader` (or `GradingPlan`), and gets notified each time a check
+is evaluated, along with how long the check took and whether it passed. Without an observer,
+checks are not instrumented at all, so grading does not incur any overhead.
+"""
+
+import logging
+import random
+import threading
+
+
+class CheckObserver:
+    """
+    Base class for observers of checks evaluated by the grader.
+
+    Hooks do nothing by default, so subclasses only need to override the ones they use.
+    """
+
+    def check_evaluated(self, check_name, target, elapsed_ns, passed):
+        """
+        Record that check called `check_name` was evaluated.
+
+        `target` is the name of the vector or point targeted by the check (if any),
+        `elapsed_ns` is the time it took to evaluate the check in nanoseconds,
+        and `passed` indicates whether the check passed.
+        """
+
+
+class CheckHistogram(CheckObserver):
+    """
+    Aggregates timings and outcomes of checks in memory, per check name.
+
+    Timings are counted in buckets whose upper bounds (in nanoseconds) are listed in `bounds`.
+    """
+
+    # Powers of two from 256 ns to ~16.8 ms; slower checks are counted in an overflow bucket
+    DEFAULT_BOUNDS = tuple(2 ** exponent for exponent in range(8, 25))
+
+    def __init__(self, bounds=DEFAULT_BOUNDS):
+        self.bounds = tuple(bounds)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def check_evaluated(self, check_name, target, elapsed_ns, passed):
+        with self._lock:
+            stats = self._stats.get(check_name)
+            if stats is None:
+                stats = self._stats[check_name] = {
+                    'count': 0,
+                    'failed': 0,
+                    'total_ns': 0,
+                    'max_ns': 0,
+                    'buckets': [0] * (len(self.bounds) + 1),
+                }
+            stats['count'] += 1
+            stats['total_ns'] += elapsed_ns
+            stats['max_ns'] = max(stats['max_ns'], elapsed_ns)
+            if not passed:
+                stats['failed'] += 1
+            stats['buckets'][self._bucket(elapsed_ns)] += 1
+
+    def _bucket(self, elapsed_ns):
+        """
+        Return index of bucket that `elapsed_ns` falls into.
+        """
+        for index, bound in enumerate(self.bounds):
+            if elapsed_ns <= bound:
+                return index
+        return len(self.bounds)
+
+    def snapshot(self):
+        """
+        Return copy of statistics collected so far, keyed by check name.
+        """
+        with self._lock:
+            return {
+                check_name: dict(stats, buckets=list(stats['buckets']))
+                for check_name, stats in self._stats.items()
+            }
+
+    def clear(self):
+        """
+        Discard statistics collected so far.
+        """
+        with self._lock:
+            self._stats.clear()
+
+
+class LoggingCheckObserver(CheckObserver):
+    """
+    Logs a structured record for a random sample of evaluated checks.
+
+    Records are logged at DEBUG level, with details of the check attached to them
+    as the `vectordraw_check` attribute for the benefit of structured log handlers.
+    """
+
+    def __init__(self, logger=None, sample_rate=0.01, rng=random.random):
+        self.logger = logger or logging.getLogger(__name__)
+        self.sample_rate = sample_rate
+        self.rng = rng
+
+    def check_evaluated(self, check_name, target, elapsed_ns, passed):
+        if self.rng() >= self.sample_rate:
+            return
+        details = {
+            'check': check_name,
+            'target': target,
+            'elapsed_ns': elapsed_ns,
+            'passed': passed,
+        }
+        self.logger.debug(
+            'Evaluated check %(check)s for %(target)s in %(elapsed_ns)d ns (passed: %(passed)s)',
+            details,
+            extra={'vectordraw_check': details},
+        )
+
+
+class CompositeObserver(CheckObserver):
+    """
+    Forwards notifications about evaluated checks to multiple observers.
+    """
+
+    def __init__(self, *observers):
+        self.observers = observers
+
+    def check_evaluated(self, check_name, target, elapsed_ns, passed):
+        for observer in self.observers:
+            observer.check_evaluated(check_name, target, elapsed_ns, passed)
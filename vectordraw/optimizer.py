@@ -0,0 +1,282 @@
+"""
+This module contains an optimization pass that turns the checks of a grading plan
+into a shorter list of steps.
+
+Course authors often specify overlapping checks for the same vector, e.g. `coords` along with
+`tail`, `tip` and `segment_coords`, or the same check twice with different tolerances.
+The optimizer:
+
+- Drops checks that are implied by an earlier check. Such checks can only fail if the earlier check
+  fails, in which case grading stops at the earlier check anyway.
+- Fuses runs of consecutive checks for the same vector into a single step that looks up the vector
+  once, and tests each check with a predicate that has its expected value and tolerance bound.
+- Fuses long runs of consecutive relational checks into a single step that evaluates them
+  over arrays of components of the vectors they compare (see `vectordraw.relations`).
+
+Predicates perform the same floating point operations as the check functions
+from `vectordraw.grader`. Once a predicate fails, the plan runs the check functions from there on
+to produce the error message, so optimized plans report exactly the same results
+as running checks one by one.
+
+Implications only use facts that hold for any coordinates, including NaN: e.g. passing `tail`
+implies passing `tail_x` for finite coordinates only, so such checks are fused but not dropped.
+"""
+
+import math
+
+from . import grader, relations  # pylint: disable=cyclic-import
+
+
+# Implications
+#
+# Each built-in check guarantees some facts about the element it targets if it passes,
+# and is implied by earlier checks if they guarantee all facts that it requires.
+# Facts are (name, expected value) pairs, which hold up to a tolerance.
+
+def _frozen(value):
+    """
+    Return hashable version of JSON `value`.
+    """
+    if isinstance(value, list):
+        return tuple(_frozen(item) for item in value)
+    return value
+
+
+def _requirements(check, check_fn):
+    """
+    Return facts that `check` requires, mapped to the tolerance they need to hold to.
+    """
+    if check_fn in (grader.check_presence, grader.check_point_presence):
+        return {('presence', None): 0.0}
+    if check_fn is grader.check_points_on_line:
+        # Each point is tested on its own
+        return {('on_line', _frozen(point)): check['tolerance'] for point in check['expected']}
+    return {(check['check'], _frozen(check['expected'])): check['tolerance']}
+
+
+def _facts(check, check_fn):
+    """
+    Return facts that `check` guarantees if it passes, mapped to the tolerance they hold to.
+    """
+    facts = _requirements(check, check_fn)
+    # Checks can only pass if the element they target is present
+    facts[('presence', None)] = 0.0
+    expected, tolerance = _frozen(check.get('expected')), check.get('tolerance')
+    if check_fn is grader.check_coords:
+        # These checks start with the same computation as `coords`
+        facts[('segment_coords', expected)] = tolerance
+        for endpoint, coords in zip(('tail', 'tip'), expected):
+            if '_' not in coords:
+                facts[(endpoint, coords)] = tolerance
+    elif check_fn is grader.check_angle:
+        facts[('segment_angle', expected)] = tolerance
+    return facts
+
+
+def implied_checks(checks, check_functions):
+    """
+    Return indices of (compiled) `checks` that are implied by earlier checks.
+    """
+    implied = set()
+    known = {}
+    for index, (check, check_fn) in enumerate(zip(checks, check_functions)):
+        if check_fn not in grader.BUILTIN_CHECKS or check_fn in relations.RELATION_TESTS:
+            continue
+        target = ('vector', check['vector']) if 'vector' in check else ('point', check['point'])
+        facts = known.setdefault(target, {})
+        try:
+            requirements = _requirements(check, check_fn)
+            new_facts = _facts(check, check_fn)
+        except TypeError:
+            # Malformed expected value; leave it to the check function to deal with it
+            continue
+        if all(
+                fact in facts and facts[fact] <= tolerance
+                for fact, tolerance in requirements.items()
+        ):
+            implied.add(index)
+        for fact, tolerance in new_facts.items():
+            if fact not in facts or tolerance < facts[fact]:
+                facts[fact] = tolerance
+    return implied
+
+
+# Predicates
+#
+# Each predicate factory takes a (compiled) check, and returns a function that takes
+# the Vector that the check targets and returns True if the check passes.
+# Predicates may fail for checks that pass (e.g. comparisons with NaN values are False),
+# since the check functions then decide what actually happens, but never the other way around.
+
+def _presence_predicate(check):  # pylint: disable=unused-argument
+    return lambda vec: True
+
+
+def _tail_predicate(check):
+    (expected_x, expected_y), tolerance = check['expected'], check['tolerance']
+    # pylint: disable=protected-access
+    return lambda vec: (
+        grader._distance(expected_x - vec.tail.x, expected_y - vec.tail.y) <= tolerance
+    )
+
+
+def _tip_predicate(check):
+    (expected_x, expected_y), tolerance = check['expected'], check['tolerance']
+    # pylint: disable=protected-access
+    return lambda vec: (
+        grader._distance(expected_x - vec.tip.x, expected_y - vec.tip.y) <= tolerance
+    )
+
+
+def _coordinate_predicate(getter):
+    """
+    Return predicate factory for checking the coordinate of a vector that `getter` returns.
+    """
+    def factory(check):
+        expected, tolerance = check['expected'], check['tolerance']
+        return lambda vec: abs(expected - getter(vec)) <= tolerance
+    return factory
+
+
+def _coords_predicate(check):
+    expected, tolerance = check['expected'], check['tolerance']
+    # pylint: disable=protected-access
+    return lambda vec: grader._coords_within_tolerance(vec, expected, tolerance)
+
+
+def _segment_coords_predicate(check):
+    expected, tolerance = check['expected'], check['tolerance']
+    # pylint: disable=protected-access
+    return lambda vec: (
+        grader._coords_within_tolerance(vec, expected, tolerance) or
+        grader._coords_within_tolerance(vec, expected, tolerance, reverse=True)
+    )
+
+
+def _length_predicate(check):
+    expected, tolerance = check['expected'], check['tolerance']
+    return lambda vec: abs(vec.length - expected) <= tolerance
+
+
+def _angle_within_tolerance(check, segment):
+    """
+    Return predicate for `angle` check (or `segment_angle` check if `segment` is True).
+
+    Does the same computation as `grader._angle_within_tolerance`, but computes
+    the sine and cosine of the expected angle only once. For the opposite vector, the dot product
+    is negated; IEEE arithmetic gives exactly the same result as negating both coordinates.
+    """
+    expected, tolerance = math.radians(check['expected']), check['tolerance']
+    cos_expected, sin_expected = math.cos(expected), math.sin(expected)
+
+    def within_tolerance(cosine):
+        return abs(math.degrees(math.acos(max(-1.0, min(1.0, cosine))))) <= tolerance
+
+    def predicate(vec):
+        length = vec.length
+        if not length:
+            return False
+        dot_product = (
+            (vec.tip.x - vec.tail.x) * cos_expected + (vec.tip.y - vec.tail.y) * sin_expected
+        )
+        if within_tolerance(dot_product / length):
+            return True
+        return segment and within_tolerance(-dot_product / length)
+    return predicate
+
+
+def _angle_predicate(check):
+    return _angle_within_tolerance(check, segment=False)
+
+
+def _segment_angle_predicate(check):
+    return _angle_within_tolerance(check, segment=True)
+
+
+# Predicate factories for built-in check functions that can be fused;
+# `points_on_line` is left out, since it can be expensive enough to need the sandbox
+# (see `vectordraw.sandbox`), and point checks don't have a vector to share.
+PREDICATES = {
+    grader.check_presence: _presence_predicate,
+    grader.check_tail: _tail_predicate,
+    grader.check_tip: _tip_predicate,
+    grader.check_tail_x: _coordinate_predicate(lambda vec: vec.tail.x),
+    grader.check_tail_y: _coordinate_predicate(lambda vec: vec.tail.y),
+    grader.check_tip_x: _coordinate_predicate(lambda vec: vec.tip.x),
+    grader.check_tip_y: _coordinate_predicate(lambda vec: vec.tip.y),
+    grader.check_coords: _coords_predicate,
+    grader.check_segment_coords: _segment_coords_predicate,
+    grader.check_length: _length_predicate,
+    grader.check_angle: _angle_predicate,
+    grader.check_segment_angle: _segment_angle_predicate,
+}
+
+
+def _fuse(name, predicates):
+    """
+    Return fused step that tests checks for vector `name` with `predicates`.
+
+    The step returns the position of the first check that might fail, or None if all of them pass.
+    """
+    tests = tuple(enumerate(predicates))
+
+    def fused_step(vectors, points):  # pylint: disable=unused-argument
+        vec = vectors.get(name)
+        if vec is None:
+            return 0
+        for position, test in tests:
+            if not test(vec):
+                return position
+        return None
+    return fused_step
+
+
+def optimize(checks, check_functions):
+    """
+    Return schedule for evaluating (compiled) `checks` with `check_functions`.
+
+    The schedule is a list of (fused step, indices of checks) pairs. Fused steps test all checks
+    at the given indices at once (see `_fuse`). If there is no fused step, the check
+    at the given index needs to be evaluated on its own. Checks that are implied by earlier checks
+    are left out.
+    """
+    implied = implied_checks(checks, check_functions)
+    schedule = []
+    run = []
+
+    def end_run():
+        if run and check_functions[run[0]] in relations.RELATION_TESTS:
+            fused_step = relations.fuse(
+                [checks[index] for index in run], [check_functions[index] for index in run]
+            )
+            if fused_step is not None:
+                schedule.append((fused_step, tuple(run)))
+            else:
+                schedule.extend((None, (index,)) for index in run)
+        elif len(run) > 1:
+            name = checks[run[0]]['vector']
+            predicates = [PREDICATES[check_functions[index]](checks[index]) for index in run]
+            schedule.append((_fuse(name, predicates), tuple(run)))
+        elif run:
+            schedule.append((None, tuple(run)))
+        run.clear()
+
+    def run_key(index):
+        # Relational checks can be fused with each other, other checks only with checks
+        # for the same vector
+        if check_functions[index] in relations.RELATION_TESTS:
+            return None
+        return checks[index]['vector']
+
+    for index, check_fn in enumerate(check_functions):
+        if index in implied:
+            continue
+        if check_fn not in PREDICATES and check_fn not in relations.RELATION_TESTS:
+            end_run()
+            schedule.append((None, (index,)))
+            continue
+        if run and run_key(run[0]) != run_key(index):
+            end_run()
+        run.append(index)
+    end_run()
+    return schedule
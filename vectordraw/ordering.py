@@ -0,0 +1,95 @@
+"""
+This module contains logic for learning the order in which to evaluate checks of a grading plan
+so that wrong answers are rejected as cheaply as possible.
+
+Error messages need to be the ones that the first failing check in the author's order produces,
+so full results can't be obtained any faster than by evaluating checks in the author's order:
+all checks before the first one that fails need to be evaluated either way, and nothing else is.
+However, callers that only need to know whether answers are correct (see `GradingPlan.is_correct`)
+can stop at any failing check. For them, `CheckOrdering` records how often each check fails
+and how long it takes, and orders checks by their expected cost per rejection: evaluating
+independent checks in order of increasing cost / failure rate minimizes the expected cost
+of finding a failing check.
+
+Orderings are deterministic: they only depend on the statistics that have been recorded,
+and ties are broken by the author's order. Until enough answers have been sampled,
+checks are evaluated in the author's order.
+"""
+
+import threading
+
+
+class CheckOrdering:
+    """
+    Learns the order in which to evaluate the checks at `indices` of a grading plan.
+
+    Timings are only recorded for every `sample_every`-th answer (see `should_sample`),
+    to keep the cost of measuring down. The order is recomputed after every `refresh`
+    sampled answers, once at least `min_samples` answers have been sampled.
+    """
+
+    def __init__(self, indices, sample_every=8, min_samples=32, refresh=64):
+        self.indices = tuple(indices)
+        self.sample_every = sample_every
+        self.min_samples = min_samples
+        self.refresh = refresh
+        self.order = self.indices
+        self.evaluated = dict.fromkeys(self.indices, 0)
+        self.failed = dict.fromkeys(self.indices, 0)
+        self.total_ns = dict.fromkeys(self.indices, 0)
+        self._answers = 0
+        self._samples = 0
+        self._lock = threading.Lock()
+
+    def should_sample(self):
+        """
+        Return True if evaluation of the next answer should be recorded.
+        """
+        with self._lock:
+            self._answers += 1
+            return self._answers % self.sample_every == 0
+
+    def record(self, evaluations):
+        """
+        Record (index, elapsed_ns, passed) `evaluations` of checks for a sampled answer,
+        and update the order if it's time to do so.
+        """
+        with self._lock:
+            for index, elapsed_ns, passed in evaluations:
+                self.evaluated[index] += 1
+                self.total_ns[index] += elapsed_ns
+                if not passed:
+                    self.failed[index] += 1
+            self._samples += 1
+            if self._samples >= self.min_samples and self._samples % self.refresh == 0:
+                self.order = tuple(sorted(self.indices, key=self._rank))
+
+    def _rank(self, index):
+        """
+        Return key for sorting check at `index` by expected cost per rejection.
+
+        Checks that have never been evaluated are assumed to be of average cost,
+        and failure rates are smoothed so that checks that never failed so far still get a rank.
+        """
+        evaluated = self.evaluated[index]
+        if evaluated:
+            cost = self.total_ns[index] / evaluated
+        else:
+            total = sum(self.evaluated.values())
+            cost = sum(self.total_ns.values()) / total if total else 1.0
+        failure_rate = (self.failed[index] + 1) / (evaluated + 2)
+        return cost / failure_rate, index
+
+    def snapshot(self):
+        """
+        Return copy of statistics collected so far, keyed by check index.
+        """
+        with self._lock:
+            return {
+                index: {
+                    'evaluated': self.evaluated[index],
+                    'failed': self.failed[index],
+                    'total_ns': self.total_ns[index],
+                }
+                for index in self.indices
+            }
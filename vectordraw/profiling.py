@@ -0,0 +1,219 @@
+"""
+This module contains an on-demand sampling profiler for the handlers and views of the XBlock.
+
+Profiling is disabled by default. It is configured via the following environment variables,
+which are read when this module is first imported:
+
+- VECTORDRAW_PROFILE_RATE: Fraction of calls to profile (e.g. 0.01 for 1% of calls).
+- VECTORDRAW_PROFILE_DIR: Directory to write profiles to
+  (default: a `vectordraw-profiles` directory in the system's temporary directory).
+- VECTORDRAW_PROFILE_MEMORY: If set to 1, also trace memory allocations during profiled calls.
+- VECTORDRAW_PROFILE_CALLS: Number of profiled calls to aggregate per file (default: 50).
+- VECTORDRAW_PROFILE_KEEP: Number of files to keep per view and kind of profile (default: 20).
+
+Profiles of calls to the same view are aggregated, and written out once enough calls
+have been profiled. CPU profiles are written in the pstats format (`<view>-<pid>-<time>.prof`)
+and can be inspected with `python -m pstats` or tools like snakeviz. Memory profiles
+(`<view>-<pid>-<time>.memory.txt`) list source lines that allocated the most memory
+during profiled calls. Older files are removed once there are more than the configured number.
+
+Only one call is profiled at a time per process: Python only allows a single active
+cProfile profiler, so calls that are picked for sampling while another call is being profiled
+are not profiled. Memory is traced process-wide, so memory profiles also include allocations
+made by other threads during profiled calls.
+"""
+
+import atexit
+import cProfile
+import contextlib
+import functools
+import glob
+import logging
+import os
+import pstats
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+# Number of source lines to list in memory profiles
+MEMORY_TOP_LINES = 50
+
+
+class Profiler:
+    """
+    Profiles a random sample of calls, aggregating profiles per view.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self, directory, *, rate=0.0, memory=False, calls_per_dump=50, keep=20, rng=random.random
+    ):
+        self.directory = directory
+        self.rate = rate
+        self.memory = memory
+        self.calls_per_dump = calls_per_dump
+        self.keep = keep
+        self.rng = rng
+        self._stats = {}
+        self._allocations = {}
+        self._calls = Counter()
+        self._started_tracing = False
+        self._lock = threading.Lock()
+        # Held while a call is being profiled
+        self._sampling = threading.Lock()
+
+    @classmethod
+    def from_environ(cls, environ=None):
+        """
+        Return profiler configured via VECTORDRAW_PROFILE_* variables from `environ`.
+        """
+        environ = os.environ if environ is None else environ
+        return cls(
+            directory=environ.get(
+                'VECTORDRAW_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'vectordraw-profiles')
+            ),
+            rate=float(environ.get('VECTORDRAW_PROFILE_RATE', 0)),
+            memory=environ.get('VECTORDRAW_PROFILE_MEMORY') == '1',
+            calls_per_dump=int(environ.get('VECTORDRAW_PROFILE_CALLS', 50)),
+            keep=int(environ.get('VECTORDRAW_PROFILE_KEEP', 20)),
+        )
+
+    @contextlib.contextmanager
+    def sample(self, name):
+        """
+        Return context manager that profiles its body if it is picked for sampling.
+
+        Profiles are aggregated under `name`. Calls are not profiled
+        while another call is being profiled, or if another profiler is active.
+        """
+        if not self.rate or self.rng() >= self.rate or not self._sampling.acquire(blocking=False):
+            yield
+            return
+        try:
+            profile = cProfile.Profile()
+            before = self._start_tracing() if self.memory else None
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is active (e.g. one that a developer started)
+                profile = None
+            if profile is None:
+                if self.memory:
+                    self._stop_tracing(before)
+                yield
+                return
+            try:
+                yield
+            finally:
+                profile.disable()
+                allocations = self._stop_tracing(before) if self.memory else None
+                self._record(name, profile, allocations)
+        finally:
+            self._sampling.release()
+
+    def _start_tracing(self):
+        """
+        Start tracing memory allocations, and return snapshot of current allocations.
+
+        Must be called with the sampling lock held.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return tracemalloc.take_snapshot()
+
+    def _stop_tracing(self, before):
+        """
+        Return sizes of memory allocated per source line since `before` snapshot was taken.
+
+        Must be called with the sampling lock held. Tracing is only stopped if it was started
+        by `_start_tracing`, not if someone else is tracing memory allocations.
+        """
+        after = tracemalloc.take_snapshot()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return Counter({
+            str(stat.traceback): stat.size_diff
+            for stat in after.compare_to(before, 'lineno') if stat.size_diff > 0
+        })
+
+    def _record(self, name, profile, allocations):
+        """
+        Add `profile` and `allocations` of a call to aggregated profiles for `name`.
+        """
+        with self._lock:
+            if name in self._stats:
+                self._stats[name].add(profile)
+            else:
+                self._stats[name] = pstats.Stats(profile)
+            if allocations is not None:
+                self._allocations.setdefault(name, Counter()).update(allocations)
+            self._calls[name] += 1
+            if self._calls[name] >= self.calls_per_dump:
+                self._dump(name)
+
+    def flush(self):
+        """
+        Write out aggregated profiles for all views.
+        """
+        with self._lock:
+            for name in list(self._stats):
+                self._dump(name)
+
+    def _dump(self, name):
+        """
+        Write out aggregated profiles for `name`, and remove outdated files.
+
+        Must be called with the lock held.
+        """
+        stats = self._stats.pop(name)
+        allocations = self._allocations.pop(name, None)
+        calls = self._calls.pop(name)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            prefix = os.path.join(self.directory, f'{name}-{os.getpid()}-{time.time():.0f}')
+            stats.dump_stats(prefix + '.prof')
+            if allocations is not None:
+                with open(prefix + '.memory.txt', 'w', encoding='utf-8') as memory_file:
+                    memory_file.write(f'# Memory allocated during {calls} calls to {name}\n')
+                    for line, size in allocations.most_common(MEMORY_TOP_LINES):
+                        memory_file.write(f'{size:>12} B  {line}\n')
+            self._rotate(name)
+        except OSError:
+            log.exception('Could not write profiles for %s to %s', name, self.directory)
+
+    def _rotate(self, name):
+        """
+        Remove oldest profiles for `name` if there are more than `keep` of them.
+        """
+        for suffix in ('.prof', '.memory.txt'):
+            paths = sorted(
+                glob.glob(os.path.join(glob.escape(self.directory), f'{name}-*{suffix}')),
+                key=os.path.getmtime
+            )
+            for path in paths[:-self.keep]:
+                os.remove(path)
+
+
+def profiled(name):
+    """
+    Return decorator that samples calls of the decorated function for profiling under `name`.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profiler.sample(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Profiler used by the XBlock, configured via environment variables
+profiler = Profiler.from_environ()  # pylint: disable=invalid-name
+if profiler.rate:
+    atexit.register(profiler.flush)
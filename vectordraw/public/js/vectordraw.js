@@ -9,6 +9,7 @@ function VectorDrawXBlock(runtime, element, init_args) {
         this.dragged_vector = null;
         this.drawMode = false;
         this.history_stack = {undo: [], redo: []};
+        this.changeHandlers = [];
         this.settings = settings;
         this.element = $('#' + element_id, element);
 
@@ -266,6 +267,7 @@ function VectorDrawXBlock(runtime, element, init_args) {
         }
         // Enable option corresponding to selected element in menu for selecting element to edit
         this.enableEditOption(selected);
+        this.notifyChange();
     };
 
     VectorDraw.prototype.reset = function() {
@@ -273,6 +275,19 @@ function VectorDrawXBlock(runtime, element, init_args) {
         JXG.JSXGraph.freeBoard(this.board);
         this.resetVectorProperties();
         this.render();
+        this.notifyChange();
+    };
+
+    VectorDraw.prototype.onChange = function(handler) {
+        // Call `handler` with the state of the board whenever the student changes it.
+        this.changeHandlers.push(handler);
+    };
+
+    VectorDraw.prototype.notifyChange = function() {
+        if (this.changeHandlers.length) {
+            var state = this.getState();
+            _.each(this.changeHandlers, function(handler) { handler(state); });
+        }
     };
 
     VectorDraw.prototype.pushHistory = function() {
@@ -500,6 +515,9 @@ function VectorDrawXBlock(runtime, element, init_args) {
         if (this.dragged_vector) {
             this.updateVectorProperties(this.dragged_vector);
         }
+        if (this.dragged_vector || this.board.mode === this.board.BOARD_MODE_DRAG) {
+            this.notifyChange();
+        }
     };
 
     VectorDraw.prototype.onBoardUp = function(evt) {
@@ -509,6 +527,7 @@ function VectorDrawXBlock(runtime, element, init_args) {
             this.dragged_vector.point1.setProperty({fixed: true});
         }
         this.dragged_vector = null;
+        this.notifyChange();
     };
 
     VectorDraw.prototype.onEditStart = function(evt) {
@@ -545,6 +564,7 @@ function VectorDrawXBlock(runtime, element, init_args) {
             board_object.point1.setPosition(JXG.COORDS_BY_USER, newTail);
             board_object.point2.setPosition(JXG.COORDS_BY_USER, newTip);
             this.board.update();
+            this.notifyChange();
         } else {
             $('.vector-prop-update .update-error', element).show();
         }
@@ -595,54 +615,36 @@ function VectorDrawXBlock(runtime, element, init_args) {
             }
         }, this);
         this.board.update();
+        this.notifyChange();
     };
 
     // Logic for checking answers
 
     var checkHandlerUrl = runtime.handlerUrl(element, 'check_answer');
 
-    var checkXHR;
+    var statusHandlerUrl = runtime.handlerUrl(element, 'grading_status');
 
-    function getInput(vectordraw) {
-        var input = vectordraw.getState();
+    // Number of milliseconds to wait before asking the server again for results of queued answers
+    var statusPollInterval = 1000;
 
-        // Transform the expected_result setting into a list of checks.
-        var checks = [];
+    var checkXHR, pollTimer;
 
-        _.each(vectordraw.settings.expected_result, function(answer, name) {
-            var presence_check = {vector: name, check: 'presence'};
-            if ('presence_errmsg' in answer) {
-                presence_check.errmsg = answer.presence_errmsg;
-            }
-            checks.push(presence_check);
-
-            var properties = [
-                'tail', 'tail_x', 'tail_y', 'tip', 'tip_x', 'tip_y', 'coords',
-                'length', 'angle', 'segment_angle', 'segment_coords', 'points_on_line'
-            ];
-            _.each(properties, function(prop) {
-                if (prop in answer) {
-                    var check = {vector: name, check: prop, expected: answer[prop]};
-                    if (prop + '_tolerance' in answer) {
-                        check.tolerance = answer[prop + '_tolerance'];
-                    }
-                    if (prop + '_errmsg' in answer) {
-                        check.errmsg = answer[prop + '_errmsg'];
-                    }
-                    checks.push(check);
-                }
-            });
-        });
-
-        input.checks = checks;
-
-        return input;
+    function getInput(vectordraw) {
+        // Checks to perform are derived from the expected result on the server,
+        // so all we need to submit is the current state of the board.
+        return vectordraw.getState();
     }
 
     function updateStatus(data) {
         var correctness = $('.correctness', element),
             correctClass = 'checkmark-correct fa fa-check',
             incorrectClass = 'checkmark-incorrect fa fa-times';
+        if (!data.result) {
+            // Answer is still being graded
+            correctness.removeClass(correctClass + ' ' + incorrectClass);
+            $('.status-message', element).text('Your answer is being graded...');
+            return;
+        }
         if (data.result.correct) {
             correctness.removeClass(incorrectClass);
             correctness.addClass(correctClass);
@@ -650,16 +652,119 @@ function VectorDrawXBlock(runtime, element, init_args) {
             correctness.removeClass(correctClass);
             correctness.addClass(incorrectClass);
         }
-        $('.status-message', element).text(data.result.msg);
+        $('.status-message', element).text(data.result.msg + describeAssignment(data.result.assignment));
+    }
+
+    function describeAssignment(assignment) {
+        // Vectors whose labels were ignored for grading, e.g. " (Graded F1 as F2.)"
+        var regraded = _.filter(_.keys(assignment || {}).sort(), function(label) {
+            return assignment[label] !== label;
+        });
+        if (!regraded.length) {
+            return '';
+        }
+        return ' (Graded ' + _.map(regraded, function(label) {
+            return label + ' as ' + assignment[label];
+        }).join(', ') + '.)';
     }
 
     function checkAnswer(vectordraw) {
         if (checkXHR) {
             checkXHR.abort();
         }
+        window.clearTimeout(pollTimer);
         var state = getInput(vectordraw);
         checkXHR = $.post(checkHandlerUrl, JSON.stringify(state))
-            .success(updateStatus);
+            .success(handleResult);
+    }
+
+    function handleResult(data) {
+        updateStatus(data);
+        if (data.status === 'pending') {
+            pollTimer = window.setTimeout(function() { pollStatus(data.ticket); }, statusPollInterval);
+        }
+    }
+
+    function pollStatus(ticket) {
+        // The server responds right away, so ask again after a while if the answer is still pending.
+        checkXHR = $.post(statusHandlerUrl, JSON.stringify({ticket: ticket}))
+            .success(handleResult);
+    }
+
+    // Logic for instant feedback
+
+    // Number of milliseconds that the board must stay unchanged before answers are checked in the page
+    var instantFeedbackDelay = 150;
+
+    // Checks answers while the student draws, using the same checks as the server
+    // (see vectordraw_grader.js), and passes results to `callback`. Answers are checked
+    // in a Web Worker if possible, so that checking them doesn't slow down dragging;
+    // while the worker is busy, only the most recent state of the board is kept for checking next.
+    // Without a worker, answers are only checked once the board stops changing for a moment.
+    var InstantFeedback = function(checks, graderUrl, callback) {
+        this.checks = checks;
+        this.callback = callback;
+        this.checkInPage = _.debounce(this.checkInPage.bind(this), instantFeedbackDelay);
+        this.busy = false;
+        this.next = null;
+        this.worker = null;
+        if (window.Worker && graderUrl) {
+            try {
+                this.worker = new Worker(graderUrl);
+                this.worker.onmessage = this.onResult.bind(this);
+                this.worker.onerror = this.onError.bind(this);
+            } catch (e) {
+                // E.g. because the grader is served from a different origin
+                this.worker = null;
+            }
+        }
+    };
+
+    InstantFeedback.prototype.check = function(answer) {
+        if (!this.worker) {
+            this.checkInPage(answer);
+        } else if (this.busy) {
+            this.next = answer;
+        } else {
+            this.busy = true;
+            this.worker.postMessage({checks: this.checks, answer: answer});
+        }
+    };
+
+    InstantFeedback.prototype.checkInPage = function(answer) {
+        this.callback(VectorDrawGrader.grade(this.checks, answer));
+    };
+
+    InstantFeedback.prototype.onResult = function(evt) {
+        this.busy = false;
+        this.callback(evt.data.result);
+        this.checkNext();
+    };
+
+    InstantFeedback.prototype.onError = function(evt) {
+        // Fall back on checking answers in the page if the worker fails
+        evt.preventDefault();
+        this.worker.terminate();
+        this.worker = null;
+        this.busy = false;
+        this.checkNext();
+    };
+
+    InstantFeedback.prototype.checkNext = function() {
+        if (this.next) {
+            var answer = this.next;
+            this.next = null;
+            this.check(answer);
+        }
+    };
+
+    function showInstantFeedback(result) {
+        // Answers that pass all checks that can run in the browser still need to be graded
+        // by the server, which also evaluates custom checks.
+        updateStatus({result: {
+            correct: result.correct,
+            msg: result.correct ? 'Your answer looks correct. Click "Check" to submit it.' : result.msg
+        }});
     }
 
     // Initialization logic
@@ -674,6 +779,16 @@ function VectorDrawXBlock(runtime, element, init_args) {
         if (!_.isEmpty(init_args.user_state)) {
             vectordraw.setState(init_args.user_state);
             updateStatus(init_args.user_state);
+            if (init_args.user_state.pending) {
+                pollStatus(init_args.user_state.pending);
+            }
+        }
+
+        if (init_args.settings.instant_feedback_checks) {
+            var instantFeedback = new InstantFeedback(
+                init_args.settings.instant_feedback_checks, init_args.grader_url, showInstantFeedback
+            );
+            vectordraw.onChange(instantFeedback.check.bind(instantFeedback));
         }
 
         // Set up click handlers
@@ -33,10 +33,12 @@ function VectorDrawXBlockEdit(runtime, element, init_args) {
         // (without making necessary adjustments in "Expected results" field)
         // discard stale information about expected positions and checks
         var vectorData = JSON.parse(fieldEditor.getContents('vectors')),
-            vectorNames = this.getVectorNames(vectorData);
+            vectorNames = this.getVectorNames(vectorData),
+            pointNames = _.pluck(JSON.parse(fieldEditor.getContents('points')), 'name');
         var isStale = function(key) { return !_.contains(vectorNames, key); };
+        var isStaleResult = function(key) { return isStale(key) && !_.contains(pointNames, key); };
         this.settings.expected_result_positions = _.omit(this.settings.expected_result_positions, isStale);
-        this.settings.expected_result = _.omit(this.settings.expected_result, isStale);
+        this.settings.expected_result = _.omit(this.settings.expected_result, isStaleResult);
     };
 
     VectorDraw.prototype.render = function() {
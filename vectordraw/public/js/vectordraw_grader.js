@@ -0,0 +1,348 @@
+/* Grading logic for Vector Drawing exercises, for giving instant feedback in the browser.
+ *
+ * This is a port of the built-in checks from vectordraw/grader.py, and must give the same results
+ * (including error messages) for the same checks and answers. Both implementations are tested
+ * against the cases in tests/conformance/grader_cases.json, so changes to the semantics
+ * of a check need to be made in both places, along with a case that covers them.
+ *
+ * Lengths and distances are computed with the same floating point operations on both sides,
+ * so they are exactly the same. Angles depend on each platform's trigonometric functions,
+ * which can differ in the last bit; answers that are within a few ulps of an angle tolerance
+ * may be judged differently, and unformatted angles in messages ("{angle}") may differ
+ * in their last digit. The server's result is the one that counts.
+ *
+ * The script can be loaded in a page (where it defines `VectorDrawGrader`),
+ * as a Web Worker (where it grades answers posted to it), or as a Node module.
+ */
+(function(root) {
+    'use strict';
+
+    var DEFAULT_TOLERANCES = {
+        tail: 1.0,
+        tip: 1.0,
+        tail_x: 1.0,
+        tail_y: 1.0,
+        tip_x: 1.0,
+        tip_y: 1.0,
+        coords: 1.0,
+        segment_coords: 1.0,
+        length: 1.0,
+        angle: 2.0,
+        segment_angle: 2.0,
+        points_on_line: 1.0,
+        point_coords: 1.0
+    };
+
+    function CheckFailed(message) {
+        this.message = message;
+    }
+
+    // Vectors and points
+
+    function Vector(name, tail, tip) {
+        this.name = name;
+        this.tail = {x: tail[0], y: tail[1]};
+        this.tip = {x: tip[0], y: tip[1]};
+        this.length = hypot(this.tip.x - this.tail.x, this.tip.y - this.tail.y);
+        var angle = degrees(Math.atan2(this.tip.y - this.tail.y, this.tip.x - this.tail.x));
+        this.angle = angle < 0 ? angle + 360 : angle;
+    }
+
+    // Same operations as `_distance` from grader.py (neither Math.hypot nor Python's math.hypot
+    // round the same way as the other), to get exactly the same lengths and distances
+    function hypot(x, y) {
+        return Math.sqrt(x * x + y * y);
+    }
+
+    // Same operations as Python's math.degrees and math.radians, to get the same rounding errors
+    function degrees(radians) {
+        return radians * (180 / Math.PI);
+    }
+
+    function radians(degrees) {
+        return degrees * (Math.PI / 180);
+    }
+
+    // Error messages
+
+    // Formats a number like Python's str() does for floats: with the same (shortest) digits,
+    // but using exponent notation for magnitudes below 1e-4 and from 1e16, e.g. "1.5e-05"
+    function formatFloat(value) {
+        if (!isFinite(value)) {
+            return isNaN(value) ? 'nan' : (value > 0 ? 'inf' : '-inf');
+        }
+        var magnitude = Math.abs(value);
+        if (magnitude !== 0 && (magnitude < 1e-4 || magnitude >= 1e16)) {
+            var parts = value.toExponential().split('e'),
+                exponent = Math.abs(Number(parts[1]));
+            return parts[0] + 'e' + (parts[1][0] === '-' ? '-' : '+') + (exponent < 10 ? '0' : '') + exponent;
+        }
+        if (Number.isInteger(value)) {
+            return (Object.is(value, -0) ? '-' : '') + value.toFixed(1);
+        }
+        return String(value);
+    }
+
+    // Formats a number like Python's str() does for numbers from answers. JSON.stringify() writes
+    // integral numbers without a fraction, so the server gets them as ints and all others as floats.
+    function formatNumber(value) {
+        return Number.isInteger(value) ? String(value) : formatFloat(value);
+    }
+
+    // Formats a number with `digits` digits after the point, like Python's format(value, '.2f').
+    // Both round the exact value of the number, but toFixed() rounds ties (e.g. 2.25 to one digit)
+    // away from zero, while Python rounds them to even.
+    function formatFixed(value, digits) {
+        var magnitude = Math.abs(value),
+            fixed = magnitude.toFixed(digits),
+            // The exact value is a tie iff it is an odd multiple of 2^-(digits + 1)
+            scaled = magnitude * Math.pow(2, digits + 1);
+        if (Number.isInteger(scaled) && scaled % 2 === 1 && Number(fixed[fixed.length - 1]) % 2 === 1) {
+            // Round down instead; ties have exactly one more digit, which is a 5
+            fixed = magnitude.toFixed(digits + 1).slice(0, digits ? -1 : -2);
+        }
+        return (value < 0 || Object.is(value, -0) ? '-' : '') + fixed;
+    }
+
+    // Supports the subset of Python's format string syntax that error messages use:
+    // plain replacement fields ("{name}") and fixed point formats ("{length:.1f}").
+    // Numbers listed in `floatFields` are floats in Python, so they are formatted like floats.
+    function formatMessage(template, fields, floatFields) {
+        return template.replace(/\{(\w+)(?::\.(\d+)f)?\}/g, function(match, field, precision) {
+            if (!(field in fields)) {
+                return match;
+            }
+            var value = fields[field];
+            if (typeof value !== 'number') {
+                return String(value);
+            }
+            if (precision !== undefined) {
+                return formatFixed(value, Number(precision));
+            }
+            if (floatFields && floatFields.indexOf(field) !== -1) {
+                return formatFloat(value);
+            }
+            return formatNumber(value);
+        });
+    }
+
+    // Like Python's check.get('errmsg', defaultMessage), so that empty messages are kept
+    function errorTemplate(check, defaultMessage) {
+        return 'errmsg' in check ? check.errmsg : defaultMessage;
+    }
+
+    function vectorError(defaultMessage, check, vec) {
+        return new CheckFailed(formatMessage(errorTemplate(check, defaultMessage), {
+            name: vec.name,
+            tail_x: vec.tail.x,
+            tail_y: vec.tail.y,
+            tip_x: vec.tip.x,
+            tip_y: vec.tip.y,
+            length: vec.length,
+            angle: vec.angle
+        }, ['length', 'angle']));
+    }
+
+    // Check functions
+
+    function tolerance(check) {
+        return check.tolerance === undefined ? DEFAULT_TOLERANCES[check.check] : check.tolerance;
+    }
+
+    function checkPresence(check, vectors) {
+        if (!(check.vector in vectors)) {
+            throw new CheckFailed(formatMessage(
+                errorTemplate(check, 'You need to use the {name} vector.'), {name: check.vector}
+            ));
+        }
+    }
+
+    function checkEndpoint(endpoint) {
+        var verb = endpoint === 'tail' ? 'start' : 'end';
+        return function(check, vectors) {
+            var vec = vectors[check.vector];
+            var dist = hypot(check.expected[0] - vec[endpoint].x, check.expected[1] - vec[endpoint].y);
+            if (dist > tolerance(check)) {
+                throw vectorError('Vector {name} does not ' + verb + ' at correct point.', check, vec);
+            }
+        };
+    }
+
+    function checkCoordinate(endpoint, axis) {
+        var verb = endpoint === 'tail' ? 'start' : 'end';
+        return function(check, vectors) {
+            var vec = vectors[check.vector];
+            if (Math.abs(check.expected - vec[endpoint][axis]) > tolerance(check)) {
+                throw vectorError('Vector {name} does not ' + verb + ' at correct point.', check, vec);
+            }
+        };
+    }
+
+    function coordDelta(expected, actual) {
+        return expected === '_' ? 0 : expected - actual;
+    }
+
+    function coordsWithinTolerance(vec, expected, tolerance, reverse) {
+        var ends = reverse ? [vec.tip, vec.tail] : [vec.tail, vec.tip];
+        for (var i = 0; i < 2; i++) {
+            var deltaX = coordDelta(expected[i][0], ends[i].x),
+                deltaY = coordDelta(expected[i][1], ends[i].y);
+            if (hypot(deltaX, deltaY) > tolerance) {
+                return false;
+            }
+        }
+        return true;
+    }
+
+    function checkCoords(check, vectors) {
+        var vec = vectors[check.vector];
+        if (!coordsWithinTolerance(vec, check.expected, tolerance(check))) {
+            throw vectorError('Vector {name} coordinates are not correct.', check, vec);
+        }
+    }
+
+    function checkSegmentCoords(check, vectors) {
+        var vec = vectors[check.vector];
+        if (!(coordsWithinTolerance(vec, check.expected, tolerance(check)) ||
+              coordsWithinTolerance(vec, check.expected, tolerance(check), true))) {
+            throw vectorError('Segment {name} coordinates are not correct.', check, vec);
+        }
+    }
+
+    function checkLength(check, vectors) {
+        var vec = vectors[check.vector];
+        if (Math.abs(vec.length - check.expected) > tolerance(check)) {
+            throw vectorError('The length of {name} is incorrect. Your length: {length:.1f}', check, vec);
+        }
+    }
+
+    function angleWithinTolerance(vec, expected, tolerance, reverse) {
+        // Vectors without length don't have an angle
+        if (!vec.length) {
+            return false;
+        }
+        var x = vec.tip.x - vec.tail.x,
+            y = vec.tip.y - vec.tail.y;
+        if (reverse) {
+            x = -x;
+            y = -y;
+        }
+        var dotProduct = x * Math.cos(expected) + y * Math.sin(expected);
+        // Rounding errors can push the cosine slightly outside of the domain of acos
+        var cosine = Math.max(-1.0, Math.min(1.0, dotProduct / vec.length));
+        return Math.abs(degrees(Math.acos(cosine))) <= tolerance;
+    }
+
+    function checkAngle(check, vectors) {
+        var vec = vectors[check.vector];
+        if (!angleWithinTolerance(vec, radians(check.expected), tolerance(check))) {
+            throw vectorError('The angle of {name} is incorrect. Your angle: {angle:.1f}', check, vec);
+        }
+    }
+
+    function checkSegmentAngle(check, vectors) {
+        // Segments are not directed, so check the angle of the opposite vector as well
+        var vec = vectors[check.vector],
+            expected = radians(check.expected);
+        if (!(angleWithinTolerance(vec, expected, tolerance(check)) ||
+              angleWithinTolerance(vec, expected, tolerance(check), true))) {
+            throw vectorError('The angle of {name} is incorrect. Your angle: {angle:.1f}', check, vec);
+        }
+    }
+
+    function distLinePoint(line, point) {
+        if (!line.length) {
+            return hypot(point[0] - line.tail.x, point[1] - line.tail.y);
+        }
+        var directionX = line.tip.x - line.tail.x,
+            directionY = line.tip.y - line.tail.y;
+        var determinant = (point[0] - line.tail.x) * directionY - (point[1] - line.tail.y) * directionX;
+        return Math.abs(determinant) / line.length;
+    }
+
+    function checkPointsOnLine(check, vectors) {
+        var line = vectors[check.vector];
+        for (var i = 0; i < check.expected.length; i++) {
+            if (distLinePoint(line, check.expected[i]) > tolerance(check)) {
+                throw vectorError('The line {name} does not pass through the correct points.', check, line);
+            }
+        }
+    }
+
+    function checkPointPresence(check, vectors, points) {
+        if (!(check.point in points)) {
+            throw new CheckFailed(formatMessage(
+                errorTemplate(check, 'You need to use the {name} point.'), {name: check.point}
+            ));
+        }
+    }
+
+    function checkPointCoords(check, vectors, points) {
+        var point = points[check.point];
+        var dist = hypot(check.expected[0] - point[0], check.expected[1] - point[1]);
+        if (dist > tolerance(check)) {
+            throw new CheckFailed(formatMessage(
+                errorTemplate(check, 'Point {name} is not at the correct location.'),
+                {name: check.point, x: point[0], y: point[1]}
+            ));
+        }
+    }
+
+    var CHECKS = {
+        presence: checkPresence,
+        tail: checkEndpoint('tail'),
+        tip: checkEndpoint('tip'),
+        tail_x: checkCoordinate('tail', 'x'),
+        tail_y: checkCoordinate('tail', 'y'),
+        tip_x: checkCoordinate('tip', 'x'),
+        tip_y: checkCoordinate('tip', 'y'),
+        coords: checkCoords,
+        length: checkLength,
+        angle: checkAngle,
+        segment_angle: checkSegmentAngle,
+        segment_coords: checkSegmentCoords,
+        points_on_line: checkPointsOnLine,
+        point_presence: checkPointPresence,
+        point_coords: checkPointCoords
+    };
+
+    // Grades `answer` (vectors and points as returned by `VectorDraw.getState`) by running `checks`
+    // one by one, and returns the result of the first check that fails (or success).
+    // Checks that are not built-in are skipped; they can only be evaluated by the server.
+    function grade(checks, answer, successMessage) {
+        var vectors = {};
+        Object.keys(answer.vectors).forEach(function(name) {
+            vectors[name] = new Vector(name, answer.vectors[name].tail, answer.vectors[name].tip);
+        });
+        for (var i = 0; i < checks.length; i++) {
+            var checkFn = CHECKS[checks[i].check];
+            if (!checkFn) {
+                continue;
+            }
+            try {
+                checkFn(checks[i], vectors, answer.points);
+            } catch (error) {
+                if (error instanceof CheckFailed) {
+                    return {correct: false, msg: error.message};
+                }
+                throw error;
+            }
+        }
+        return {correct: true, msg: successMessage || 'Test passed'};
+    }
+
+    var VectorDrawGrader = {grade: grade, checks: CHECKS};
+
+    if (typeof module === 'object' && module.exports) {
+        module.exports = VectorDrawGrader;
+    } else {
+        root.VectorDrawGrader = VectorDrawGrader;
+    }
+
+    // When running as a Web Worker, grade answers posted by the page, and send back the results
+    if (typeof WorkerGlobalScope !== 'undefined' && root instanceof WorkerGlobalScope) {
+        root.onmessage = function(event) {
+            root.postMessage({result: grade(event.data.checks, event.data.answer)});
+        };
+    }
+}(this));
@@ -0,0 +1,355 @@
+"""
+This module contains logic for evaluating relational checks, which compare multiple vectors
+of an answer to each other:
+
+- `sum`: The sum of `vectors` has the `expected` [x, y] components
+  (e.g. [0, 0] for forces that are in equilibrium). The tolerance is a distance.
+- `parallel`: The two `vectors` point in the same or opposite directions.
+- `perpendicular`: The two `vectors` are perpendicular.
+- `relative_angle`: The second vector is rotated by the `expected` angle (counterclockwise,
+  in degrees) relative to the first one, e.g. 180 for vectors pointing in opposite directions.
+- `length_ratio`: The length of the first vector divided by the length of the second one
+  is `expected`.
+
+Tolerances of angle checks are in degrees. Course authors add relational checks
+via the "Custom checks" field (see `check_from_json`).
+
+Free-body diagrams with many forces can have many relational checks, e.g. one for each pair
+of forces, so the number of checks grows quadratically with the number of vectors.
+Check functions use components of vectors that are computed once per answer and cached
+by the vectors themselves. If NumPy (an optional dependency) is available and there are
+enough consecutive relational checks, the optimizer (see `vectordraw.optimizer`) fuses them
+into a single step (see `fuse`). It computes a table of the components of all vectors
+that the checks target once per answer, and evaluates all checks of the same kind at once
+by indexing into it, with constants (such as the sine of tolerances) computed once per plan.
+
+Components, lengths and tests of relational checks only use arithmetic operations, square roots
+and comparisons, which give exactly the same results for NumPy arrays as for numbers,
+so fused steps agree with the check functions.
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # pylint: disable=invalid-name
+
+
+# Check functions
+#
+# Whether a relational check passes is decided by a test that takes constants derived from the check
+# and (x, y, length) components of the vectors that the check targets (see `Vector.components`).
+# Tests only use arithmetic operations and comparisons, so they work the same way
+# for NumPy arrays of components as for numbers.
+
+def _relation_components(check, vectors):
+    """
+    Return components of each vector targeted by relational `check`.
+
+    Raises ValueError if any of them is missing.
+    """
+    for name in check['vectors']:
+        if name not in vectors:
+            raise ValueError(f'You need to use the {name} vector.')
+    return [vectors[name].components for name in check['vectors']]
+
+
+def _errmsg_relation(default_message, check, **fields):
+    """
+    Return error message for relational `check`, filling in `fields` along with names of vectors.
+
+    If `check` does not define a custom error message, fall back on `default_message`.
+    """
+    template = check.get('errmsg', default_message)
+    names = check['vectors']
+    return template.format(names=', '.join(names), first=names[0], second=names[-1], **fields)
+
+
+def _relative_angle(first, second):
+    """
+    Return angle in degrees (in the range [0, 360)) by which `second` is rotated from `first`.
+    """
+    (ax, ay, _), (bx, by, _) = first, second
+    return math.degrees(math.atan2(ax * by - ay * bx, ax * bx + ay * by)) % 360
+
+
+def _sum_constants(check):
+    expected_x, expected_y = check['expected']
+    tolerance = check.get('tolerance', 1.0)
+    return expected_x, expected_y, tolerance * tolerance
+
+
+def _sum_test(constants, *components):
+    expected_x, expected_y, squared_tolerance = constants
+    x, y = components[0][:2]
+    for other_x, other_y, _ in components[1:]:
+        x = x + other_x
+        y = y + other_y
+    delta_x = expected_x - x
+    delta_y = expected_y - y
+    return delta_x * delta_x + delta_y * delta_y <= squared_tolerance
+
+
+def _angle_constants(check):
+    return (math.sin(math.radians(check.get('tolerance', 2.0))),)
+
+
+def _parallel_test(constants, first, second):
+    sine, = constants
+    (ax, ay, first_length), (bx, by, second_length) = first, second
+    scale = first_length * second_length
+    # The sine of the angle between the vectors is cross product / scale
+    return (scale > 0) & (abs(ax * by - ay * bx) <= sine * scale)
+
+
+def _perpendicular_test(constants, first, second):
+    sine, = constants
+    (ax, ay, first_length), (bx, by, second_length) = first, second
+    scale = first_length * second_length
+    # The cosine of the angle between the vectors is dot product / scale
+    return (scale > 0) & (abs(ax * bx + ay * by) <= sine * scale)
+
+
+def _relative_angle_constants(check):
+    expected = math.radians(check['expected'])
+    tolerance = math.radians(check.get('tolerance', 2.0))
+    return math.cos(expected), math.sin(expected), math.cos(tolerance)
+
+
+def _relative_angle_test(constants, first, second):
+    cos_expected, sin_expected, cos_tolerance = constants
+    (ax, ay, first_length), (bx, by, second_length) = first, second
+    scale = first_length * second_length
+    # Rotate first vector by expected angle, and compare its direction with second vector
+    rotated_x = ax * cos_expected - ay * sin_expected
+    rotated_y = ax * sin_expected + ay * cos_expected
+    return (scale > 0) & (rotated_x * bx + rotated_y * by >= cos_tolerance * scale)
+
+
+def _length_ratio_constants(check):
+    return check['expected'], check.get('tolerance', 0.1)
+
+
+def _length_ratio_test(constants, first, second):
+    expected, tolerance = constants
+    first_length, second_length = first[2], second[2]
+    # Equivalent to |first_length / second_length - expected| <= tolerance,
+    # without dividing by zero
+    return (second_length > 0) & (
+        abs(first_length - expected * second_length) <= tolerance * second_length
+    )
+
+
+def check_sum(check, vectors):
+    """
+    Check if sum of vectors targeted by `check` has the expected x and y components.
+    """
+    components = _relation_components(check, vectors)
+    if not _sum_test(_sum_constants(check), *components):
+        raise ValueError(_errmsg_relation(
+            'The sum of {names} is incorrect.', check,
+            x=sum(x for x, _, _ in components), y=sum(y for _, y, _ in components)
+        ))
+
+
+def check_parallel(check, vectors):
+    """
+    Check if the two vectors targeted by `check` point in the same or opposite directions.
+    """
+    first, second = _relation_components(check, vectors)
+    if not _parallel_test(_angle_constants(check), first, second):
+        raise ValueError(_errmsg_relation(
+            '{first} and {second} are not parallel.', check,
+            angle=_relative_angle(first, second)
+        ))
+
+
+def check_perpendicular(check, vectors):
+    """
+    Check if the two vectors targeted by `check` are perpendicular.
+    """
+    first, second = _relation_components(check, vectors)
+    if not _perpendicular_test(_angle_constants(check), first, second):
+        raise ValueError(_errmsg_relation(
+            '{first} and {second} are not perpendicular.', check,
+            angle=_relative_angle(first, second)
+        ))
+
+
+def check_relative_angle(check, vectors):
+    """
+    Check if the second vector targeted by `check` is rotated by the expected angle
+    (counterclockwise, in degrees) relative to the first one.
+    """
+    first, second = _relation_components(check, vectors)
+    if not _relative_angle_test(_relative_angle_constants(check), first, second):
+        raise ValueError(_errmsg_relation(
+            'The angle between {first} and {second} is incorrect. Your angle: {angle:.1f}', check,
+            angle=_relative_angle(first, second)
+        ))
+
+
+def check_length_ratio(check, vectors):
+    """
+    Check if length of the first vector targeted by `check` divided by length of the second one
+    has the expected value.
+    """
+    first, second = _relation_components(check, vectors)
+    if not _length_ratio_test(_length_ratio_constants(check), first, second):
+        ratio = first[2] / second[2] if second[2] else float('inf')
+        raise ValueError(_errmsg_relation(
+            'The ratio of the lengths of {first} and {second} is incorrect. '
+            'Your ratio: {ratio:.2f}',
+            check, ratio=ratio
+        ))
+
+
+# Relational check functions, mapped to functions that return constants for a check,
+# and tests that take these constants along with components of the vectors to compare
+RELATION_TESTS = {
+    check_sum: (_sum_constants, _sum_test),
+    check_parallel: (_angle_constants, _parallel_test),
+    check_perpendicular: (_angle_constants, _perpendicular_test),
+    check_relative_angle: (_relative_angle_constants, _relative_angle_test),
+    check_length_ratio: (_length_ratio_constants, _length_ratio_test),
+}
+
+
+# Custom checks
+
+# Names of relational checks, mapped to the number of vectors they compare (None if any number)
+# and whether they need an expected value
+RELATIONS = {
+    'sum': (None, True),
+    'parallel': (2, False),
+    'perpendicular': (2, False),
+    'relative_angle': (2, True),
+    'length_ratio': (2, True),
+}
+
+# Keys that relational checks may contain
+CHECK_KEYS = frozenset(['check', 'vectors', 'expected', 'tolerance', 'errmsg'])
+
+
+def _is_number(value):
+    # JSON booleans are decoded to bool, which is a subclass of int
+    return type(value) in (int, float)
+
+
+def check_from_json(entry):
+    """
+    Return relational check for an `entry` of the custom checks specified by course author.
+
+    `entry` is an object with the name of the `check`, the names of the `vectors` it compares,
+    and (depending on the check) an `expected` value, along with an optional `tolerance`
+    and `errmsg`. Raises ValueError if `entry` is not a valid relational check.
+    """
+    name = entry['check']
+    if name not in RELATIONS:
+        raise ValueError(f'Unknown check "{name}"')
+    if not CHECK_KEYS.issuperset(entry):
+        raise ValueError(f'Check "{name}" contains unknown keys')
+    count, needs_expected = RELATIONS[name]
+    vectors = entry.get('vectors')
+    if not (
+            isinstance(vectors, list) and vectors and
+            all(isinstance(vector, str) for vector in vectors) and
+            (count is None or len(vectors) == count)
+    ):
+        what = f'{count} vectors' if count else 'a list of vectors'
+        raise ValueError(f'Check "{name}" needs {what}')
+    expected = entry.get('expected')
+    if name == 'sum':
+        valid = isinstance(expected, list) and len(expected) == 2 and all(map(_is_number, expected))
+    else:
+        valid = _is_number(expected) if needs_expected else expected is None
+    if not valid:
+        raise ValueError(f'Invalid expected value for check "{name}"')
+    tolerance = entry.get('tolerance', 0)
+    if not _is_number(tolerance) or tolerance < 0:
+        raise ValueError(f'Invalid tolerance for check "{name}"')
+    if not isinstance(entry.get('errmsg', ''), str):
+        raise ValueError(f'Invalid error message for check "{name}"')
+    return dict(entry)
+
+
+# Fused steps
+
+# Minimum number of fused checks for which evaluating checks over arrays pays off;
+# for fewer checks, the overhead of creating arrays outweighs the savings
+MIN_ARRAY_CHECKS = 64
+
+_MISSING_VECTOR = (float('nan'),) * 4
+
+
+def _entries(checks, check_functions):
+    """
+    Return (test, constants, names of vectors) for each of the (compiled) relational `checks`.
+    """
+    entries = []
+    for check, check_fn in zip(checks, check_functions):
+        constants, test = RELATION_TESTS[check_fn]
+        entries.append((test, constants(check), tuple(check['vectors'])))
+    return entries
+
+
+def _fuse(entries):
+    """
+    Return fused step that evaluates checks of the same kind at once against a table of arrays.
+
+    The table has a column of (x, y, length) components for each vector; missing vectors
+    have NaN components, for which all tests fail. Sums are tested with their resultant
+    as the only component, which is accumulated in the same order as by the check function.
+    """
+    names = sorted({name for _, _, targeted in entries for name in targeted})
+    columns = {name: column for column, name in enumerate(names)}
+    grouped = {}
+    for position, (test, constants, targeted) in enumerate(entries):
+        # Sums of different numbers of vectors can't be evaluated at once
+        group = grouped.setdefault((test, len(targeted)), ([], [], []))
+        group[0].append(position)
+        group[1].append(constants)
+        group[2].append([columns[name] for name in targeted])
+    groups = [
+        (
+            test,
+            np.array(positions),
+            tuple(np.array(column, dtype=float) for column in zip(*constants)),
+            np.array(arguments),
+        )
+        for (test, _), (positions, constants, arguments) in grouped.items()
+    ]
+    size = len(entries)
+
+    def fused_step(vectors, points):  # pylint: disable=unused-argument
+        coords = np.array([
+            (vec.tail.x, vec.tail.y, vec.tip.x, vec.tip.y) if vec is not None else _MISSING_VECTOR
+            for vec in map(vectors.get, names)
+        ], dtype=float).T
+        table = np.empty((3, len(names)))
+        table[:2] = coords[2:] - coords[:2]
+        table[2] = np.sqrt(table[0] * table[0] + table[1] * table[1])
+        passed = np.empty(size, dtype=bool)
+        with np.errstate(all='ignore'):
+            for test, positions, constants, arguments in groups:
+                if test is _sum_test:
+                    components = [np.add.accumulate(table[:2, arguments], axis=2)[:, :, -1]]
+                else:
+                    components = [table[:, column] for column in arguments.T]
+                passed[positions] = test(constants, *components)
+        failed = np.flatnonzero(~passed)
+        return int(failed[0]) if failed.size else None
+    return fused_step
+
+
+def fuse(checks, check_functions):
+    """
+    Return fused step that tests (compiled) relational `checks` with `check_functions` at once,
+    or None if they should be evaluated one by one.
+
+    The step returns the position of the first check that fails, or None if all of them pass.
+    """
+    if np is None or len(checks) < MIN_ARRAY_CHECKS:
+        return None
+    return _fuse(_entries(checks, check_functions))
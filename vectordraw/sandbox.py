@@ -0,0 +1,316 @@
+"""
+This module contains a sandbox for running expensive or author-supplied checks
+in a pool of worker processes, with a time budget and a memory cap.
+
+Without the sandbox, all checks run in the thread that handles a request, so a single
+pathological check (e.g. a custom check, or `points_on_line` with a huge list of points)
+can keep a worker busy indefinitely. With the sandbox, such checks run in separate processes:
+if they don't finish within the time budget, the process running them is killed and replaced,
+and the answer can't be graded (see `SandboxError`).
+
+The sandbox is disabled by default. It is configured via the following environment variables,
+which are read when this module is first imported:
+
+- VECTORDRAW_SANDBOX_WORKERS: Number of worker processes (default: 0, i.e. disabled).
+- VECTORDRAW_SANDBOX_TIMEOUT: Time budget per answer in seconds, including time spent
+  waiting for an idle worker (default: 1).
+- VECTORDRAW_SANDBOX_MEMORY: Memory that each worker may allocate, in MB (default: 256).
+
+Workers are started when the sandbox is first used, and are kept running from then on.
+They are started via a fork server (or spawned, where fork servers are not available)
+rather than forked from the current process: forking a process that runs multiple threads
+(like most web servers do) can leave locks that other threads held locked in the child forever.
+Workers that are killed are replaced in the background, so that the next request
+doesn't have to wait for a new worker to start.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from .cache import LRUCache
+from .expressions import compile_check
+from .grader import BUILTIN_CHECKS, Grader, check_points_on_line
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # pylint: disable=invalid-name
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+# Checks for lines that need to pass through more than this number of points run in the sandbox
+MAX_INLINE_POINTS = 100
+
+
+def default_context():
+    """
+    Return multiprocessing context for starting workers without forking the current process.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+class SandboxError(Exception):
+    """
+    Raised when an answer could not be graded in the sandbox.
+    """
+
+
+class SandboxTimeout(SandboxError):
+    """
+    Raised when grading an answer in the sandbox exceeded the time budget.
+    """
+
+
+def needs_sandbox(check, check_fn):
+    """
+    Return True if `check` (which runs `check_fn`) should run in the sandbox.
+
+    This is the case for checks supplied by course authors, and for built-in checks
+    whose cost depends on data that course authors can make arbitrarily large.
+    """
+    if check_fn not in BUILTIN_CHECKS:
+        return True
+    return check_fn is check_points_on_line and len(check['expected']) > MAX_INLINE_POINTS
+
+
+def first_sandboxed_check(plan):
+    """
+    Return index of the first check of `plan` that should run in the sandbox, or None.
+    """
+    for index, (check, check_fn) in enumerate(zip(plan.checks, plan.check_functions)):
+        if needs_sandbox(check, check_fn):
+            return index
+    return None
+
+
+# Grading plans compiled by a worker process, keyed by content version
+worker_plans = LRUCache(maxsize=64)  # pylint: disable=invalid-name
+
+
+def _grade(task):
+    """
+    Grade answer from `task` in a worker process.
+
+    Checks that are not built-in are compiled as custom checks (see `vectordraw.expressions`).
+    """
+    version, checks, answer, outcomes = task
+
+    def compile_plan():
+        custom_checks = {
+            check['check']: compile_check(check['check'])
+            for check in checks if check['check'] not in Grader.check_registry
+        }
+        return Grader(custom_checks=custom_checks).compile(checks)
+    return worker_plans.get_or_create(version, compile_plan).grade_incrementally(answer, outcomes)
+
+
+def _limit_memory(memory_limit):
+    """
+    Limit address space of the current process to its current size plus `memory_limit` bytes.
+    """
+    if resource is None:
+        return
+    try:
+        with open('/proc/self/statm', encoding='ascii') as statm:
+            current = int(statm.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        current = 0
+    limit = current + memory_limit
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker_main(connection, memory_limit):
+    """
+    Grade answers received via `connection` until receiving None.
+    """
+    _limit_memory(memory_limit)
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        try:
+            response = ('ok', _grade(task))
+        except MemoryError:
+            response = ('error', 'Memory limit exceeded')
+        except Exception as error:  # pylint: disable=broad-except
+            response = ('error', repr(error))
+        connection.send(response)
+
+
+class _Worker:
+    """
+    A worker process, along with the connection for sending it tasks.
+    """
+
+    def __init__(self, context, memory_limit):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_connection, memory_limit), daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+
+    def kill(self):
+        """
+        Kill this worker without waiting for it to finish its current task.
+        """
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def stop(self):
+        """
+        Ask this worker to exit once it is done with its current task.
+        """
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+
+
+class Sandbox:
+    """
+    A pool of `workers` processes that grade answers with a time budget of `timeout` seconds.
+
+    Each worker may allocate up to `memory_limit` bytes. Workers are started
+    via the multiprocessing `context` (see `default_context`).
+    """
+
+    def __init__(self, workers=0, timeout=1.0, memory_limit=256 * 2 ** 20, context=None):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.context = context or default_context()
+        self._idle = queue.Queue()
+        self._started = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environ(cls, environ=None):
+        """
+        Return sandbox configured via VECTORDRAW_SANDBOX_* variables from `environ`.
+        """
+        environ = os.environ if environ is None else environ
+        return cls(
+            workers=int(environ.get('VECTORDRAW_SANDBOX_WORKERS', 0)),
+            timeout=float(environ.get('VECTORDRAW_SANDBOX_TIMEOUT', 1)),
+            memory_limit=int(environ.get('VECTORDRAW_SANDBOX_MEMORY', 256)) * 2 ** 20,
+        )
+
+    @property
+    def enabled(self):
+        """
+        Return True if this sandbox has any workers.
+        """
+        return self.workers > 0
+
+    def _start(self):
+        with self._lock:
+            if not self._started:
+                for _ in range(self.workers):
+                    self._idle.put(_Worker(self.context, self.memory_limit))
+                self._started = True
+
+    def run(self, task):
+        """
+        Grade answer from `task` in a worker, and return result and outcomes of checks.
+
+        Raises SandboxTimeout if that takes longer than the time budget,
+        and SandboxError if the worker fails for any other reason.
+        """
+        self._start()
+        deadline = time.monotonic() + self.timeout
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty as error:
+            raise SandboxTimeout('No idle sandbox worker') from error
+        replace = False
+        try:
+            if worker is None:
+                # Replacing a worker in the background failed, so try again
+                worker = _Worker(self.context, self.memory_limit)
+            worker.connection.send(task)
+            if not worker.connection.poll(max(deadline - time.monotonic(), 0)):
+                replace = True
+                raise SandboxTimeout('Grading took too long')
+            status, value = worker.connection.recv()
+        except (EOFError, OSError) as error:
+            replace = True
+            raise SandboxError('Sandbox worker failed') from error
+        finally:
+            if replace:
+                self._replace(worker)
+            else:
+                self._idle.put(worker)
+        if status != 'ok':
+            raise SandboxError(value)
+        return value
+
+    def _replace(self, worker):
+        """
+        Kill `worker` (if any), and start a new worker in its place in the background.
+        """
+        if worker is not None:
+            log.warning('Killing sandbox worker %s', worker.process.pid)
+            worker.kill()
+        threading.Thread(target=self._respawn, daemon=True).start()
+
+    def _respawn(self):
+        """
+        Start a new worker and make it available for grading.
+
+        If that fails, the slot is left empty, and a worker is started when it is used next.
+        """
+        try:
+            worker = _Worker(self.context, self.memory_limit)
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Could not start sandbox worker')
+            worker = None
+        self._idle.put(worker)
+
+    def grade_incrementally(self, plan, version, answer, outcomes=None):
+        """
+        Check correctness of `answer` like `plan.grade_incrementally` does,
+        running checks that need it in the sandbox.
+
+        Checks that precede the first check that needs the sandbox run in the current process;
+        the sandbox is only used if they all pass. Workers compile their own copy of `plan`
+        from its checks, and cache it under `version`, which must identify its content.
+        """
+        stop = first_sandboxed_check(plan)
+        if stop is None:
+            return plan.grade_incrementally(answer, outcomes)
+        result, new_outcomes = plan.grade_incrementally(answer, outcomes, stop)
+        if not result['correct']:
+            return result, new_outcomes
+        return self.run((version, plan.checks, answer, dict(outcomes or {}, **new_outcomes)))
+
+    def close(self):
+        """
+        Stop all workers.
+        """
+        with self._lock:
+            while True:
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if worker is not None:
+                    worker.stop()
+            self._started = False
+
+
+# Sandbox used by the XBlock, configured via environment variables
+sandbox = Sandbox.from_environ()  # pylint: disable=invalid-name
+if sandbox.enabled:
+    atexit.register(sandbox.close)
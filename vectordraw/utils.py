@@ -2,6 +2,8 @@
 This module contains utility functions for the Vector Drawing XBlock.
 """
 
+import hashlib
+
 
 def get_doc_link(section, link_text="here"):
     """
@@ -12,3 +14,16 @@ def get_doc_link(section, link_text="here"):
         f'{link_text}'
         f'</a>'
     )
+
+
+def content_hash(*values):
+    """
+    Return a short digest identifying the combination of `values`.
+
+    Used for keying caches by the version of the content that cached data was derived from.
+    """
+    digest = hashlib.sha1()
+    for value in values:
+        digest.update(repr(value).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
@@ -0,0 +1,86 @@
+"""
+This module contains validation logic for answers that students submit to Vector Drawing exercises.
+
+Validators are compiled from the definition of an exercise, so they know which vectors and points
+an answer may contain. They reject invalid answers as early as possible, i.e. before looking at
+more data than necessary, and before the grader allocates any objects for them.
+"""
+
+# Maximum number of checks that (outdated) clients may send along with an answer;
+# these checks are ignored, since checks are derived from the expected result on the server
+MAX_CHECKS = 100
+
+# Keys that answers may contain
+ANSWER_KEYS = frozenset(['vectors', 'points', 'checks'])
+
+# Keys that vector data must contain
+VECTOR_KEYS = frozenset(['tail', 'tip'])
+
+
+class AnswerValidator:
+    """
+    Validates answers to an exercise that defines vectors called `vector_names`
+    and points called `point_names`.
+
+    Coordinates of vectors and points must be numbers whose absolute value
+    does not exceed `max_coordinate`.
+    """
+
+    def __init__(self, vector_names, point_names, max_coordinate, max_checks=MAX_CHECKS):
+        self.vector_names = frozenset(vector_names)
+        self.point_names = frozenset(point_names)
+        self.max_coordinate = max_coordinate
+        self.max_checks = max_checks
+
+    def validate(self, data):
+        """
+        Check that `data` is a valid answer, raising ValueError if it isn't.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Answer must be an object")
+        if not ANSWER_KEYS.issuperset(data):
+            raise ValueError("Answer contains unknown keys")
+        self._validate_vectors(data.get('vectors'))
+        self._validate_points(data.get('points'))
+        checks = data.get('checks', [])
+        if not isinstance(checks, list) or len(checks) > self.max_checks:
+            raise ValueError("Invalid checks")
+
+    def _validate_vectors(self, vectors):
+        if not isinstance(vectors, dict) or len(vectors) > len(self.vector_names):
+            raise ValueError("Invalid vectors")
+        for name, vector_data in vectors.items():
+            if name not in self.vector_names:
+                raise ValueError(f"Unknown vector: {name}")
+            if not isinstance(vector_data, dict) or vector_data.keys() != VECTOR_KEYS:
+                raise ValueError(f"Invalid vector: {name}")
+            if not (self._valid_coords(vector_data['tail']) and
+                    self._valid_coords(vector_data['tip'])):
+                raise ValueError(f"Invalid coordinates for vector: {name}")
+
+    def _validate_points(self, points):
+        if not isinstance(points, dict) or len(points) > len(self.point_names):
+            raise ValueError("Invalid points")
+        for name, coords in points.items():
+            if name not in self.point_names:
+                raise ValueError(f"Unknown point: {name}")
+            if not self._valid_coords(coords):
+                raise ValueError(f"Invalid coordinates for point: {name}")
+
+    def _valid_coords(self, coords):
+        """
+        Return True if `coords` is a pair of numbers within the allowed range.
+        """
+        return (
+            isinstance(coords, list) and len(coords) == 2 and
+            all(self._valid_number(coord) for coord in coords)
+        )
+
+    def _valid_number(self, value):
+        """
+        Return True if `value` is a number within the allowed range.
+
+        NaN and infinite values fail the range check, since comparisons with them are False.
+        """
+        # JSON booleans are decoded to bool, which is a subclass of int
+        return type(value) in (int, float) and -self.max_coordinate <= value <= self.max_coordinate
@@ -4,11 +4,13 @@
 import json
 import logging
 
-import six
+from django.utils.translation import get_language
 from web_fragments.fragment import Fragment
+from webob import Response
 from xblock.core import XBlock
 from xblock.exceptions import JsonHandlerError
 from xblock.fields import Boolean, Dict, Float, Integer, Scope, String
+from xblock.scorable import ScorableXBlockMixin, Score
 from xblock.validation import ValidationMessage
 from xblockutils.resources import ResourceLoader
 from xblockutils.studio_editable import StudioEditableXBlockMixin
@@ -19,15 +21,47 @@ try:
 except ImportError:
     WorkbenchRuntime = False  # pylint: disable=invalid-name
 
-from .grader import Grader
-from .utils import get_doc_link
+from . import metrics, profiling
+from .cache import LRUCache, answer_fingerprint, cache_size
+from .exercise import compile_grading_plan, grade_answer, grade_incrementally, grading_results
+from .expressions import custom_checks_from_json
+from .grader import BUILTIN_CHECKS
+from .jobs import QueueFull, grading_queue
+from .relations import RELATION_TESTS
+from .sandbox import SandboxError
+from .utils import content_hash, get_doc_link
+from .validator import AnswerValidator
 
 loader = ResourceLoader(__name__)  # pylint: disable=invalid-name
 
 log = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
+# Normalized settings for students, keyed by content version
+student_settings = LRUCache(maxsize=cache_size('settings', 512))  # pylint: disable=invalid-name
+# Student view fragments (without per-user data), keyed by content version,
+# language and runtime; see `VectorDrawXBlock.student_view` for details
+student_fragments = LRUCache(maxsize=cache_size('fragment', 256))  # pylint: disable=invalid-name
+# Validators for answers, keyed by content version
+answer_validators = LRUCache(maxsize=cache_size('validator', 256))  # pylint: disable=invalid-name
+# Grading plans compiled from expected results, keyed by content version
+grading_plans = LRUCache(maxsize=cache_size('plan', 256))  # pylint: disable=invalid-name
 
-class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
+# Answers are rejected if they contain coordinates that are further away from the origin
+# than this multiple of the extent of the board
+MAX_COORDINATE_FACTOR = 1000
+
+# Message for answers that could not be graded, e.g. because grading took too long
+COULD_NOT_GRADE_MESSAGE = 'Your answer could not be graded. Please try again later.'
+
+metrics.registry.register_cache('student_settings', student_settings)
+metrics.registry.register_cache('student_fragments', student_fragments)
+metrics.registry.register_cache('answer_validators', answer_validators)
+metrics.registry.register_cache('grading_plans', grading_plans)
+metrics.registry.register_cache('grading_results', grading_results)
+
+
+@XBlock.wants('user')
+class VectorDrawXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
     """
     An XBlock that allows course authors to define vector drawing exercises.
     """
@@ -212,7 +246,11 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
         help=(
             'List of custom checks to use for grading. '
             'This is needed when grading is more complex '
-            'and cannot be defined in terms of "Expected results" only.'
+            'and cannot be defined in terms of "Expected results" only. '
+            'Each entry is an expression such as "length(F1) == 2 * length(F2) +- 0.5", '
+            'or an object with an "expression" and an "errmsg" to show if it is false. '
+            'Relations between vectors can also be checked with objects such as '
+            '{"check": "perpendicular", "vectors": ["N", "f"]}.'
         ),
         default="[]",
         multiline_editor=True,
@@ -220,6 +258,39 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
         scope=Scope.content
     )
 
+    async_grading = Boolean(
+        display_name="Grade in background",
+        help=(
+            "Queue answers for grading in the background instead of grading them right away, "
+            "and let students wait for the result. Only useful for exercises "
+            "with expensive custom checks."
+        ),
+        default=False,
+        scope=Scope.settings
+    )
+
+    instant_feedback = Boolean(
+        display_name="Instant feedback",
+        help=(
+            "Check answers in the browser while students draw, and show them feedback right away. "
+            "Answers are only graded when students click \"Check\". "
+            "Note that this sends the checks for the expected result to the browser, "
+            "and that custom checks are only evaluated when answers are graded."
+        ),
+        default=False,
+        scope=Scope.settings
+    )
+
+    match_vectors = Boolean(
+        display_name="Ignore vector labels",
+        help=(
+            "Grade each vector as the expected vector that it matches best, no matter how "
+            "students labeled it. Instant feedback still uses the labels that students chose."
+        ),
+        default=False,
+        scope=Scope.settings
+    )
+
     weight = Float(
         display_name="Weight",
         default=1,
@@ -234,11 +305,18 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
 
     # User state
 
-    # Dictionary containing vectors and points present on the board when user last clicked "Check",
-    # as well as checks to perform in order to obtain grade
+    # Dictionary that keeps all state of the most recent answer in a single field,
+    # so that it can be saved with a single write. Contains the following entries:
+    # - answer: vectors and points present on the board when user last clicked "Check"
+    # - result: result returned by the grader for the answer;
+    #   contains info about correctness of answer and feedback message
+    # - check_outcomes: maps keys of checks that were evaluated to obtain the result
+    #   to their outcomes; allows regrading the answer without re-evaluating
+    #   checks that did not change
+    state = Dict(scope=Scope.user_state)
+    # Most recent answer and result as stored by earlier versions of this block;
+    # only read if `state` is empty
     answer = Dict(scope=Scope.user_state)
-    # Dictionary that represents result returned by the grader for the most recent answer;
-    # contains info about correctness of answer and feedback message
     result = Dict(scope=Scope.user_state)
 
     editable_fields = (
@@ -261,20 +339,58 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
         'points',
         'expected_result',
         'expected_result_positions',
-        'custom_checks'
+        'custom_checks',
+        'async_grading',
+        'instant_feedback',
+        'match_vectors',
     )
 
-    has_score = True
+    # Fields that student settings are derived from
+    settings_fields = (
+        'width',
+        'height',
+        'bounding_box_size',
+        'axis',
+        'show_navigation',
+        'show_vector_properties',
+        'show_slope_for_lines',
+        'add_vector_label',
+        'vector_properties_label',
+        'background_url',
+        'background_width',
+        'background_height',
+        'background_description',
+        'vectors',
+        'points',
+        'expected_result',
+        'instant_feedback',
+    )
+
+    @property
+    def settings_version(self):
+        """
+        Return identifier of the version of the content that settings are derived from.
+        """
+        return content_hash(*(getattr(self, field_name) for field_name in self.settings_fields))
 
     @property
     def settings(self):
         """
         Return settings for this exercise.
+
+        Settings are computed once per content version and shared by all instances
+        of this block in the current process, so nested values must not be modified.
+        """
+        return dict(student_settings.get_or_create(self.settings_version, self._build_settings))
+
+    def _build_settings(self):
+        """
+        Compute settings for this exercise from its content.
         """
         width_scale = self.width / float(self.height)
         box_size = self.bounding_box_size
         bounding_box = [-box_size * width_scale, box_size, box_size * width_scale, -box_size]
-        return {
+        settings = {
             'width': self.width,
             'height': self.height,
             'bounding_box': bounding_box,
@@ -285,22 +401,88 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
             'add_vector_label': self.add_vector_label,
             'vector_properties_label': self.vector_properties_label,
             'background': self.background,
-            'vectors': self.get_vectors,
-            'points': self.get_points,
-            'expected_result': self.get_expected_result,
-            'expected_result_positions': self.expected_result_positions,
+            'vectors': self._load_vectors(),
+            'points': self._load_points(),
         }
+        if self.instant_feedback:
+            settings['instant_feedback_checks'] = self._instant_feedback_checks()
+        return settings
+
+    def _instant_feedback_checks(self):
+        """
+        Return checks that the browser can evaluate to give instant feedback.
+
+        These are the built-in checks for the expected result, with tolerances resolved;
+        custom checks (including relational checks) can only be evaluated by the server.
+        """
+        plan = self.grading_plan
+        return [
+            check for check, check_fn in zip(plan.compiled_checks, plan.check_functions)
+            if check_fn in BUILTIN_CHECKS and check_fn not in RELATION_TESTS
+        ]
+
+    @property
+    def studio_settings(self):
+        """
+        Return settings for editing this exercise.
+
+        In addition to the settings that students get,
+        these include information about the expected result.
+        """
+        settings = self.settings
+        settings['expected_result'] = self.get_expected_result
+        settings['expected_result_positions'] = self.expected_result_positions
+        return settings
 
     @property
     def user_state(self):
         """
         Return user state, which is a combination of most recent answer and result.
+
+        If the most recent answer is still being graded, return it along with its ticket instead.
         """
-        user_state = self.answer
-        if self.result:
-            user_state['result'] = self.result
+        state = self._get_state()
+        if state.get('pending'):
+            return dict(state['pending']['answer'], pending=state['pending']['ticket'])
+        user_state = dict(state['answer'])
+        result = self._current_result(state)
+        if result:
+            user_state['result'] = result
         return user_state
 
+    @staticmethod
+    def _current_result(state):
+        """
+        Return result to show for most recent answer in `state`.
+
+        If the last answer that was queued for grading could not be graded, tell students so.
+        """
+        if state.get('error'):
+            return {'correct': False, 'msg': state['error']}
+        return state['result']
+
+    def _get_state(self):
+        """
+        Return state of most recent answer, falling back on state stored by earlier versions.
+        """
+        if self.state:
+            return self.state
+        return {'answer': self.answer, 'result': self.result, 'check_outcomes': {}}
+
+    def _save_state(self, answer, result, check_outcomes, publish=True):
+        """
+        Save state of most recent answer and publish grade for it (unless `publish` is False).
+
+        Neither saves nor publishes anything that didn't change.
+        """
+        old_result = self._get_state()['result']
+        state = {'answer': answer, 'result': result, 'check_outcomes': check_outcomes}
+        if state != self.state:
+            self.state = state
+        if publish and result.get('correct') != old_result.get('correct'):
+            score = 1 if result["correct"] else 0
+            self.runtime.publish(self, 'grade', {"value": score, "max_value": 1})
+
     @property
     def background(self):
         """
@@ -337,8 +519,12 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
     def get_vectors(self):
         """
         Return info about vectors belonging to this exercise.
+        """
+        return self.settings['vectors']
 
-        To do this, load vector info from JSON string specified by course author,
+    def _load_vectors(self):
+        """
+        Load vector info from JSON string specified by course author,
         and augment it with default values that are required for rendering vectors on the client.
         """
         vectors = []
@@ -369,8 +555,12 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
     def get_points(self):
         """
         Return info about points belonging to this exercise.
+        """
+        return self.settings['points']
 
-        To do this, load point info from JSON string specified by course author,
+    def _load_points(self):
+        """
+        Load point info from JSON string specified by course author,
         and augment it with default values that are required for rendering points on the client.
         """
         points = []
@@ -396,12 +586,77 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
         """
         return json.loads(self.expected_result)
 
+    @property
+    def grading_version(self):
+        """
+        Return identifier of the version of this exercise's grading-related content.
+        """
+        return content_hash(
+            self.expected_result, self.points, self.custom_checks, self.match_vectors
+        )
+
+    @property
+    def grading_plan(self):
+        """
+        Return GradingPlan for expected result of this exercise.
+
+        Plans are compiled once per version of the expected result and shared
+        by all instances of this block in the current process.
+        """
+        return grading_plans.get_or_create(self.grading_version, self._compile_grading_plan)
+
+    def _compile_grading_plan(self):
+        """
+        Compile checks for expected result and custom checks of this exercise into a GradingPlan.
+
+        Custom checks run after checks for the expected result. If they are invalid,
+        they are left out (Studio reports invalid custom checks to authors).
+        If vector labels are ignored, the plan gets a matcher for the expected vectors.
+        """
+        point_names = {point['name'] for point in json.loads(self.points)}
+        try:
+            custom_checks = custom_checks_from_json(self.custom_checks)
+        except ValueError:
+            log.exception('Ignoring invalid custom checks of %s', self.scope_ids.usage_id)
+            custom_checks = None
+        return compile_grading_plan(
+            self.get_expected_result, point_names, custom_checks, self.match_vectors
+        )
+
+    @profiling.profiled('student_view')
     def student_view(self, context=None):
         """
         The primary view of the VectorDrawXBlock, shown to students
         when viewing courses.
+
+        Apart from the arguments passed to the JS initialization function, the fragment
+        only depends on the content of this block, so it is rendered once per content version
+        and served from a cache. Editing the content changes its version, so stale fragments
+        are never served; they are evicted from the cache once it fills up.
+        """
+        key = (
+            content_hash(self.settings_version, self.display_name, self.description),
+            get_language(),
+            self.scope_ids.block_type,
+            type(self.runtime),
+        )
+        cached = student_fragments.get_or_create(
+            key, lambda: self._render_student_view(context).to_dict()
+        )
+        fragment = Fragment.from_dict(cached)
+        init_args = {"settings": self.settings, "user_state": self.user_state}
+        if self.instant_feedback:
+            init_args['grader_url'] = self.runtime.local_resource_url(
+                self, 'public/js/vectordraw_grader.js'
+            )
+        fragment.initialize_js('VectorDrawXBlock', init_args)
+        return fragment
+
+    def _render_student_view(self, context=None):
         """
-        context = context or {}
+        Render fragment for student view, without initializing JS.
+        """
+        context = dict(context or {})
         context['self'] = self
         fragment = Fragment()
         fragment.add_content(
@@ -419,12 +674,14 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
         fragment.add_javascript_url(
             "//cdnjs.cloudflare.com/ajax/libs/jsxgraph/0.98/jsxgraphcore.js"
         )
+        if self.instant_feedback:
+            # Used for instant feedback if the browser can't run the grader in a Web Worker
+            fragment.add_javascript_url(
+                self.runtime.local_resource_url(self, 'public/js/vectordraw_grader.js')
+            )
         fragment.add_javascript_url(
             self.runtime.local_resource_url(self, 'public/js/vectordraw.js')
         )
-        fragment.initialize_js(
-            'VectorDrawXBlock', {"settings": self.settings, "user_state": self.user_state}
-        )
         return fragment
 
     def studio_view(self, context):
@@ -463,7 +720,7 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
             self.runtime.local_resource_url(self, 'public/js/vectordraw_edit.js')
         )
         fragment.initialize_js(
-            'VectorDrawXBlockEdit', {"settings": self.settings}
+            'VectorDrawXBlockEdit', {"settings": self.studio_settings}
         )
         return fragment
 
@@ -477,6 +734,11 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
             """ Helper function for adding validation messages. """
             validation.add(ValidationMessage(ValidationMessage.ERROR, msg))
 
+        try:
+            custom_checks_from_json(data.custom_checks)
+        except ValueError as error:
+            add_error(f"Custom checks are not valid: {error}")
+
         if data.background_url.strip():
             if data.background_width == 0 and data.background_height == 0:
                 add_error(
@@ -493,39 +755,39 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
                     "that would allow anyone to solve the problem if the image did not load."
                 )
 
+    @property
+    def answer_validator(self):
+        """
+        Return AnswerValidator for answers to this exercise.
+
+        Validators are compiled once per content version and shared
+        by all instances of this block in the current process.
+        """
+        return answer_validators.get_or_create(
+            self.settings_version, self._compile_answer_validator
+        )
+
+    def _compile_answer_validator(self):
+        """
+        Compile AnswerValidator that only accepts vectors and points defined for this exercise,
+        with coordinates that are not too far away from the board.
+        """
+        settings = self.settings
+        extent = max(max(abs(bound) for bound in settings['bounding_box']), 1)
+        return AnswerValidator(
+            vector_names=[vector['name'] for vector in settings['vectors']],
+            point_names=[point['name'] for point in settings['points']],
+            max_coordinate=extent * MAX_COORDINATE_FACTOR,
+        )
+
     def _validate_check_answer_data(self, data):
         """
         Validate answer data submitted by user.
         """
-        # Check vectors
-        vectors = data.get('vectors')
-        if not isinstance(vectors, dict):
-            raise ValueError
-        for vector_data in vectors.values():
-            # Validate vector
-            if not six.viewkeys(vector_data) == {'tail', 'tip'}:
-                raise ValueError
-            # Validate tip and tail
-            tip = vector_data['tip']
-            tip_valid = isinstance(tip, list) and len(tip) == 2
-            tail = vector_data['tail']
-            tail_valid = isinstance(tail, list) and len(tail) == 2
-            if not (tip_valid and tail_valid):
-                raise ValueError
-        # Check points
-        points = data.get('points')
-        if not isinstance(points, dict):
-            raise ValueError
-        for coords in points.values():
-            # Validate point
-            point_valid = isinstance(coords, list) and len(coords) == 2
-            if not point_valid:
-                raise ValueError
-        # If we get to this point, it means that vector and point data is valid;
-        # the only thing left to check is whether data contains a list of checks:
-        if 'checks' not in data:
-            raise ValueError
+        self.answer_validator.validate(data)
 
+    @metrics.instrument_handler(metrics.check_answer_seconds, metrics.check_answer_request_bytes)
+    @profiling.profiled('check_answer')
     @XBlock.json_handler
     def check_answer(self, data, suffix=''):  # pylint: disable=unused-argument
         """
@@ -533,21 +795,184 @@ class VectorDrawXBlock(StudioEditableXBlockMixin, XBlock):
         """
         # Validate data
         try:
-            self._validate_check_answer_data(data)
+            with metrics.validation_seconds.time():
+                self._validate_check_answer_data(data)
         except ValueError as error:
+            metrics.rejected_answers.inc()
             raise JsonHandlerError(400, "Invalid data") from error
-        # Save answer
-        self.answer = {'vectors': data["vectors"], 'points': data["points"]}
-        # Compute result
-        grader = Grader()
-        result = grader.grade(data)
-        # Save result
-        self.result = result
-        # Publish grade data
-        score = 1 if result["correct"] else 0
-        self.runtime.publish(self, 'grade', {"value": score, "max_value": 1})
+        answer = {'vectors': data["vectors"], 'points': data["points"]}
+        if self.async_grading:
+            return self._queue_answer(answer)
+        # Compute result; checks are always derived from the expected result on the server,
+        # so any checks that outdated clients might still be sending are ignored.
+        with metrics.grading_seconds.time():
+            try:
+                result, check_outcomes = self._grade(data)
+            except SandboxError:
+                # Leave state as it is, so that students can try again
+                log.warning('Could not grade answer to %s', self.scope_ids.usage_id, exc_info=True)
+                metrics.sandbox_failures.inc()
+                return {"result": {'correct': False, 'msg': COULD_NOT_GRADE_MESSAGE}}
+        # Save answer and result, and publish grade data
+        self._save_state(answer, result, check_outcomes)
         return {"result": result}
 
+    def _queue_answer(self, answer):
+        """
+        Queue `answer` for grading in the background, and return its ticket.
+
+        Until it is graded, the answer is stored along with its ticket, so that the client
+        can keep polling for the result after reloading the page. Jobs only grade answers;
+        results are saved (and grades published) by `grading_status`.
+        """
+        plan, version = self.grading_plan, self.grading_version
+        try:
+            ticket = grading_queue.submit(
+                (str(self.scope_ids.usage_id), self.scope_ids.user_id),
+                content_hash(version, answer_fingerprint(answer)),
+                lambda: grade_answer(plan, version, answer),
+            )
+        except QueueFull as error:
+            metrics.rejected_queued_answers.inc()
+            raise JsonHandlerError(503, "Too many answers are being graded") from error
+        state = dict(self._get_state(), pending={'answer': answer, 'ticket': ticket})
+        if state != self.state:
+            self.state = state
+        return {"status": "pending", "ticket": ticket}
+
+    @XBlock.json_handler
+    def grading_status(self, data, suffix=''):  # pylint: disable=unused-argument
+        """
+        Return status of the most recent answer that was queued for grading,
+        along with its result if it has been graded.
+
+        Responds right away; clients ask again after a while if the answer is still pending.
+        """
+        state = self._get_state()
+        pending = state.get('pending')
+        if not pending:
+            return {"status": "done", "result": self._current_result(state)}
+        job = grading_queue.get(pending['ticket'])
+        if job is not None and not job.done():
+            return {"status": "pending", "ticket": pending['ticket']}
+        return {"status": "done", "result": self._collect_result(pending, job)}
+
+    def _collect_result(self, pending, job):
+        """
+        Save and return result of `pending` answer that was graded by `job`, and publish grade.
+
+        If `job` is None (e.g. because the answer was queued by another process)
+        or was cancelled, grade the answer right away. If the answer could not be graded,
+        stop waiting for it, keeping the previous answer and result (so the grade doesn't change).
+        """
+        try:
+            if job is None or job.future.cancelled():
+                result, check_outcomes = self._grade(pending['answer'])
+            else:
+                result, check_outcomes = job.result()
+        except Exception as error:  # pylint: disable=broad-except
+            log.warning('Could not grade answer to %s', self.scope_ids.usage_id, exc_info=error)
+            if isinstance(error, SandboxError):
+                metrics.sandbox_failures.inc()
+            state = {key: value for key, value in self._get_state().items() if key != 'pending'}
+            self.state = dict(state, error=COULD_NOT_GRADE_MESSAGE)
+            return self._current_result(self.state)
+        finally:
+            grading_queue.discard(pending['ticket'])
+        self._save_state(pending['answer'], result, check_outcomes)
+        return result
+
+    def _user_is_staff(self):
+        """
+        Return True if the current user is a staff user.
+        """
+        user_service = self.runtime.service(self, 'user')
+        if user_service is None:
+            return getattr(self.runtime, 'user_is_staff', False)
+        return user_service.get_current_user().opt_attrs.get('edx-platform.user_is_staff', False)
+
+    @XBlock.handler
+    def metrics_handler(self, request, suffix=''):  # pylint: disable=unused-argument
+        """
+        Return metrics of the current process in the OpenMetrics text format.
+
+        Only available to staff users.
+        """
+        if not self._user_is_staff():
+            return Response(status=403)
+        return Response(
+            body=metrics.registry.render().encode('utf-8'), content_type=metrics.CONTENT_TYPE
+        )
+
+    def _grade(self, answer):
+        """
+        Grade `answer`, returning result and outcomes of checks that were evaluated.
+        """
+        return grade_answer(self.grading_plan, self.grading_version, answer)
+
+    # Scoring (see ScorableXBlockMixin)
+
+    def has_submitted_answer(self):
+        """
+        Return True if the current user submitted an answer to this exercise.
+        """
+        return bool(self._get_state()['answer'])
+
+    def get_score(self):
+        """
+        Return score of most recent answer, or the score that staff set for it.
+        """
+        state = self._get_state()
+        if 'score' in state:
+            return Score(*state['score'])
+        return self._score(state['result'])
+
+    def set_score(self, score):
+        """
+        Save `score` (e.g. set by staff) for most recent answer, until it is graded again.
+        """
+        self.state = dict(self._get_state(), score=list(score))
+
+    def calculate_score(self):
+        """
+        Return score of most recent answer against current expected result, without saving it.
+        """
+        result, _ = self._regrade(self._get_state())
+        return self._score(result)
+
+    def rescore(self, only_if_higher):
+        """
+        Regrade most recent answer against current expected result, and publish its score.
+
+        The LMS calls this when staff rescore answers (e.g. after fixing the expected result).
+        Only checks that were added or changed since the answer was last graded are evaluated;
+        outcomes of all other checks are reused. The new result is saved, so students see it.
+        Raises ValueError if there is no answer to regrade,
+        and SandboxError if the answer can't be graded in the sandbox.
+        """
+        if not self.has_submitted_answer():
+            raise ValueError(f'Cannot rescore unanswered problem: {self.scope_ids.usage_id}')
+        state = self._get_state()
+        result, check_outcomes = self._regrade(state)
+        self._save_state(state['answer'], result, check_outcomes, publish=False)
+        self._publish_grade(self._score(result), only_if_higher)
+
+    def _regrade(self, state):
+        """
+        Regrade answer from `state`, reusing outcomes of checks that didn't change.
+        """
+        return grade_incrementally(
+            self.grading_plan, self.grading_version, state['answer'], state['check_outcomes'],
+            state['result'].get('assignment')
+        )
+
+    @staticmethod
+    def _score(result):
+        """
+        Return score for `result`.
+        """
+        return Score(raw_earned=1 if result.get('correct') else 0, raw_possible=1)
+
     @staticmethod
     def workbench_scenarios():
         """